@@ -17,6 +17,10 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ATOM_FINGERPRINTS import FingerprintStore
+
 HOME = Path(os.environ.get('USERPROFILE', os.path.expanduser('~')))
 CONSCIOUSNESS = HOME / '.consciousness'
 
@@ -51,16 +55,19 @@ def count_unique_tokens(content):
     return len(words - stopwords)
 
 def clean_atoms(db_path, dry_run=True, remove_duplicates=True,
-                remove_low_density=False, min_tokens=5):
+                remove_low_density=False, min_tokens=5, normalized=False):
     """
     Clean atoms database.
 
     Args:
         db_path: Path to atoms.db
         dry_run: If True, only report what would be deleted
-        remove_duplicates: Remove duplicate content atoms
+        remove_duplicates: Remove duplicate content atoms (byte-identical content)
         remove_low_density: Remove atoms with < min_tokens
         min_tokens: Minimum tokens to keep (if remove_low_density=True)
+        normalized: Treat atoms as duplicates when their normalized content
+            matches (case, whitespace and punctuation ignored), using the
+            stored fingerprints
     """
     print("=" * 60)
     print("ATOM CLEANER")
@@ -69,7 +76,11 @@ def clean_atoms(db_path, dry_run=True, remove_duplicates=True,
     print("=" * 60)
     print()
 
-    conn = sqlite3.connect(str(db_path))
+    # A dry run never writes to the database
+    if dry_run:
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+    else:
+        conn = sqlite3.connect(str(db_path))
     cursor = conn.cursor()
 
     # Get schema
@@ -86,27 +97,48 @@ def clean_atoms(db_path, dry_run=True, remove_duplicates=True,
     total_before = cursor.fetchone()[0]
     print(f"Total atoms before: {total_before:,}")
 
-    # Load all atoms
-    cursor.execute(f"SELECT id, {content_col} FROM atoms")
-    atoms = cursor.fetchall()
-
     to_delete = set()
-    seen_hashes = {}
-
-    for atom_id, content in atoms:
-        if not content:
-            continue
 
-        # Check for duplicates
-        if remove_duplicates:
+    # Check for duplicates: exact content, or stored normalized-content hashes
+    if remove_duplicates and not normalized:
+        cursor.execute(f"SELECT id, {content_col} FROM atoms ORDER BY rowid")
+        seen_hashes = {}
+        for atom_id, content in cursor.fetchall():
+            if not content:
+                continue
             h = hash_content(content)
             if h in seen_hashes:
                 to_delete.add(atom_id)  # Keep first, delete subsequent
             else:
                 seen_hashes[h] = atom_id
 
-        # Check for low density
-        if remove_low_density:
+    elif remove_duplicates:
+        fingerprints = FingerprintStore('atoms', content_col)
+        fp_conn = fingerprints.open(db_path, read_only=dry_run)
+        if fp_conn is None:
+            print("ERROR: Cannot fingerprint atoms")
+            conn.close()
+            return None
+        rows = fp_conn.execute(f'''
+            SELECT a.id, f.content_hash
+            FROM atoms a JOIN {fingerprints.fingerprints} f ON f.atom_id = a.id
+            WHERE f.minhash IS NOT NULL
+            ORDER BY a.rowid
+        ''').fetchall()
+        fp_conn.close()
+        seen_hashes = {}
+        for atom_id, h in rows:
+            if h in seen_hashes:
+                to_delete.add(atom_id)  # Keep first, delete subsequent
+            else:
+                seen_hashes[h] = atom_id
+
+    # Check for low density
+    if remove_low_density:
+        cursor.execute(f"SELECT id, {content_col} FROM atoms")
+        for atom_id, content in cursor.fetchall():
+            if not content:
+                continue
             tokens = count_unique_tokens(content)
             if tokens < min_tokens:
                 to_delete.add(atom_id)
@@ -173,6 +205,7 @@ if __name__ == '__main__':
     # Parse args
     dry_run = '--live' not in sys.argv
     remove_low = '--low-density' in sys.argv
+    normalized = '--normalized' in sys.argv
 
     if not dry_run:
         print("WARNING: LIVE MODE - This will delete atoms!")
@@ -181,10 +214,11 @@ if __name__ == '__main__':
             print("Aborted.")
             sys.exit(0)
 
-    clean_atoms(db_path, dry_run=dry_run, remove_low_density=remove_low)
+    clean_atoms(db_path, dry_run=dry_run, remove_low_density=remove_low, normalized=normalized)
 
     print()
     print("=" * 60)
     print("To actually delete, run: python ATOM_CLEANER.py --live")
     print("To also remove low-density: python ATOM_CLEANER.py --live --low-density")
+    print("To match duplicates ignoring case/punctuation: python ATOM_CLEANER.py --normalized")
     print("=" * 60)
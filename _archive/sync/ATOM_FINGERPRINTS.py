@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+ATOM FINGERPRINTS - Persistent per-atom dedup fingerprints
+==========================================================
+
+Dedup tools used to re-read and re-hash every atom on every run. A
+FingerprintStore keeps, next to an atoms table, one row per atom with:
+- content_hash: md5 of the normalized content (exact duplicates)
+- simhash: 64-bit SimHash of the normalized words (near-duplicate distance)
+- minhash: MinHash signature of the character 3-grams (estimated Jaccard)
+
+and a band table over the MinHash signatures, so checking a new atom
+against the whole corpus is an indexed lookup of a few buckets rather
+than a scan - cheap enough to run at insert time.
+
+Writers fingerprint atoms as they store them. Triggers drop the
+fingerprint of a row that is deleted, replaced or whose content changes,
+and ensure() backfills any atom that has no fingerprint yet. The replace
+case is handled AFTER INSERT, which only fires for a row that was really
+written, so an INSERT OR IGNORE of an existing id keeps its fingerprint.
+
+Used by ATOM_INDEX_BUILDER, DATA_CHUNKER, the JSON and Markdown ingesters,
+ATOM_CLEANER and ATOM_MERGE_TOOL.
+"""
+
+import re
+import sys
+import sqlite3
+import hashlib
+from array import array
+from functools import partial
+from pathlib import Path
+from operator import methodcaller
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from MINHASH_LSH import NUM_PERM, SIGNATURE_TYPE, minhash_signature, estimated_similarity
+
+# Estimated Jaccard at which a stored atom counts as a near duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.90
+
+# Stored bands: 10 x 12 rows. A pair shares a band with probability
+# 1-(1-J^12)^10: ~96% at Jaccard 0.9, ~51% at 0.8, under 1% below 0.6
+STORED_BANDS = 10
+STORED_ROWS = NUM_PERM // STORED_BANDS
+
+# Missing fingerprints are computed in worker processes above this many
+PARALLEL_BACKFILL = 2000
+BACKFILL_CHUNK = 5000
+
+_hash64 = partial(hashlib.blake2b, digest_size=8)
+_digest = methodcaller('digest')
+_to_int = partial(int.from_bytes, byteorder='big')
+_bits64 = '{:064b}'.format
+
+# Signature blobs and band hashes use little-endian slots on every host, so
+# fingerprints synced between machines compare the same
+SWAP_BYTES = sys.byteorder == 'big'
+
+
+def signature_bytes(signature: array) -> bytes:
+    """Little-endian bytes of a MinHash signature (or a slice of one)"""
+    if SWAP_BYTES:
+        signature = array(SIGNATURE_TYPE, signature)
+        signature.byteswap()
+    return signature.tobytes()
+
+
+def signature_from_bytes(blob: bytes) -> array:
+    """MinHash signature from a little-endian blob"""
+    signature = array(SIGNATURE_TYPE, blob)
+    if SWAP_BYTES:
+        signature.byteswap()
+    return signature
+
+
+def normalize_content(content):
+    """Normalize content for comparison."""
+    if not content:
+        return ""
+    # Convert to lowercase, remove extra whitespace
+    text = str(content).lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    # Remove common punctuation variations
+    text = re.sub(r'[.,;:!?\'"()-]', '', text)
+    return text
+
+
+def content_hash(content):
+    """Generate hash of normalized content."""
+    normalized = normalize_content(content)
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def get_ngrams(text, n=3):
+    """Generate character n-grams from text."""
+    text = normalize_content(text)
+    if len(text) < n:
+        return set([text])
+    return set(text[i:i+n] for i in range(len(text) - n + 1))
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of the normalized words, as a signed integer (SQLite's
+    INTEGER range). Every word votes on every bit; the bit columns are
+    counted in C by transposing the words' bit strings.
+    """
+    words = normalize_content(text).split()
+    if not words:
+        return 0
+    rows = list(map(_bits64, map(_to_int, map(_digest, map(_hash64, map(str.encode, words))))))
+    half = len(rows) / 2
+    value = int(''.join('1' if column.count('1') > half else '0' for column in zip(*rows)), 2)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def simhash_distance(hash1: int, hash2: int) -> int:
+    """Number of differing bits between two SimHashes"""
+    return bin((hash1 ^ hash2) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+def fingerprint(content) -> Dict:
+    """
+    Fingerprint of one atom's content. minhash is None when nothing is left
+    after normalizing. Picklable, so it can run in a worker process.
+    """
+    normalized = normalize_content(content)
+    return {
+        'content_hash': hashlib.md5(normalized.encode()).hexdigest(),
+        'simhash': simhash(normalized),
+        'minhash': minhash_signature(get_ngrams(normalized)) if normalized else None,
+    }
+
+
+def band_buckets(signature: array) -> List[int]:
+    """Stable bucket IDs (signed 64-bit) of a signature's stored bands"""
+    buckets = []
+    for b in range(STORED_BANDS):
+        band = signature_bytes(signature[b * STORED_ROWS:(b + 1) * STORED_ROWS])
+        value = _to_int(_hash64(bytes([b]) + band).digest())
+        buckets.append(value - (1 << 64) if value >= 1 << 63 else value)
+    return buckets
+
+
+class FingerprintStore:
+    """Fingerprints of table.column rows, keyed by the table's key column"""
+
+    def __init__(self, table: str = 'atoms', column: str = 'content', key: str = 'id'):
+        self.table = table
+        self.column = column
+        self.key = key
+        self.fingerprints = f"{table}_fingerprints"
+        self.bands = f"{table}_fingerprint_bands"
+
+    def open(self, db_path, read_only: bool = False):
+        """
+        Connection to the database at db_path with every row fingerprinted,
+        or None if the database does not exist or cannot be fingerprinted.
+
+        With read_only (dry runs) nothing is written to the database: it is
+        opened read-only, and if any of its rows lack a fingerprint the
+        returned connection is an in-memory copy of the fingerprints with the
+        missing ones computed there, the database attached read-only.
+        """
+        if not db_path.exists():
+            return None
+        conn = None
+        try:
+            if read_only:
+                uri = Path(db_path).resolve().as_uri() + '?mode=ro'
+                conn = sqlite3.connect(uri, uri=True)
+                if not self._complete(conn):
+                    conn.close()
+                    conn = sqlite3.connect('file::memory:', uri=True)
+                    self._snapshot(conn, uri)
+            else:
+                conn = sqlite3.connect(str(db_path))
+                self.ensure(conn)
+        except sqlite3.Error as e:
+            print(f"  Fingerprints unavailable: {e}")
+            if conn is not None:
+                conn.close()
+            return None
+        return conn
+
+    def _complete(self, conn) -> bool:
+        """Whether the fingerprint tables exist and cover every row"""
+        tables = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+            (self.fingerprints, self.bands)
+        ).fetchone()[0]
+        if tables < 2:
+            return False
+        return conn.execute(f'''
+            SELECT 1 FROM {self.table}
+            WHERE {self.key} NOT IN (SELECT atom_id FROM {self.fingerprints}) LIMIT 1
+        ''').fetchone() is None
+
+    def _snapshot(self, conn, uri: str):
+        """Fingerprint tables in conn (in memory) for the read-only database at uri"""
+        conn.execute('ATTACH DATABASE ? AS live', (uri,))
+        with conn:
+            self._create_tables(conn)
+            stored = {row[0] for row in conn.execute(
+                "SELECT name FROM live.sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+                (self.fingerprints, self.bands)
+            )}
+            if stored == {self.fingerprints, self.bands}:
+                conn.execute(f'INSERT INTO main.{self.fingerprints} SELECT * FROM live.{self.fingerprints}')
+                conn.execute(f'INSERT INTO main.{self.bands} SELECT * FROM live.{self.bands}')
+        # The unqualified table name now resolves to live's rows
+        self.backfill(conn)
+
+    def _create_tables(self, conn):
+        fp, bands = self.fingerprints, self.bands
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {fp} (
+                atom_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                simhash INTEGER,
+                minhash BLOB
+            )
+        ''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {fp}_hash ON {fp}(content_hash)')
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {bands} (
+                bucket INTEGER NOT NULL,
+                atom_id TEXT NOT NULL,
+                PRIMARY KEY (bucket, atom_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {bands}_atom ON {bands}(atom_id)')
+
+    def ensure(self, conn, workers: Optional[int] = None) -> int:
+        """
+        Create the fingerprint tables and triggers if missing, then
+        fingerprint every row that has none. Returns the number backfilled.
+        """
+        t, col, key, fp, bands = self.table, self.column, self.key, self.fingerprints, self.bands
+        with conn:
+            self._create_tables(conn)
+
+            # A replaced, deleted or edited row loses its (now stale) fingerprint.
+            # Writers store the new fingerprint after their INSERT.
+            forget = f'''
+                DELETE FROM {fp} WHERE atom_id = {{row}}.{key};
+                DELETE FROM {bands} WHERE atom_id = {{row}}.{key};
+            '''
+            # Earlier versions did this BEFORE INSERT, which also fired for ignored inserts
+            conn.execute(f'DROP TRIGGER IF EXISTS {fp}_bi')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fp}_ai AFTER INSERT ON {t} BEGIN
+                    {forget.format(row='new')}
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fp}_ad AFTER DELETE ON {t} BEGIN
+                    {forget.format(row='old')}
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fp}_au AFTER UPDATE OF {col} ON {t} BEGIN
+                    {forget.format(row='old')}
+                END
+            ''')
+        return self.backfill(conn, workers)
+
+    def backfill(self, conn, workers: Optional[int] = None) -> int:
+        """
+        Fingerprint every row of the table that has no fingerprint, and drop
+        fingerprints of rows that are gone (e.g. removed by a REPLACE that
+        conflicted on another column).
+        """
+        with conn:
+            orphans = conn.execute(f'''
+                DELETE FROM {self.fingerprints}
+                WHERE atom_id NOT IN (SELECT {self.key} FROM {self.table})
+            ''').rowcount
+            if orphans > 0:
+                conn.execute(f'''
+                    DELETE FROM {self.bands}
+                    WHERE atom_id NOT IN (SELECT atom_id FROM {self.fingerprints})
+                ''')
+
+        missing = conn.execute(f'''
+            SELECT {self.key}, {self.column} FROM {self.table}
+            WHERE {self.key} NOT IN (SELECT atom_id FROM {self.fingerprints})
+        ''').fetchall()
+        if not missing:
+            return 0
+
+        print(f"[FINGERPRINTS] Fingerprinting {len(missing)} atoms in {self.table}...")
+        pool = None
+        if len(missing) > PARALLEL_BACKFILL:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            for start in range(0, len(missing), BACKFILL_CHUNK):
+                chunk = missing[start:start + BACKFILL_CHUNK]
+                contents = [content or '' for _, content in chunk]
+                if pool:
+                    fingerprints = pool.map(fingerprint, contents, chunksize=256)
+                else:
+                    fingerprints = map(fingerprint, contents)
+                with conn:
+                    self.add_many(conn, zip((atom_id for atom_id, _ in chunk), fingerprints))
+        finally:
+            if pool:
+                pool.shutdown()
+        return len(missing)
+
+    def add_many(self, conn, items: Iterable[Tuple[str, Dict]]):
+        """Store (atom_id, fingerprint) pairs (call inside the caller's transaction)"""
+        rows = []
+        band_rows = []
+        for atom_id, fp in items:
+            minhash = fp['minhash']
+            rows.append((atom_id, fp['content_hash'], fp['simhash'],
+                         signature_bytes(minhash) if minhash is not None else None))
+            if minhash is not None:
+                band_rows.extend((bucket, atom_id) for bucket in band_buckets(minhash))
+
+        conn.executemany(f'DELETE FROM {self.bands} WHERE atom_id = ?', [(row[0],) for row in rows])
+        conn.executemany(f'''
+            INSERT OR REPLACE INTO {self.fingerprints} (atom_id, content_hash, simhash, minhash)
+            VALUES (?, ?, ?, ?)
+        ''', rows)
+        conn.executemany(f'INSERT OR IGNORE INTO {self.bands} (bucket, atom_id) VALUES (?, ?)', band_rows)
+
+    def add(self, conn, atom_id: str, fp: Dict):
+        """Store one atom's fingerprint (call inside the caller's transaction)"""
+        self.add_many(conn, [(atom_id, fp)])
+
+    def find_duplicates(self, conn, fp: Dict, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                        limit: int = 5) -> List[Dict]:
+        """
+        Stored atoms that duplicate a fingerprint, most similar first: exact
+        matches of the normalized content, then atoms sharing a MinHash band
+        whose estimated Jaccard is at least threshold.
+        """
+        found = {}
+        for (atom_id, simhash_value) in conn.execute(
+            f'SELECT atom_id, simhash FROM {self.fingerprints} WHERE content_hash = ? LIMIT ?',
+            (fp['content_hash'], limit)
+        ):
+            found[atom_id] = {
+                'atom_id': atom_id,
+                'similarity': 1.0,
+                'exact': True,
+                'simhash_distance': simhash_distance(fp['simhash'], simhash_value),
+            }
+
+        minhash = fp['minhash']
+        if minhash is not None and len(found) < limit:
+            buckets = band_buckets(minhash)
+            placeholders = ','.join('?' * len(buckets))
+            cursor = conn.execute(f'''
+                SELECT atom_id, simhash, minhash FROM {self.fingerprints}
+                WHERE atom_id IN (SELECT atom_id FROM {self.bands} WHERE bucket IN ({placeholders}))
+            ''', buckets)
+            for atom_id, simhash_value, stored in cursor:
+                if atom_id in found or stored is None:
+                    continue
+                similarity = estimated_similarity(minhash, signature_from_bytes(stored))
+                if similarity >= threshold:
+                    found[atom_id] = {
+                        'atom_id': atom_id,
+                        'similarity': round(similarity, 3),
+                        'exact': False,
+                        'simhash_distance': simhash_distance(fp['simhash'], simhash_value),
+                    }
+
+        return sorted(found.values(), key=lambda d: (-d['similarity'], d['simhash_distance']))[:limit]
+
+    def find_exact(self, conn, fp: Dict, content: str) -> Optional[str]:
+        """ID of a stored atom whose content is byte-identical to content, or None"""
+        # Identical content has the same normalized hash, so the index narrows the candidates
+        row = conn.execute(f'''
+            SELECT f.atom_id FROM {self.fingerprints} f
+            JOIN {self.table} t ON t.{self.key} = f.atom_id
+            WHERE f.content_hash = ? AND t.{self.column} = ?
+            LIMIT 1
+        ''', (fp['content_hash'], content)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def batch_key(fp: Dict, content: str, near_duplicates: bool = False) -> str:
+        """Key under which find_duplicate looks up content queued in this run"""
+        if near_duplicates:
+            return fp['content_hash']
+        return hashlib.md5(content.encode('utf-8', errors='ignore')).hexdigest()
+
+    def find_duplicate(self, conn, fp: Dict, batch: Dict[str, str], content: str,
+                       near_duplicates: bool = False) -> Optional[str]:
+        """
+        ID of the atom new content duplicates, or None. Only byte-identical
+        content counts unless near_duplicates, which also matches normalized
+        and near-duplicate content (find_duplicates). batch maps the
+        batch_key of atoms queued in this run (not yet stored) to their IDs
+        and is checked first; conn may be None when there is no database.
+        """
+        key = self.batch_key(fp, content, near_duplicates)
+        if key in batch:
+            return batch[key]
+        if conn is None:
+            return None
+        if not near_duplicates:
+            return self.find_exact(conn, fp, content)
+        matches = self.find_duplicates(conn, fp, limit=1)
+        return matches[0]['atom_id'] if matches else None
+
+    def count(self, conn) -> int:
+        return conn.execute(f'SELECT COUNT(*) FROM {self.fingerprints}').fetchone()[0]
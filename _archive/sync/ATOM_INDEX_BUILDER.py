@@ -6,6 +6,8 @@ Creates SQLite FTS5 index for instant atom search across 4397+ atoms.
 This eliminates the #1 bottleneck: sequential file reads.
 """
 
+import os
+import sys
 import sqlite3
 import json
 import hashlib
@@ -13,12 +15,53 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from KEYWORD_ENGINE import (KeywordExtractor, PostingsBuilder, Vocabulary,
+                            create_keyword_tables, lookup_postings)
+from ATOM_FINGERPRINTS import FingerprintStore, fingerprint
+
 # Paths
 HOME = Path.home()
 CONSCIOUSNESS = HOME / ".consciousness"
 ATOMS_DIR = CONSCIOUSNESS / "cyclotron_core" / "atoms"
 INDEX_DB = CONSCIOUSNESS / "memory" / "atom_index.db"
 
+# Top keywords kept per atom
+KEYWORDS_PER_ATOM = 20
+ATOM_KEYWORDS = KeywordExtractor()
+
+# Per-atom dedup fingerprints, written alongside each indexed atom
+FINGERPRINTS = FingerprintStore('atoms', 'content')
+
+# Bulk loads insert this many parsed atoms per executemany
+BULK_CHUNK = 1000
+
+# Triggers keeping atoms_fts in sync, by name. A bulk load drops them and
+# rebuilds atoms_fts once at the end instead.
+FTS_TRIGGERS = {
+    'atoms_ai': '''
+        CREATE TRIGGER IF NOT EXISTS atoms_ai AFTER INSERT ON atoms BEGIN
+            INSERT INTO atoms_fts(rowid, id, title, content, keywords)
+            VALUES (new.rowid, new.id, new.title, new.content, new.keywords);
+        END
+    ''',
+    'atoms_ad': '''
+        CREATE TRIGGER IF NOT EXISTS atoms_ad AFTER DELETE ON atoms BEGIN
+            INSERT INTO atoms_fts(atoms_fts, rowid, id, title, content, keywords)
+            VALUES('delete', old.rowid, old.id, old.title, old.content, old.keywords);
+        END
+    ''',
+    'atoms_au': '''
+        CREATE TRIGGER IF NOT EXISTS atoms_au AFTER UPDATE ON atoms BEGIN
+            INSERT INTO atoms_fts(atoms_fts, rowid, id, title, content, keywords)
+            VALUES('delete', old.rowid, old.id, old.title, old.content, old.keywords);
+            INSERT INTO atoms_fts(rowid, id, title, content, keywords)
+            VALUES (new.rowid, new.id, new.title, new.content, new.keywords);
+        END
+    ''',
+}
+
 def create_index_db():
     """Create the FTS5-enabled index database."""
     conn = sqlite3.connect(str(INDEX_DB))
@@ -54,40 +97,11 @@ def create_index_db():
     ''')
 
     # Triggers to keep FTS in sync
-    cur.execute('''
-        CREATE TRIGGER IF NOT EXISTS atoms_ai AFTER INSERT ON atoms BEGIN
-            INSERT INTO atoms_fts(rowid, id, title, content, keywords)
-            VALUES (new.rowid, new.id, new.title, new.content, new.keywords);
-        END
-    ''')
-
-    cur.execute('''
-        CREATE TRIGGER IF NOT EXISTS atoms_ad AFTER DELETE ON atoms BEGIN
-            INSERT INTO atoms_fts(atoms_fts, rowid, id, title, content, keywords)
-            VALUES('delete', old.rowid, old.id, old.title, old.content, old.keywords);
-        END
-    ''')
-
-    cur.execute('''
-        CREATE TRIGGER IF NOT EXISTS atoms_au AFTER UPDATE ON atoms BEGIN
-            INSERT INTO atoms_fts(atoms_fts, rowid, id, title, content, keywords)
-            VALUES('delete', old.rowid, old.id, old.title, old.content, old.keywords);
-            INSERT INTO atoms_fts(rowid, id, title, content, keywords)
-            VALUES (new.rowid, new.id, new.title, new.content, new.keywords);
-        END
-    ''')
-
-    # Keyword index for fast lookup
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS keyword_index (
-            keyword TEXT,
-            atom_id TEXT,
-            frequency INTEGER DEFAULT 1,
-            PRIMARY KEY (keyword, atom_id)
-        )
-    ''')
+    for trigger_sql in FTS_TRIGGERS.values():
+        cur.execute(trigger_sql)
 
-    cur.execute('CREATE INDEX IF NOT EXISTS idx_keyword ON keyword_index(keyword)')
+    # Keyword index for fast lookup: term IDs and one sorted postings array per term
+    create_keyword_tables(cur)
 
     # Source index
     cur.execute('''
@@ -99,6 +113,9 @@ def create_index_db():
     ''')
 
     conn.commit()
+
+    # Fingerprint tables; fills in atoms indexed before fingerprints existed
+    FINGERPRINTS.ensure(conn)
     return conn
 
 def extract_content(atom: Dict) -> str:
@@ -114,35 +131,52 @@ def extract_content(atom: Dict) -> str:
     return ' '.join(parts)
 
 def extract_keywords(content: str) -> List[str]:
-    """Extract keywords from content."""
-    import re
-    # Simple keyword extraction
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', content.lower())
-    # Count frequency
-    freq = {}
-    for w in words:
-        freq[w] = freq.get(w, 0) + 1
-    # Return top keywords
-    sorted_words = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-    return [w for w, c in sorted_words[:20]]
+    """Extract keywords from content: the most frequent words, stop words excluded."""
+    return ATOM_KEYWORDS.top(content, KEYWORDS_PER_ATOM)
 
-def index_atom(conn, atom_file: Path) -> bool:
-    """Index a single atom file."""
+def parse_atom(atom_file: Path) -> Dict:
+    """Read one atom file and prepare its row. Picklable, so it can run in a worker process."""
     try:
         with open(atom_file, 'r', encoding='utf-8') as f:
             atom = json.load(f)
 
-        atom_id = atom_file.stem
         content = extract_content(atom)
-        content_hash = hashlib.md5(content.encode()).hexdigest()
-        keywords = extract_keywords(content)
+        stored = content[:10000]  # Limit content size
+        parsed = {
+            'id': atom_file.stem,
+            'file_path': str(atom_file),
+            'source': atom.get('source', 'unknown'),
+            'title': atom.get('title', atom.get('source', 'untitled')),
+            'content': stored,
+            'keywords': extract_keywords(content),
+            'content_hash': hashlib.md5(content.encode()).hexdigest(),
+            'created_at': atom.get('created', atom.get('timestamp', '')),
+            'fingerprint': fingerprint(stored),
+        }
+        for key in ('source', 'title', 'created_at'):
+            if not isinstance(parsed[key], (str, int, float, type(None))):
+                raise TypeError(f"unsupported {key} value: {type(parsed[key]).__name__}")
+        return parsed
+
+    except Exception as e:
+        return {'id': atom_file.stem, 'error': f"Error indexing {atom_file.name}: {e}"}
 
+def index_atom(conn, atom_file: Path) -> bool:
+    """Index a single atom file."""
+    parsed = parse_atom(atom_file)
+    if 'error' in parsed:
+        print(parsed['error'])
+        return False
+
+    try:
+        atom_id = parsed['id']
+        keywords = parsed['keywords']
         cur = conn.cursor()
 
         # Check if already indexed with same hash
         cur.execute('SELECT content_hash FROM atoms WHERE id = ?', (atom_id,))
         existing = cur.fetchone()
-        if existing and existing[0] == content_hash:
+        if existing and existing[0] == parsed['content_hash']:
             return False  # Already indexed, no change
 
         # Insert or replace
@@ -152,25 +186,19 @@ def index_atom(conn, atom_file: Path) -> bool:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             atom_id,
-            str(atom_file),
-            atom.get('source', 'unknown'),
-            atom.get('title', atom.get('source', 'untitled')),
-            content[:10000],  # Limit content size
+            parsed['file_path'],
+            parsed['source'],
+            parsed['title'],
+            parsed['content'],
             ','.join(keywords),
-            content_hash,
-            atom.get('created', atom.get('timestamp', '')),
+            parsed['content_hash'],
+            parsed['created_at'],
             datetime.now().isoformat()
         ))
-
-        # Update keyword index
-        for kw in keywords:
-            cur.execute('''
-                INSERT OR REPLACE INTO keyword_index (keyword, atom_id, frequency)
-                VALUES (?, ?, COALESCE((SELECT frequency FROM keyword_index WHERE keyword=? AND atom_id=?), 0) + 1)
-            ''', (kw, atom_id, kw, atom_id))
+        FINGERPRINTS.add(cur, atom_id, parsed['fingerprint'])
 
         # Update source index
-        source = atom.get('source', 'unknown')
+        source = parsed['source']
         cur.execute('''
             INSERT OR REPLACE INTO source_index (source, atom_count, last_updated)
             VALUES (?, COALESCE((SELECT atom_count FROM source_index WHERE source=?), 0) + 1, ?)
@@ -182,8 +210,116 @@ def index_atom(conn, atom_file: Path) -> bool:
         print(f"Error indexing {atom_file.name}: {e}")
         return False
 
-def build_full_index():
-    """Build index for all atoms."""
+def _write_bulk_chunk(cur, chunk: List[Dict], indexed_at: str, source_counts: Dict):
+    """Insert one chunk of parsed atoms with executemany."""
+    cur.executemany('''
+        INSERT OR REPLACE INTO atoms
+        (id, file_path, source, title, content, keywords, content_hash, created_at, indexed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (a['id'], a['file_path'], a['source'], a['title'], a['content'],
+         ','.join(a['keywords']), a['content_hash'], a['created_at'], indexed_at)
+        for a in chunk
+    ])
+    FINGERPRINTS.add_many(cur, ((a['id'], a['fingerprint']) for a in chunk))
+
+    for a in chunk:
+        source_counts[a['source']] = source_counts.get(a['source'], 0) + 1
+
+def bulk_load(conn, atom_files: List[Path], workers: Optional[int] = None) -> tuple:
+    """
+    Load many atoms in one transaction.
+
+    JSON parsing, hashing and keyword extraction run in worker processes.
+    The FTS triggers are dropped for the load, rows go in through
+    executemany, and atoms_fts is rebuilt once from the atoms table before
+    the triggers are restored - all inside the same transaction, so a
+    failed load leaves the previous index untouched.
+
+    Returns (indexed, skipped).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    cur = conn.cursor()
+    known = dict(cur.execute('SELECT id, content_hash FROM atoms'))
+    indexed_at = datetime.now().isoformat()
+    source_counts = {}
+    indexed = 0
+    skipped = 0
+    total = len(atom_files)
+
+    cur.execute('BEGIN')
+    try:
+        for name in FTS_TRIGGERS:
+            cur.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+        chunk = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for i, parsed in enumerate(pool.map(parse_atom, atom_files, chunksize=64)):
+                if 'error' in parsed:
+                    print(parsed['error'])
+                    skipped += 1
+                elif known.get(parsed['id']) == parsed['content_hash']:
+                    skipped += 1  # Already indexed, no change
+                else:
+                    chunk.append(parsed)
+                    indexed += 1
+                    if len(chunk) >= BULK_CHUNK:
+                        _write_bulk_chunk(cur, chunk, indexed_at, source_counts)
+                        chunk = []
+
+                if (i + 1) % 5000 == 0:
+                    print(f"Progress: {i+1}/{total} ({indexed} indexed, {skipped} unchanged)")
+
+        if chunk:
+            _write_bulk_chunk(cur, chunk, indexed_at, source_counts)
+
+        cur.executemany('''
+            INSERT INTO source_index (source, atom_count, last_updated) VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                atom_count = atom_count + excluded.atom_count,
+                last_updated = excluded.last_updated
+        ''', [(source, count, indexed_at) for source, count in source_counts.items()])
+
+        print("Rebuilding full-text index...")
+        cur.execute("INSERT INTO atoms_fts(atoms_fts) VALUES('rebuild')")
+        for trigger_sql in FTS_TRIGGERS.values():
+            cur.execute(trigger_sql)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    # Merge the rebuilt FTS segments into one b-tree for faster queries
+    cur.execute("INSERT INTO atoms_fts(atoms_fts) VALUES('optimize')")
+    conn.commit()
+    return indexed, skipped
+
+def rebuild_keyword_index(conn) -> int:
+    """
+    Rebuild the keyword postings from atoms.keywords in one sequential pass
+    and one write. Returns the number of distinct keywords.
+    """
+    vocab = Vocabulary(conn)
+    builder = PostingsBuilder()
+
+    cur = conn.execute('SELECT rowid, keywords FROM atoms ORDER BY rowid')
+    while True:
+        rows = cur.fetchmany(BULK_CHUNK)
+        if not rows:
+            break
+        for rowid, keywords in rows:
+            if keywords:
+                builder.add(rowid, keywords.split(','))
+
+    with conn:
+        builder.save(conn, vocab)
+        # One row per (keyword, atom) - superseded by keyword_postings
+        conn.execute('DROP TABLE IF EXISTS keyword_index')
+    return len(builder.doc_ids)
+
+def build_full_index(bulk: bool = False, workers: Optional[int] = None):
+    """Build index for all atoms. bulk=True uses bulk_load (best for cold builds)."""
     print("=" * 60)
     print("ATOM INDEX BUILDER - Zero Latency Supercharger")
     print("=" * 60)
@@ -203,23 +339,31 @@ def build_full_index():
     print(f"Index DB: {INDEX_DB}")
     print()
 
-    for i, atom_file in enumerate(atom_files):
-        if index_atom(conn, atom_file):
-            indexed += 1
-        else:
-            skipped += 1
+    if bulk:
+        indexed, skipped = bulk_load(conn, atom_files, workers)
+    else:
+        for i, atom_file in enumerate(atom_files):
+            if index_atom(conn, atom_file):
+                indexed += 1
+            else:
+                skipped += 1
 
-        if (i + 1) % 500 == 0:
-            conn.commit()
-            print(f"Progress: {i+1}/{total} ({indexed} indexed, {skipped} unchanged)")
+            if (i + 1) % 500 == 0:
+                conn.commit()
+                print(f"Progress: {i+1}/{total} ({indexed} indexed, {skipped} unchanged)")
 
-    conn.commit()
+        conn.commit()
 
-    # Get stats
     cur = conn.cursor()
+    cur.execute('SELECT 1 FROM keyword_postings LIMIT 1')
+    if indexed or cur.fetchone() is None:
+        print("Rebuilding keyword index...")
+        rebuild_keyword_index(conn)
+
+    # Get stats
     cur.execute('SELECT COUNT(*) FROM atoms')
     atom_count = cur.fetchone()[0]
-    cur.execute('SELECT COUNT(DISTINCT keyword) FROM keyword_index')
+    cur.execute('SELECT COUNT(*) FROM keyword_postings')
     keyword_count = cur.fetchone()[0]
     cur.execute('SELECT COUNT(*) FROM source_index')
     source_count = cur.fetchone()[0]
@@ -278,16 +422,17 @@ def search_by_keyword(keyword: str, limit: int = 20) -> List[str]:
     conn = sqlite3.connect(str(INDEX_DB))
     cur = conn.cursor()
 
-    cur.execute('''
-        SELECT atom_id FROM keyword_index
-        WHERE keyword = ?
-        ORDER BY frequency DESC
-        LIMIT ?
-    ''', (keyword.lower(), limit))
+    # Atoms where the keyword ranks highest first; ties stay in rowid order
+    rowids, ranks = lookup_postings(conn, keyword.lower())
+    best = sorted(range(len(rowids)), key=ranks.__getitem__)[:limit]
+    rowids = [rowids[i] for i in best]
+
+    placeholders = ','.join('?' for _ in rowids)
+    cur.execute(f'SELECT rowid, id FROM atoms WHERE rowid IN ({placeholders})', rowids)
+    ids = dict(cur.fetchall())
 
-    results = [row[0] for row in cur.fetchall()]
     conn.close()
-    return results
+    return [ids[rowid] for rowid in rowids if rowid in ids]
 
 def get_stats() -> Dict:
     """Get index statistics."""
@@ -298,7 +443,7 @@ def get_stats() -> Dict:
     cur.execute('SELECT COUNT(*) FROM atoms')
     stats['total_atoms'] = cur.fetchone()[0]
 
-    cur.execute('SELECT COUNT(DISTINCT keyword) FROM keyword_index')
+    cur.execute('SELECT COUNT(*) FROM keyword_postings')
     stats['unique_keywords'] = cur.fetchone()[0]
 
     cur.execute('SELECT SUM(access_count) FROM atoms')
@@ -311,8 +456,6 @@ def get_stats() -> Dict:
     return stats
 
 if __name__ == "__main__":
-    import sys
-
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
         if cmd == "search" and len(sys.argv) > 2:
@@ -324,10 +467,19 @@ if __name__ == "__main__":
         elif cmd == "stats":
             stats = get_stats()
             print(json.dumps(stats, indent=2))
+        elif cmd == "keywords":
+            conn = create_index_db()
+            print(f"Rebuilt keyword index: {rebuild_keyword_index(conn)} keywords")
+            conn.close()
+        elif cmd == "bulk":
+            workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            build_full_index(bulk=True, workers=workers)
         else:
             print("Usage:")
             print("  python ATOM_INDEX_BUILDER.py        - Build full index")
+            print("  python ATOM_INDEX_BUILDER.py bulk [workers]  - Bulk build (parallel parse, one FTS rebuild)")
             print("  python ATOM_INDEX_BUILDER.py search <query>  - Search atoms")
             print("  python ATOM_INDEX_BUILDER.py stats  - Show statistics")
+            print("  python ATOM_INDEX_BUILDER.py keywords  - Rebuild the keyword index")
     else:
         build_full_index()
@@ -17,7 +17,7 @@ Features:
 Methods:
 - Exact hash matching (100% duplicates)
 - Content similarity (fuzzy matching)
-- N-gram Jaccard similarity
+- N-gram Jaccard similarity (MinHash/LSH candidates over the whole table)
 - Source + type clustering
 
 Run: python ATOM_MERGE_TOOL.py [scan|report|merge|cleanup]
@@ -27,12 +27,16 @@ import os
 import sys
 import json
 import sqlite3
-import hashlib
-import re
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from MINHASH_LSH import LSHIndex, estimated_similarity
+from ATOM_FINGERPRINTS import FingerprintStore, normalize_content, content_hash, get_ngrams, signature_from_bytes
 
 # Configuration
 HOME = Path(os.environ.get('USERPROFILE', os.path.expanduser('~')))
@@ -47,31 +51,12 @@ HIGH_SIMILARITY_THRESHOLD = 0.90  # 90%+ similarity
 MERGE_THRESHOLD = 0.85           # Suggest merge at 85%+
 REVIEW_THRESHOLD = 0.70          # Flag for review at 70%+
 
+# Stored per-atom fingerprints (content hash, SimHash, MinHash)
+FINGERPRINTS = FingerprintStore('atoms', 'content')
 
-def normalize_content(content):
-    """Normalize content for comparison."""
-    if not content:
-        return ""
-    # Convert to lowercase, remove extra whitespace
-    text = str(content).lower()
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Remove common punctuation variations
-    text = re.sub(r'[.,;:!?\'"()-]', '', text)
-    return text
-
-
-def content_hash(content):
-    """Generate hash of normalized content."""
-    normalized = normalize_content(content)
-    return hashlib.md5(normalized.encode()).hexdigest()
-
-
-def get_ngrams(text, n=3):
-    """Generate character n-grams from text."""
-    text = normalize_content(text)
-    if len(text) < n:
-        return set([text])
-    return set(text[i:i+n] for i in range(len(text) - n + 1))
+# LSH candidates whose signatures estimate Jaccard this far below the n-gram
+# filter are dropped before the exact check (estimate error is ~0.04)
+ESTIMATE_SLACK = 0.15
 
 
 def jaccard_similarity(set1, set2):
@@ -92,6 +77,15 @@ def sequence_similarity(str1, str2):
                           normalize_content(str2)).ratio()
 
 
+def score_pair(pair):
+    """(ngram_sim, seq_sim) for a candidate pair; seq_sim is None below the n-gram filter."""
+    content1, content2, min_ngram_sim = pair
+    ngram_sim = jaccard_similarity(get_ngrams(content1), get_ngrams(content2))
+    if ngram_sim < min_ngram_sim:
+        return ngram_sim, None
+    return ngram_sim, sequence_similarity(content1, content2)
+
+
 class AtomMergeTool:
     """Tool for detecting and merging duplicate atoms."""
 
@@ -143,61 +137,76 @@ class AtomMergeTool:
         print(f"  Found {len(exact_dupes)} groups of exact duplicates")
         return exact_dupes
 
-    def scan_similar_content(self, sample_size=5000, threshold=MERGE_THRESHOLD):
-        """Find similar atoms using content comparison."""
-        print(f"Scanning for similar content (sample: {sample_size})...")
+    def scan_similar_content(self, sample_size=None, threshold=MERGE_THRESHOLD, workers=None):
+        """
+        Find similar atoms using content comparison.
+
+        Scans the whole table (or a random sample if sample_size is given).
+        Stored MinHash signatures (see ATOM_FINGERPRINTS; atoms without one
+        are fingerprinted first) go into LSH band buckets per type, and only
+        atoms sharing a bucket are compared - n-gram Jaccard first, then
+        SequenceMatcher - in worker processes.
+        Atoms with identical normalized content are compared once; those
+        groups are reported by scan_exact_duplicates.
+        """
+        FINGERPRINTS.ensure(self.conn, workers)
         cursor = self.conn.cursor()
 
-        # Sample atoms for comparison (full scan would be O(n²))
-        cursor.execute("""
-            SELECT id, content, type, source, created
-            FROM atoms
-            ORDER BY RANDOM()
-            LIMIT ?
-        """, (sample_size,))
-        rows = cursor.fetchall()
-        atoms = [dict(row) for row in rows]
-
-        # Group by type for efficiency
-        by_type = defaultdict(list)
-        for atom in atoms:
-            by_type[atom['type']].append(atom)
+        query = f"""
+            SELECT a.id, a.content, a.type, a.source, a.created, f.content_hash, f.minhash
+            FROM atoms a
+            JOIN {FINGERPRINTS.fingerprints} f ON f.atom_id = a.id
+            WHERE f.minhash IS NOT NULL
+        """
+        if sample_size:
+            print(f"Scanning for similar content (sample: {sample_size})...")
+            cursor.execute(query + " ORDER BY RANDOM() LIMIT ?", (sample_size,))
+        else:
+            print("Scanning for similar content (full scan)...")
+            cursor.execute(query)
+
+        # One representative per (type, normalized content)
+        atoms = []
+        signatures = []
+        seen = set()
+        lsh = LSHIndex()
+        for row in cursor:
+            key = (row['type'], row['content_hash'])
+            if key not in seen:
+                seen.add(key)
+                signature = signature_from_bytes(row['minhash'])
+                lsh.add(len(atoms), signature, group=row['type'])
+                signatures.append(signature)
+                atoms.append({k: row[k] for k in ('id', 'content', 'type', 'source', 'created')})
+
+        loose = threshold * 0.8  # Loose n-gram filter
+        candidates = [
+            (i, j) for i, j in lsh.candidate_pairs()
+            if atoms[i]['type'] == atoms[j]['type']
+            and estimated_similarity(signatures[i], signatures[j]) >= loose - ESTIMATE_SLACK
+        ]
+        del signatures, lsh
+        print(f"  Checking {len(candidates)} candidate pairs from {len(atoms)} distinct atoms...")
 
         similar_pairs = []
-        checked = set()
-
-        for atom_type, type_atoms in by_type.items():
-            print(f"  Checking {len(type_atoms)} atoms of type '{atom_type}'...")
-
-            # Pre-compute n-grams for each atom
-            ngrams = {a['id']: get_ngrams(a['content']) for a in type_atoms}
-
-            for i, atom1 in enumerate(type_atoms):
-                for atom2 in type_atoms[i+1:]:
-                    pair_key = tuple(sorted([atom1['id'], atom2['id']]))
-                    if pair_key in checked:
-                        continue
-                    checked.add(pair_key)
-
-                    # Quick n-gram similarity check first
-                    ngram_sim = jaccard_similarity(ngrams[atom1['id']], ngrams[atom2['id']])
-
-                    if ngram_sim >= threshold * 0.8:  # Loose filter
-                        # Full sequence similarity check
-                        seq_sim = sequence_similarity(atom1['content'], atom2['content'])
-
-                        # Combined score
-                        similarity = (ngram_sim * 0.4 + seq_sim * 0.6)
-
-                        if similarity >= threshold:
-                            similar_pairs.append({
-                                'atom1': atom1,
-                                'atom2': atom2,
-                                'similarity': round(similarity, 3),
-                                'ngram_sim': round(ngram_sim, 3),
-                                'seq_sim': round(seq_sim, 3),
-                                'method': 'content_similarity'
-                            })
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = ((atoms[i]['content'], atoms[j]['content'], loose) for i, j in candidates)
+            for (i, j), (ngram_sim, seq_sim) in zip(candidates, pool.map(score_pair, jobs, chunksize=32)):
+                if seq_sim is None:
+                    continue
+
+                # Combined score
+                similarity = (ngram_sim * 0.4 + seq_sim * 0.6)
+
+                if similarity >= threshold:
+                    similar_pairs.append({
+                        'atom1': atoms[i],
+                        'atom2': atoms[j],
+                        'similarity': round(similarity, 3),
+                        'ngram_sim': round(ngram_sim, 3),
+                        'seq_sim': round(seq_sim, 3),
+                        'method': 'content_similarity'
+                    })
 
         print(f"  Found {len(similar_pairs)} similar pairs")
         return similar_pairs
@@ -252,7 +261,7 @@ class AtomMergeTool:
         print(f"  Found {len(source_groups)} source groups with potential duplicates")
         return source_groups
 
-    def full_scan(self, sample_size=5000):
+    def full_scan(self, sample_size=None):
         """Run full duplicate scan."""
         results = {
             'timestamp': datetime.now().isoformat(),
@@ -282,7 +291,7 @@ class AtomMergeTool:
 
         return results
 
-    def generate_report(self, sample_size=5000):
+    def generate_report(self, sample_size=None):
         """Generate duplicate report."""
         results = self.full_scan(sample_size)
 
@@ -372,7 +381,7 @@ class AtomMergeTool:
         print(f"  {'Would remove' if dry_run else 'Removed'} {total_removed} duplicate atoms")
         return {'removed_count': total_removed, 'dry_run': dry_run}
 
-    def export_report(self, output_path=None, sample_size=5000):
+    def export_report(self, output_path=None, sample_size=None):
         """Export duplicate report to JSON."""
         results = self.full_scan(sample_size)
 
@@ -416,7 +425,7 @@ def main():
         print("ATOM MERGE TOOL")
         print("="*40)
         print("\nUsage:")
-        print("  python ATOM_MERGE_TOOL.py scan [sample_size]  # Scan for duplicates")
+        print("  python ATOM_MERGE_TOOL.py scan [sample_size]  # Scan for duplicates (whole table unless sampled)")
         print("  python ATOM_MERGE_TOOL.py report              # Generate report")
         print("  python ATOM_MERGE_TOOL.py export              # Export to JSON")
         print("  python ATOM_MERGE_TOOL.py auto-merge          # Auto-merge exact dupes (dry run)")
@@ -428,7 +437,7 @@ def main():
 
     try:
         if cmd == "scan":
-            sample = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+            sample = int(sys.argv[2]) if len(sys.argv) > 2 else None
             results = tool.full_scan(sample)
             print(f"\nScan complete. Summary:")
             for k, v in results['summary'].items():
@@ -15,7 +15,7 @@ SAFETY: Creates backup before modifications!
 Created by: C2 Architect (CP1)
 """
 
-import os; import sys; import json; import sqlite3; import hashlib; import shutil
+import os; import sys; import json; import sqlite3; import hashlib
 from pathlib import Path; from datetime import datetime; from collections import defaultdict
 
 HOME = Path(os.environ.get('USERPROFILE', os.path.expanduser('~')))
@@ -37,7 +37,13 @@ def count_tokens(content):
 
 def backup_database(db_path):
     backup = db_path.parent / f"{db_path.stem}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-    shutil.copy(db_path, backup)
+    # sqlite backup API - a plain file copy misses anything still in the -wal file
+    src, dest = sqlite3.connect(str(db_path)), sqlite3.connect(str(backup))
+    try:
+        src.backup(dest)
+    finally:
+        dest.close()
+        src.close()
     print(f"Backup created: {backup}")
     return backup
 
@@ -33,8 +33,12 @@ CORE_FILES = [
     # Memory & Intelligence
     (CONSCIOUSNESS / 'CYCLOTRON_MEMORY.py', 'core/CYCLOTRON_MEMORY.py'),
     (CONSCIOUSNESS / 'CYCLOTRON_MEMORY_CACHED.py', 'core/CYCLOTRON_MEMORY_CACHED.py'),
+    (CONSCIOUSNESS / 'SIMILARITY_INDEX.py', 'core/SIMILARITY_INDEX.py'),
     (CONSCIOUSNESS / 'KNOWLEDGE_BRIDGE.py', 'core/KNOWLEDGE_BRIDGE.py'),
+    (CONSCIOUSNESS / 'KEYWORD_ENGINE.py', 'core/KEYWORD_ENGINE.py'),
     (CONSCIOUSNESS / 'DATA_CHUNKER.py', 'core/DATA_CHUNKER.py'),
+    (CONSCIOUSNESS / 'ATOM_FINGERPRINTS.py', 'core/ATOM_FINGERPRINTS.py'),
+    (CONSCIOUSNESS / 'MINHASH_LSH.py', 'core/MINHASH_LSH.py'),
     (CONSCIOUSNESS / 'UNIFIED_BRAIN.py', 'core/UNIFIED_BRAIN.py'),
 
     # Coordination & Sync
@@ -16,14 +16,20 @@ Usage:
 """
 
 import os
+import sys
 import json
 import sqlite3
 from pathlib import Path
+from contextlib import contextmanager
 from datetime import datetime
 import argparse
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from CYCLOTRON_DB_POOL import ReadOnlyPool
+
 HOME = Path.home()
 CONSCIOUSNESS = HOME / ".consciousness"
 SYNC = Path("G:/My Drive/TRINITY_COMMS/sync")
@@ -33,6 +39,16 @@ COMPUTER = os.environ.get("COMPUTERNAME", "UNKNOWN")
 LOCAL_DB = CONSCIOUSNESS / "cyclotron_core" / "atoms.db"
 SEARCH_RESULTS_FILE = SYNC / "search_results"
 
+# Prepared query shapes - always issued with this exact SQL text
+COUNT_SQL = "SELECT COUNT(*) FROM atoms"
+SEARCH_SQL = """
+    SELECT id, type, content, source, tags, confidence, created
+    FROM atoms
+    WHERE content LIKE ? OR tags LIKE ? OR type LIKE ?
+    ORDER BY confidence DESC, created DESC
+    LIMIT ?
+"""
+
 
 class BrainSource:
     """A searchable brain source (local or remote)."""
@@ -43,17 +59,34 @@ class BrainSource:
         self.source_type = source_type
         self.atom_count = 0
         self.available = False
+        # Only the local brain keeps pooled connections. Synced copies are
+        # replaced wholesale by the Drive client, so long-lived handles would
+        # keep serving the old file (and on Windows block the replacement).
+        self.pool = ReadOnlyPool(self.db_path, max_connections=4) if self.db_path and source_type == "local" else None
         self._check_availability()
 
+    @contextmanager
+    def _connection(self):
+        """A pooled connection for the local brain, a fresh one otherwise"""
+        if self.pool:
+            with self.pool.connection() as conn:
+                yield conn
+            return
+
+        conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
     def _check_availability(self):
         """Check if this source is available."""
         if self.db_path and self.db_path.exists():
             try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM atoms")
-                self.atom_count = cursor.fetchone()[0]
-                conn.close()
+                with self._connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(COUNT_SQL)
+                    self.atom_count = cursor.fetchone()[0]
                 self.available = True
             except:
                 self.available = False
@@ -65,20 +98,15 @@ class BrainSource:
 
         results = []
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-
-            # Search in content, tags, and type
-            search_pattern = f"%{query}%"
-            cursor.execute("""
-                SELECT id, type, content, source, tags, confidence, created
-                FROM atoms
-                WHERE content LIKE ? OR tags LIKE ? OR type LIKE ?
-                ORDER BY confidence DESC, created DESC
-                LIMIT ?
-            """, (search_pattern, search_pattern, search_pattern, limit))
-
-            for row in cursor.fetchall():
+            with self._connection() as conn:
+                cursor = conn.cursor()
+
+                # Search in content, tags, and type
+                search_pattern = f"%{query}%"
+                cursor.execute(SEARCH_SQL, (search_pattern, search_pattern, search_pattern, limit))
+                rows = cursor.fetchall()
+
+            for row in rows:
                 atom_id, atom_type, content, source, tags, confidence, created = row
 
                 # Extract preview
@@ -95,7 +123,6 @@ class BrainSource:
                     "brain_source": self.name
                 })
 
-            conn.close()
         except Exception as e:
             print(f"Search error in {self.name}: {e}")
 
@@ -360,7 +387,8 @@ def main():
 
     elif args.command == "api":
         SearchAPIHandler.searcher = searcher
-        server = HTTPServer(("0.0.0.0", args.port), SearchAPIHandler)
+        # Requests are served concurrently; the local brain is read through a pool
+        server = ThreadingHTTPServer(("0.0.0.0", args.port), SearchAPIHandler)
 
         print(f"\n{'='*60}")
         print("CROSS-COMPUTER SEARCH API")
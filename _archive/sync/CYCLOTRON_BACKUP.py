@@ -39,6 +39,18 @@ def get_atom_count():
     except:
         return -1
 
+def copy_database(src, dest):
+    """Copy a live SQLite database, including anything still in its -wal file."""
+    source = sqlite3.connect(str(src))
+    try:
+        target = sqlite3.connect(str(dest))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
 def backup_atoms():
     """Create timestamped backup of atoms.db."""
     ensure_dirs()
@@ -55,8 +67,8 @@ def backup_atoms():
     atom_count = get_atom_count()
     db_size = ATOMS_DB.stat().st_size
 
-    # Copy database
-    shutil.copy2(ATOMS_DB, backup_path)
+    # Copy database (sqlite backup API - a plain file copy misses atoms.db-wal)
+    copy_database(ATOMS_DB, backup_path)
 
     # Create manifest
     manifest = {
@@ -7,15 +7,25 @@ VACUUM: Sucks in all content from everywhere
 COMPRESSED: Makes it instantly searchable
 
 Uses SQLite FTS5 for lightning-fast full-text search with ranking.
+
+Usage:
+    python CYCLOTRON_CONTENT_INDEXER.py                 # Full rebuild
+    python CYCLOTRON_CONTENT_INDEXER.py --incremental   # Only new/changed/deleted files
 """
 
 import os
+import sys
 import sqlite3
 import json
 import hashlib
 from pathlib import Path
+from contextlib import nullcontext
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from CYCLOTRON_INGEST_PIPELINE import IngestPipeline, file_job
+
 # Directories to vacuum
 VACUUM_DIRS = [
     "C:/Users/dwrek/100X_DEPLOYMENT",
@@ -28,9 +38,15 @@ VACUUM_DIRS = [
 # File types to index
 INDEX_EXTENSIONS = ['.md', '.txt', '.py', '.js', '.html', '.json']
 
+# Directories never descended into
+SKIP_DIRS = ['node_modules', '__pycache__', '.git', 'venv', 'env']
+
 # Database location
 DB_PATH = Path("C:/Users/dwrek/100X_DEPLOYMENT/.cyclotron_atoms/cyclotron.db")
 
+# Rows written per executemany/transaction batch
+BATCH_SIZE = 500
+
 def init_database():
     """Initialize SQLite database with FTS5 virtual table"""
     DB_PATH.parent.mkdir(exist_ok=True)
@@ -60,6 +76,20 @@ def init_database():
         )
     ''')
 
+    # What is currently indexed per file, so a vacuum can skip unchanged files
+    # without reading them. doc_rowid points at the file's row in knowledge
+    # (NULL for empty files, which are tracked but not indexed).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_manifest (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER,
+            size INTEGER,
+            hash TEXT,
+            chars INTEGER,
+            doc_rowid INTEGER
+        )
+    ''')
+
     conn.commit()
     return conn
 
@@ -76,28 +106,29 @@ def get_file_hash(content):
     """Generate hash of content for change detection"""
     return hashlib.md5(content.encode()).hexdigest()
 
-def vacuum_knowledge(conn):
-    """Vacuum up all knowledge from directories"""
-    cursor = conn.cursor()
-
-    # Clear existing index for fresh rebuild
-    cursor.execute('DELETE FROM knowledge')
-
-    indexed_count = 0
-    total_chars = 0
+def walk_vacuum_dirs(walked=None, unreadable=None):
+    """
+    Yield (filepath, name, ext, stat) for every indexable file under VACUUM_DIRS.
+    Each directory actually walked is added to the walked set, and every
+    directory or file that could not be read to the unreadable set.
+    """
+    def walk_error(e):
+        print(f"  ❌ Cannot read {e.filename}: {e}")
+        if unreadable is not None:
+            unreadable.add(e.filename)
 
     for vacuum_dir in VACUUM_DIRS:
-        if not os.path.exists(vacuum_dir):
+        if not os.path.isdir(vacuum_dir):
             print(f"⚠️  Directory not found: {vacuum_dir}")
             continue
 
         print(f"🔍 Vacuuming: {vacuum_dir}")
+        if walked is not None:
+            walked.add(vacuum_dir)
 
-        for root, dirs, files in os.walk(vacuum_dir):
+        for root, dirs, files in os.walk(vacuum_dir, onerror=walk_error):
             # Skip hidden and build directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in [
-                'node_modules', '__pycache__', '.git', 'venv', 'env'
-            ]]
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS]
 
             for file in files:
                 ext = Path(file).suffix.lower()
@@ -105,55 +136,231 @@ def vacuum_knowledge(conn):
                     continue
 
                 filepath = os.path.join(root, file)
-
                 try:
-                    # Extract content
-                    content = extract_content(filepath)
-                    if not content:
-                        continue
-
-                    # Get metadata
                     stat = os.stat(filepath)
-                    file_hash = get_file_hash(content)
-                    preview = content[:500].replace('\n', ' ')
-
-                    # Insert into FTS5 table
-                    cursor.execute('''
-                        INSERT INTO knowledge (path, name, type, content, preview, modified, hash)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        filepath,
-                        file,
-                        ext[1:],  # Remove the dot
-                        content,
-                        preview,
-                        int(stat.st_mtime),
-                        file_hash
-                    ))
-
-                    indexed_count += 1
-                    total_chars += len(content)
-
-                except Exception as e:
+                except OSError as e:
                     print(f"  ❌ Error indexing {filepath}: {e}")
+                    if unreadable is not None:
+                        unreadable.add(filepath)
+                    continue
+                yield filepath, file, ext, stat
+
+def _under(path, directories):
+    """Whether path is one of the directories or lies inside one of them"""
+    return any(path == d or path.startswith(os.path.join(d, '')) for d in directories)
+
+class BatchWriter:
+    """
+    Buffers knowledge/manifest writes and flushes them with executemany.
+    With commit=False flushes join the caller's open transaction instead of
+    committing each batch.
+    """
+
+    def __init__(self, conn, batch_size=BATCH_SIZE, commit=True):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.commit = commit
+        self.deletes = []
+        self.inserts = []
+        self.manifest = []
+        self.removed = []
+
+    def add(self, result, old_rowid=None):
+        """
+        Queue a (re)index of one extracted file. Its knowledge rowid is
+        assigned when the batch is flushed, inside the write transaction
+        (see reserve_rowids), so concurrent writers never hand out the same one.
+        """
+        if old_rowid is not None:
+            self.deletes.append((old_rowid,))
+        entry = (result['path'], result['mtime_ns'], result['size'], result['hash'], result['chars'])
+        if result['content']:
+            ext = Path(result['name']).suffix.lower()
+            self.inserts.append(((
+                result['path'],
+                result['name'],
+                ext[1:],  # Remove the dot
+                result['content'],
+                result['preview'],
+                int(result['mtime']),
+                result['hash']
+            ), entry))
+        else:
+            self.manifest.append(entry + (None,))
+        self._maybe_flush()
+
+    def touch(self, result, rowid):
+        """Record a new mtime/size for a file whose content did not change"""
+        self.manifest.append((result['path'], result['mtime_ns'], result['size'], result['hash'], result['chars'], rowid))
+        self._maybe_flush()
+
+    def remove(self, filepath, old_rowid):
+        """Queue removal of a file that no longer exists"""
+        if old_rowid is not None:
+            self.deletes.append((old_rowid,))
+        self.removed.append((filepath,))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.inserts) + len(self.deletes) + len(self.manifest) + len(self.removed) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write everything queued in one transaction"""
+        with self.conn if self.commit else nullcontext():
+            if self.deletes:
+                self.conn.executemany('DELETE FROM knowledge WHERE rowid = ?', self.deletes)
+            if self.inserts:
+                first = reserve_rowids(self.conn)
+                self.conn.executemany('''
+                    INSERT INTO knowledge (rowid, path, name, type, content, preview, modified, hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(first + i,) + row for i, (row, _) in enumerate(self.inserts)])
+                self.manifest.extend(entry + (first + i,) for i, (_, entry) in enumerate(self.inserts))
+            if self.manifest:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO file_manifest (path, mtime_ns, size, hash, chars, doc_rowid)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', self.manifest)
+            if self.removed:
+                self.conn.executemany('DELETE FROM file_manifest WHERE path = ?', self.removed)
+            if self.deletes or self.inserts:
+                bump_generation(self.conn)
+        self.deletes, self.inserts, self.manifest, self.removed = [], [], [], []
+
+def reserve_rowids(conn):
+    """
+    First free knowledge rowid, read under the database write lock. Call
+    inside the transaction that inserts the rows: it takes the write lock
+    first, so no other process (the daemon, a vacuum) can insert between
+    this read and the inserts.
+    """
+    if conn.in_transaction:
+        # An open transaction may not have written yet; a no-op write takes the lock
+        conn.execute('DELETE FROM index_meta WHERE 0')
+    else:
+        conn.execute('BEGIN IMMEDIATE')
+    row = conn.execute('SELECT rowid FROM knowledge ORDER BY rowid DESC LIMIT 1').fetchone()
+    return (row[0] if row else 0) + 1
+
+def bump_generation(conn):
+    """
+    Advance the index generation in index_meta. Call inside the transaction
+    that changes knowledge; readers caching query results compare it to
+    know when their results are stale.
+    """
+    conn.execute('''
+        INSERT INTO index_meta (key, value) VALUES ('generation', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    ''')
 
-    # Update metadata
-    cursor.execute('''
-        INSERT OR REPLACE INTO index_meta (key, value)
-        VALUES ('last_indexed', ?)
-    ''', (datetime.now().isoformat(),))
-
-    cursor.execute('''
-        INSERT OR REPLACE INTO index_meta (key, value)
-        VALUES ('total_files', ?)
-    ''', (str(indexed_count),))
+def update_index_meta(conn):
+    """Refresh index_meta totals from the manifest"""
+    total_files, total_chars = conn.execute(
+        'SELECT COUNT(doc_rowid), COALESCE(SUM(chars), 0) FROM file_manifest'
+    ).fetchone()
+
+    with conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO index_meta (key, value)
+            VALUES (?, ?)
+        ''', [
+            ('last_indexed', datetime.now().isoformat()),
+            ('total_files', str(total_files)),
+            ('total_chars', str(total_chars)),
+        ])
+
+def vacuum_knowledge(conn, incremental=False, workers=None):
+    """
+    Vacuum up all knowledge from directories.
+
+    A full vacuum clears the index and re-reads every file. An incremental
+    vacuum compares each file's mtime and size against file_manifest and only
+    reads files that are new or changed; files whose content hash still
+    matches are not re-indexed, and files that disappeared are removed -
+    unless their vacuum directory is missing or could not be read this run.
+
+    Files are read, decoded and hashed on a worker pool (CYCLOTRON_INGEST_PIPELINE)
+    while this thread stays the only writer. An incremental vacuum commits in
+    batches; a full rebuild is one transaction, so searches keep seeing the
+    old index until the new one is complete and a failed rebuild rolls back.
+
+    Returns (files indexed this run, characters indexed this run).
+    """
+    cursor = conn.cursor()
 
-    cursor.execute('''
-        INSERT OR REPLACE INTO index_meta (key, value)
-        VALUES ('total_chars', ?)
-    ''', (str(total_chars),))
+    if incremental:
+        manifest = {
+            row[0]: row[1:] for row in
+            cursor.execute('SELECT path, mtime_ns, size, hash, chars, doc_rowid FROM file_manifest')
+        }
+        # An index built before the manifest existed cannot be updated in place.
+        if not manifest and cursor.execute('SELECT 1 FROM knowledge LIMIT 1').fetchone():
+            print("ℹ️  No file manifest yet - running a full vacuum")
+            incremental = False
+
+    if not incremental:
+        # Clear existing index for fresh rebuild (committed by update_index_meta)
+        cursor.execute('DELETE FROM knowledge')
+        cursor.execute('DELETE FROM file_manifest')
+        bump_generation(conn)
+        manifest = {}
+
+    seen = set()
+    walked = set()      # VACUUM_DIRS that exist and were walked this run
+    unreadable = set()  # directories/files the walk could not read
+    skipped = 0  # unchanged by mtime/size, never read
+    touched = 0  # read, but content unchanged
+
+    def jobs():
+        nonlocal skipped
+        for filepath, file, ext, stat in walk_vacuum_dirs(walked, unreadable):
+            seen.add(filepath)
+            known = manifest.get(filepath)
+            if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                skipped += 1
+                continue
+            yield file_job(filepath, stat, known[2] if known else None)
+
+    writer = BatchWriter(conn, commit=incremental)
+    indexed_count = 0
+    total_chars = 0
+    deleted = 0
 
-    conn.commit()
+    try:
+        for result in IngestPipeline(workers).run(jobs()):
+            if 'error' in result:
+                print(f"  ❌ Error indexing {result['path']}: {result['error']}")
+                continue
+
+            known = manifest.get(result['path'])
+            if result.get('unchanged'):
+                # Touched but not modified
+                writer.touch(result, known[4])
+                touched += 1
+                continue
+
+            writer.add(result, known[4] if known else None)
+            if result['content']:
+                indexed_count += 1
+                total_chars += result['chars']
+
+        # Only purge files that were really looked for: a missing or unmounted
+        # vacuum directory (offline Drive, unplugged disk) keeps its index
+        for filepath, known in manifest.items():
+            if filepath in seen or not _under(filepath, walked) or _under(filepath, unreadable):
+                continue
+            writer.remove(filepath, known[4])
+            deleted += 1
+
+        writer.flush()
+        update_index_meta(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if incremental:
+        print(f"   {indexed_count} added/changed, {deleted} removed, {skipped + touched} unchanged")
 
     return indexed_count, total_chars
 
@@ -242,7 +449,7 @@ if __name__ == "__main__":
     print("🔄 Starting vacuum cycle...")
     print()
 
-    indexed, chars = vacuum_knowledge(conn)
+    indexed, chars = vacuum_knowledge(conn, incremental='--incremental' in sys.argv)
 
     print()
     print("=" * 60)
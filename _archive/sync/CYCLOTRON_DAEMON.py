@@ -21,11 +21,17 @@ import sqlite3
 import hashlib
 import json
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from CYCLOTRON_INGEST_PIPELINE import IngestPipeline, extract_file, file_job
+from CYCLOTRON_CONTENT_INDEXER import bump_generation, reserve_rowids
+
 # Configuration
 VACUUM_DIRS = [
     "C:/Users/dwrek/100X_DEPLOYMENT",
@@ -37,6 +43,8 @@ VACUUM_DIRS = [
 
 INDEX_EXTENSIONS = ['.md', '.txt', '.py', '.js', '.html', '.json', '.bat', '.ps1', '.css']
 DB_PATH = Path("C:/Users/dwrek/100X_DEPLOYMENT/.cyclotron_atoms/cyclotron.db")
+BATCH_SIZE = 200  # Files committed per transaction
+DEBOUNCE_SECONDS = 1.0  # Quiet period before a changed file is indexed
 STATUS_FILE = Path("C:/Users/dwrek/100X_DEPLOYMENT/.cyclotron_atoms/daemon_status.json")
 LOG_FILE = Path("C:/Users/dwrek/100X_DEPLOYMENT/.cyclotron_atoms/daemon.log")
 
@@ -56,6 +64,8 @@ class CyclotronIndexer:
 
     def __init__(self):
         self.conn = None
+        # The watcher's worker writes while the main thread reads stats
+        self.db_lock = threading.RLock()
         self.stats = {
             'files_indexed': 0,
             'files_updated': 0,
@@ -79,6 +89,35 @@ class CyclotronIndexer:
                 tokenize='porter unicode61'
             )
         ''')
+
+        # Shared with CYCLOTRON_CONTENT_INDEXER's incremental vacuum
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS file_manifest (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                size INTEGER,
+                hash TEXT,
+                chars INTEGER,
+                doc_rowid INTEGER
+            )
+        ''')
+
+        # Holds the index generation that search result caches key on
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS index_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        # Adopt rows indexed before the manifest existed. Their hash is left
+        # NULL so the next vacuum re-reads them once and replaces them by rowid.
+        cursor.execute('SELECT 1 FROM file_manifest LIMIT 1')
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                INSERT OR REPLACE INTO file_manifest (path, chars, doc_rowid)
+                SELECT path, LENGTH(content), rowid FROM knowledge
+            ''')
         self.conn.commit()
 
     def should_index(self, path):
@@ -111,73 +150,152 @@ class CyclotronIndexer:
         except:
             return None
 
-    def index_file(self, path):
-        """Index a single file"""
-        if not self.should_index(path):
-            return False
-
-        try:
-            p = Path(path)
-
-            # Read content
-            try:
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-            except:
-                return False
-
-            # Get metadata
-            file_hash = self.get_file_hash(path)
-            modified = datetime.fromtimestamp(p.stat().st_mtime).isoformat()
-            preview = content[:500].replace('\n', ' ').strip()
-
-            # Check if already indexed with same hash
+    def _load_manifest(self, paths=None):
+        """path -> (mtime_ns, size, hash, doc_rowid), for the given paths or all of them"""
+        with self.db_lock:
             cursor = self.conn.cursor()
-            cursor.execute('SELECT hash FROM knowledge WHERE path = ?', (str(path),))
-            existing = cursor.fetchone()
-
-            if existing and existing[0] == file_hash:
-                return False  # No change
-
-            # Delete old entry if exists
-            if existing:
-                cursor.execute('DELETE FROM knowledge WHERE path = ?', (str(path),))
+            query = 'SELECT path, mtime_ns, size, hash, doc_rowid FROM file_manifest'
+            if paths is None:
+                cursor.execute(query)
+                return {row[0]: row[1:] for row in cursor.fetchall()}
+            manifest = {}
+            for path in paths:
+                cursor.execute(query + ' WHERE path = ?', (path,))
+                row = cursor.fetchone()
+                if row:
+                    manifest[row[0]] = row[1:]
+            return manifest
+
+    def _jobs(self, paths, manifest):
+        """Extraction jobs for the paths that need (re)indexing"""
+        for path in paths:
+            if not self.should_index(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            known = manifest.get(str(path))
+            if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                continue  # No change
+            yield file_job(path, stat, known[2] if known else None)
+
+    def _write_batch(self, results, manifest):
+        """
+        Commit a batch of extracted files in one transaction. The knowledge
+        rowids are read under the write lock (reserve_rowids), so a vacuum
+        running in another process cannot collide with them.
+        """
+        deletes, inserts = [], []
+
+        for result in results:
+            known = manifest.get(result['path'])
+            if known and known[3] is not None:
+                deletes.append((known[3],))
                 self.stats['files_updated'] += 1
             else:
                 self.stats['files_indexed'] += 1
+            inserts.append((result, (
+                result['path'], result['name'], Path(result['path']).suffix,
+                result['content'], result['preview'].strip(),
+                datetime.fromtimestamp(result['mtime']).isoformat(), result['hash']
+            )))
 
-            # Insert new entry
-            cursor.execute('''
-                INSERT INTO knowledge (path, name, type, content, preview, modified, hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (str(path), p.name, p.suffix, content, preview, modified, file_hash))
+        with self.db_lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.executemany('DELETE FROM knowledge WHERE rowid = ?', deletes)
+            first = reserve_rowids(self.conn)
+            cursor.executemany('''
+                INSERT INTO knowledge (rowid, path, name, type, content, preview, modified, hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(first + i,) + row for i, (_, row) in enumerate(inserts)])
+            entries = [
+                (result['path'], result['mtime_ns'], result['size'], result['hash'], result['chars'], first + i)
+                for i, (result, _) in enumerate(inserts)
+            ]
+            # Keep the vacuum manifest in step so an incremental vacuum skips these files
+            cursor.executemany('''
+                INSERT OR REPLACE INTO file_manifest (path, mtime_ns, size, hash, chars, doc_rowid)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', entries)
+            bump_generation(self.conn)
+        for path, mtime_ns, size, file_hash, _, rowid in entries:
+            manifest[path] = (mtime_ns, size, file_hash, rowid)
+
+    def index_files(self, paths, manifest=None):
+        """
+        Index many files: read/decode/hash run on a worker pool while this
+        thread writes the results in batches. Returns the number (re)indexed.
+        """
+        if manifest is None:
+            manifest = self._load_manifest([str(path) for path in paths])
+        jobs = self._jobs(paths, manifest)
+
+        if isinstance(paths, (list, tuple, set)) and len(paths) == 1:
+            # Not worth a pool for one file
+            results = map(extract_file, jobs)
+        else:
+            results = IngestPipeline().run(jobs)
+
+        written = 0
+        batch = []
+        for result in results:
+            if 'error' in result:
+                logger.error(f"Error indexing {result['path']}: {result['error']}")
+                self.stats['errors'] += 1
+                continue
+            if result.get('unchanged'):
+                continue
+            batch.append(result)
+            if len(batch) >= BATCH_SIZE:
+                self._write_batch(batch, manifest)
+                written += len(batch)
+                batch = []
 
-            self.conn.commit()
-            return True
+        if batch:
+            self._write_batch(batch, manifest)
+            written += len(batch)
+        return written
 
+    def index_file(self, path):
+        """Index a single file"""
+        try:
+            return self.index_files([path]) > 0
         except Exception as e:
             logger.error(f"Error indexing {path}: {e}")
             self.stats['errors'] += 1
             return False
 
-    def delete_file(self, path):
-        """Remove file from index"""
+    def delete_files(self, paths):
+        """Remove files from the index in one transaction. Returns the number removed."""
+        manifest = self._load_manifest([str(path) for path in paths])
+        deleted = 0
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM knowledge WHERE path = ?', (str(path),))
-            if cursor.rowcount > 0:
-                self.stats['files_deleted'] += 1
-                self.conn.commit()
-                return True
+            with self.db_lock, self.conn:
+                cursor = self.conn.cursor()
+                for path in paths:
+                    known = manifest.get(str(path))
+                    if known and known[3] is not None:
+                        cursor.execute('DELETE FROM knowledge WHERE rowid = ?', (known[3],))
+                    else:
+                        # Not in the manifest - fall back to a scan by path
+                        cursor.execute('DELETE FROM knowledge WHERE path = ?', (str(path),))
+                    deleted += cursor.rowcount > 0
+                    cursor.execute('DELETE FROM file_manifest WHERE path = ?', (str(path),))
+                if deleted:
+                    bump_generation(self.conn)
         except Exception as e:
-            logger.error(f"Error deleting {path}: {e}")
-        return False
+            logger.error(f"Error deleting {len(paths)} files: {e}")
+            return 0
+        self.stats['files_deleted'] += deleted
+        return deleted
 
-    def vacuum(self):
-        """Full re-index of all directories"""
-        logger.info("Starting full vacuum...")
-        start_time = time.time()
+    def delete_file(self, path):
+        """Remove file from index"""
+        return self.delete_files([path]) > 0
 
+    def _walk(self):
+        """Every file under VACUUM_DIRS"""
         for directory in VACUUM_DIRS:
             if not os.path.exists(directory):
                 continue
@@ -187,8 +305,14 @@ class CyclotronIndexer:
                 dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
 
                 for file in files:
-                    path = os.path.join(root, file)
-                    self.index_file(path)
+                    yield os.path.join(root, file)
+
+    def vacuum(self):
+        """Full re-index of all directories"""
+        logger.info("Starting full vacuum...")
+        start_time = time.time()
+
+        self.index_files(self._walk(), manifest=self._load_manifest())
 
         elapsed = time.time() - start_time
         self.stats['last_vacuum'] = datetime.now().isoformat()
@@ -198,12 +322,13 @@ class CyclotronIndexer:
 
     def get_stats(self):
         """Get current statistics"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM knowledge')
-        total = cursor.fetchone()[0]
+        with self.db_lock:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM knowledge')
+            total = cursor.fetchone()[0]
 
-        cursor.execute('SELECT SUM(LENGTH(content)) FROM knowledge')
-        total_chars = cursor.fetchone()[0] or 0
+            cursor.execute('SELECT SUM(LENGTH(content)) FROM knowledge')
+            total_chars = cursor.fetchone()[0] or 0
 
         return {
             **self.stats,
@@ -213,54 +338,151 @@ class CyclotronIndexer:
         }
 
 
-class CyclotronHandler(FileSystemEventHandler):
-    """Watchdog event handler for file changes"""
+class DebouncedIndexQueue:
+    """
+    Coalesces file events per path and indexes them in batches on a worker.
+
+    Editors and sync clients fire bursts of events for a single save. Each
+    event only records the latest action for its path; a path is processed
+    once it has been quiet for debounce_seconds, so a burst costs one read
+    and one hash. Ready paths are indexed (or deleted) together, up to
+    max_batch per transaction.
+    """
 
-    def __init__(self, indexer):
+    def __init__(self, indexer, debounce_seconds=DEBOUNCE_SECONDS, max_batch=BATCH_SIZE):
         self.indexer = indexer
-        self.last_event = {}
-        self.debounce_seconds = 1
+        self.debounce_seconds = debounce_seconds
+        self.max_batch = max_batch
+        self.pending = {}  # path -> [action, first_event_time, last_event_time]
+        self.cond = threading.Condition()
+        self.running = False
+        self.worker = None
+        self.metrics = {
+            'events_received': 0,
+            'events_coalesced': 0,
+            'batches_processed': 0,
+            'files_processed': 0,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+        }
 
-    def _should_process(self, path):
-        """Debounce rapid events on same file"""
+    def submit(self, path, action='index'):
+        """Record an event; a later event for the same path supersedes it"""
         now = time.time()
-        last = self.last_event.get(path, 0)
-        if now - last < self.debounce_seconds:
-            return False
-        self.last_event[path] = now
-        return True
+        with self.cond:
+            self.metrics['events_received'] += 1
+            entry = self.pending.get(path)
+            if entry:
+                self.metrics['events_coalesced'] += 1
+                entry[0] = action
+                entry[2] = now
+            else:
+                self.pending[path] = [action, now, now]
+            self.cond.notify()
+
+    def _take_ready(self):
+        """Remove and return the paths that have been quiet long enough, or wait"""
+        with self.cond:
+            while self.running or self.pending:
+                now = time.time()
+                ready = [path for path, entry in self.pending.items()
+                         if not self.running or now - entry[2] >= self.debounce_seconds]
+                if ready:
+                    ready = ready[:self.max_batch]
+                    return [(path, *self.pending.pop(path)) for path in ready]
+                if self.pending:
+                    next_due = min(entry[2] for entry in self.pending.values()) + self.debounce_seconds
+                    self.cond.wait(max(next_due - now, 0.01))
+                else:
+                    self.cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            batch = self._take_ready()
+            if batch is None:
+                return
+
+            deletes = [path for path, action, first, last in batch if action == 'delete']
+            updates = [path for path, action, first, last in batch if action == 'index']
+            try:
+                if deletes:
+                    self.indexer.delete_files(deletes)
+                if updates:
+                    indexed = self.indexer.index_files(updates)
+                    if indexed:
+                        logger.info(f"Indexed {indexed} changed file(s)")
+            except Exception as e:
+                logger.error(f"Error processing {len(batch)} queued file(s): {e}")
+                self.indexer.stats['errors'] += 1
+
+            lag = time.time() - min(first for path, action, first, last in batch)
+            with self.cond:
+                self.metrics['batches_processed'] += 1
+                self.metrics['files_processed'] += len(batch)
+                self.metrics['last_lag_seconds'] = round(lag, 3)
+                self.metrics['max_lag_seconds'] = round(max(self.metrics['max_lag_seconds'], lag), 3)
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        """Process everything still queued, then stop the worker"""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.worker:
+            self.worker.join()
+
+    def get_metrics(self):
+        """Queue depth and lag figures"""
+        with self.cond:
+            now = time.time()
+            oldest = min((entry[1] for entry in self.pending.values()), default=None)
+            return {
+                **self.metrics,
+                'queue_depth': len(self.pending),
+                'oldest_pending_seconds': round(now - oldest, 3) if oldest else 0.0,
+            }
+
+
+class CyclotronHandler(FileSystemEventHandler):
+    """Watchdog event handler for file changes"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def _wanted(self, path):
+        return Path(path).suffix.lower() in INDEX_EXTENSIONS
 
     def on_created(self, event):
-        if event.is_directory:
-            return
-        if self._should_process(event.src_path):
-            if self.indexer.index_file(event.src_path):
-                logger.info(f"Indexed new file: {event.src_path}")
+        if not event.is_directory and self._wanted(event.src_path):
+            self.queue.submit(event.src_path, 'index')
 
     def on_modified(self, event):
-        if event.is_directory:
-            return
-        if self._should_process(event.src_path):
-            if self.indexer.index_file(event.src_path):
-                logger.info(f"Re-indexed modified file: {event.src_path}")
+        if not event.is_directory and self._wanted(event.src_path):
+            self.queue.submit(event.src_path, 'index')
 
     def on_deleted(self, event):
-        if event.is_directory:
-            return
-        if self.indexer.delete_file(event.src_path):
-            logger.info(f"Removed deleted file: {event.src_path}")
+        if not event.is_directory and self._wanted(event.src_path):
+            self.queue.submit(event.src_path, 'delete')
 
     def on_moved(self, event):
         if event.is_directory:
             return
-        self.indexer.delete_file(event.src_path)
-        if self.indexer.index_file(event.dest_path):
-            logger.info(f"Moved file: {event.src_path} -> {event.dest_path}")
+        if self._wanted(event.src_path):
+            self.queue.submit(event.src_path, 'delete')
+        if self._wanted(event.dest_path):
+            self.queue.submit(event.dest_path, 'index')
 
 
-def save_status(indexer, running=True):
+def save_status(indexer, running=True, queue=None):
     """Save daemon status to file"""
     status = indexer.get_stats()
+    if queue is not None:
+        status['queue'] = queue.get_metrics()
     status['running'] = running
     status['pid'] = os.getpid()
     status['updated'] = datetime.now().isoformat()
@@ -288,6 +510,11 @@ def show_status():
     print(f"Files Deleted: {status.get('files_deleted', 0)}")
     print(f"Errors: {status.get('errors', 0)}")
     print(f"Last Vacuum: {status.get('last_vacuum', 'Never')}")
+    queue = status.get('queue')
+    if queue:
+        print(f"Queue Depth: {queue['queue_depth']} (oldest {queue['oldest_pending_seconds']}s)")
+        print(f"Events: {queue['events_received']} received, {queue['events_coalesced']} coalesced")
+        print(f"Index Lag: {queue['last_lag_seconds']}s last, {queue['max_lag_seconds']}s max")
     print(f"Last Update: {status.get('updated', 'N/A')}")
     print(f"Database: {status.get('db_path', 'N/A')}")
     print("=" * 32)
@@ -304,8 +531,10 @@ def run_daemon():
     logger.info("Performing initial vacuum...")
     indexer.vacuum()
 
-    # Setup watchdog
-    handler = CyclotronHandler(indexer)
+    # Setup watchdog - events are debounced and indexed on a worker thread
+    queue = DebouncedIndexQueue(indexer)
+    queue.start()
+    handler = CyclotronHandler(queue)
     observer = Observer()
 
     # Watch all directories
@@ -320,15 +549,16 @@ def run_daemon():
 
     try:
         while True:
-            save_status(indexer, running=True)
+            save_status(indexer, running=True, queue=queue)
             time.sleep(30)  # Update status every 30 seconds
 
     except KeyboardInterrupt:
         logger.info("Stopping daemon...")
         observer.stop()
-        save_status(indexer, running=False)
 
     observer.join()
+    queue.stop()
+    save_status(indexer, running=False, queue=queue)
     logger.info("Daemon stopped")
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+CYCLOTRON DB POOL - Shared read-only SQLite connections for the search APIs
+==========================================================================
+
+Opening a connection per request re-reads the schema, starts with a cold
+page cache and throws away every prepared statement. The pool keeps a small
+stack of read-only connections that requests borrow and hand back, each
+tuned once:
+
+- mmap_size so hot FTS pages are read straight from the OS page cache
+- a larger per-connection page cache
+- a large statement cache: queries issued with the same SQL text on a
+  reused connection run as already-prepared statements
+
+The pool never changes the database itself (journal mode included); that
+is left to whatever owns the writes.
+
+Used by CYCLOTRON_SEARCH_V2 and CROSS_COMPUTER_SEARCH.
+"""
+
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+MMAP_SIZE = 256 * 1024 * 1024      # bytes
+CACHE_SIZE_KB = 64 * 1024          # per connection
+STATEMENT_CACHE = 256              # prepared statements kept per connection
+
+class ReadOnlyPool:
+    """A bounded pool of read-only connections to one SQLite database"""
+
+    def __init__(self, db_path, max_connections=8):
+        self.db_path = Path(db_path)
+        self.max_connections = max_connections
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def _open(self):
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE, timeout=5)
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute('PRAGMA query_only=ON')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection (None if the database doesn't exist)"""
+        if not self.db_path.exists():
+            yield None
+            return
+
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.opened < self.max_connections
+                if can_open:
+                    self.opened += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+            else:
+                # Pool exhausted - wait for a connection to come back
+                conn = self.idle.get()
+
+        broken = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            # A bad FTS query is an OperationalError; anything else may mean a bad handle
+            broken = not isinstance(e, sqlite3.OperationalError)
+            raise
+        finally:
+            if broken:
+                # Don't hand a possibly corrupt handle to the next request
+                conn.close()
+                with self.lock:
+                    self.opened -= 1
+            else:
+                self.idle.put(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self.opened -= 1
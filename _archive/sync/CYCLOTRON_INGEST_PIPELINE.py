@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+CYCLOTRON INGEST PIPELINE - Parallel read/decode/hash feeding one SQLite writer
+===============================================================================
+
+Stage 1 (feeder thread): walks or lists files and submits extraction jobs.
+Stage 2 (worker pool):   reads, decodes, hashes and previews each file.
+Stage 3 (caller):        the single writer - iterates run() and commits to
+                         cyclotron.db in batches on its own connection.
+
+At most max_in_flight files are being extracted or waiting for the writer at
+any time, so a slow writer pauses the walk instead of buffering the corpus
+in memory.
+
+Used by CYCLOTRON_CONTENT_INDEXER.vacuum_knowledge and CYCLOTRON_DAEMON.
+"""
+
+import os
+import queue
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+_DONE = object()
+
+def file_job(path, stat, known_hash=None):
+    """Describe one file to extract. known_hash skips files whose content is unchanged."""
+    return {
+        'path': str(path),
+        'name': Path(path).name,
+        'mtime': stat.st_mtime,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'known_hash': known_hash,
+    }
+
+def extract_file(job):
+    """Read, decode, hash and preview one file (runs in a pool worker)"""
+    result = dict(job)
+    try:
+        with open(job['path'], 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except OSError as e:
+        result['error'] = str(e)
+        return result
+
+    result['hash'] = hashlib.md5(content.encode()).hexdigest()
+    result['chars'] = len(content)
+    if result['hash'] == job['known_hash']:
+        # Touched but not modified - don't ship the content back
+        result['unchanged'] = True
+        return result
+
+    result['content'] = content
+    result['preview'] = content[:500].replace('\n', ' ')
+    return result
+
+class IngestPipeline:
+    """Bounded producer/consumer pipeline around a thread or process pool"""
+
+    def __init__(self, workers=None, use_processes=False, max_in_flight=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.max_in_flight = max_in_flight or self.workers * 4
+        self.stats = {'submitted': 0, 'completed': 0, 'errors': 0}
+
+    def run(self, jobs):
+        """
+        Extract every job and yield the results on the calling thread, in
+        completion order. The caller is the pipeline's only writer.
+        """
+        executor = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        results = queue.Queue()
+        slots = threading.Semaphore(self.max_in_flight)
+        stop = threading.Event()
+
+        with executor(max_workers=self.workers) as pool:
+            def feed():
+                submitted = 0
+                try:
+                    for job in jobs:
+                        if stop.is_set():
+                            return
+                        # Backpressure: wait for the writer to drain a slot
+                        while not slots.acquire(timeout=0.1):
+                            if stop.is_set():
+                                return
+                        pool.submit(extract_file, job).add_done_callback(results.put)
+                        submitted += 1
+                except Exception as e:
+                    results.put(e)
+                finally:
+                    results.put((_DONE, submitted))
+
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+            try:
+                expected, received = None, 0
+                while expected is None or received < expected:
+                    item = results.get()
+                    if isinstance(item, tuple) and item[0] is _DONE:
+                        expected = item[1]
+                        self.stats['submitted'] += expected
+                        continue
+                    if isinstance(item, Exception):
+                        raise item
+                    slots.release()
+                    received += 1
+                    result = item.result()
+                    self.stats['completed'] += 1
+                    if 'error' in result:
+                        self.stats['errors'] += 1
+                    yield result
+            finally:
+                stop.set()
+                feeder.join()
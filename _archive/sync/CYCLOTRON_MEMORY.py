@@ -10,6 +10,8 @@ Features:
 - Q-learning (reinforce success)
 """
 
+import os
+import sys
 import sqlite3
 import json
 import hashlib
@@ -21,6 +23,13 @@ from typing import List, Dict, Optional, Tuple
 MEMORY_DIR = Path.home() / ".consciousness" / "memory"
 DB_PATH = MEMORY_DIR / "cyclotron_brain.db"
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SIMILARITY_INDEX import SimilarityIndex
+
+# Shadow index for find_similar_episodes, ranked by text match and success * q_value
+EPISODE_INDEX = SimilarityIndex('episodes', 'task', quality='success * q_value', tiebreak='timestamp DESC')
+
 def ensure_memory_exists():
     """Create memory directory and database"""
     MEMORY_DIR.mkdir(parents=True, exist_ok=True)
@@ -71,6 +80,7 @@ def ensure_memory_exists():
     ''')
 
     conn.commit()
+    EPISODE_INDEX.ensure(conn)
     conn.close()
     print(f"[MEMORY] Database initialized at {DB_PATH}")
 
@@ -113,37 +123,11 @@ class CyclotronMemory:
         return episode_id
 
     def find_similar_episodes(self, task: str, limit: int = 5) -> List[Dict]:
-        """Find similar past experiences (simple keyword matching for now)"""
-        cursor = self.conn.cursor()
-
+        """Find similar past experiences (keyword matching on the FTS shadow index)"""
         # Split task into keywords
-        keywords = task.lower().split()
+        keywords = [k for k in task.lower().split()[:5] if len(k) > 3]  # Skip short words
 
-        # Build search query
-        conditions = []
-        params = []
-        for keyword in keywords[:5]:  # Limit to 5 keywords
-            if len(keyword) > 3:  # Skip short words
-                conditions.append("LOWER(task) LIKE ?")
-                params.append(f"%{keyword}%")
-
-        if not conditions:
-            return []
-
-        query = f'''
-            SELECT *,
-                   (success * q_value) as relevance_score
-            FROM episodes
-            WHERE {" OR ".join(conditions)}
-            ORDER BY relevance_score DESC, timestamp DESC
-            LIMIT ?
-        '''
-        params.append(limit)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        return [dict(row) for row in rows]
+        return EPISODE_INDEX.find(self.conn, keywords, limit)
 
     def update_q_value(self, episode_id: str, reward: float, learning_rate: float = 0.1):
         """Update Q-value based on outcome (simple Q-learning)"""
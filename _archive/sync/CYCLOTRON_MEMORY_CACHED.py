@@ -12,6 +12,8 @@ Changes from original:
 - Statistics tracking for cache hits/misses
 """
 
+import os
+import sys
 import sqlite3
 import json
 import hashlib
@@ -25,6 +27,13 @@ import threading
 MEMORY_DIR = Path.home() / ".consciousness" / "memory"
 DB_PATH = MEMORY_DIR / "cyclotron_brain.db"
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SIMILARITY_INDEX import SimilarityIndex
+
+# Shadow index for find_similar_episodes, ranked by text match and success * q_value
+EPISODE_INDEX = SimilarityIndex('episodes', 'task', quality='success * q_value', tiebreak='timestamp DESC')
+
 def ensure_memory_exists():
     """Create memory directory and database"""
     MEMORY_DIR.mkdir(parents=True, exist_ok=True)
@@ -75,6 +84,7 @@ def ensure_memory_exists():
     ''')
 
     conn.commit()
+    EPISODE_INDEX.ensure(conn)
     conn.close()
 
 def generate_id(content: str) -> str:
@@ -223,38 +233,14 @@ class CyclotronMemoryCached:
         if cached is not None:
             return cached
 
-        # Cache miss - run query
-        with self.db_lock:
-            cursor = self.conn.cursor()
-
-            # Split task into keywords
-            keywords = task.lower().split()
+        # Split task into keywords
+        keywords = [k for k in task.lower().split()[:5] if len(k) > 3]  # Skip short words
+        if not keywords:
+            return []
 
-            # Build search query
-            conditions = []
-            params = []
-            for keyword in keywords[:5]:  # Limit to 5 keywords
-                if len(keyword) > 3:  # Skip short words
-                    conditions.append("LOWER(task) LIKE ?")
-                    params.append(f"%{keyword}%")
-
-            if not conditions:
-                return []
-
-            query = f'''
-                SELECT *,
-                       (success * q_value) as relevance_score
-                FROM episodes
-                WHERE {" OR ".join(conditions)}
-                ORDER BY relevance_score DESC, timestamp DESC
-                LIMIT ?
-            '''
-            params.append(limit)
-
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-
-        results = [dict(row) for row in rows]
+        # Cache miss - run query on the FTS shadow index
+        with self.db_lock:
+            results = EPISODE_INDEX.find(self.conn, keywords, limit)
 
         # Store in cache
         self.query_cache.set(cache_key, results)
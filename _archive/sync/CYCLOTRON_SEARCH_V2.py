@@ -7,21 +7,158 @@ Searches the actual CONTENT of files, not just filenames.
 Returns relevant passages with context.
 """
 
-import sqlite3
+import os
+import sys
+import threading
 from pathlib import Path
+from collections import OrderedDict
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from CYCLOTRON_DB_POOL import ReadOnlyPool
+
 app = Flask(__name__)
 CORS(app)
 
 DB_PATH = Path.home() / '100X_DEPLOYMENT' / '.cyclotron_atoms' / 'cyclotron.db'
 
+# Connections are reused across requests; see CYCLOTRON_DB_POOL
+db_pool = ReadOnlyPool(DB_PATH)
+
+# Hot query shapes. Each is always issued with this exact SQL text, so a
+# pooled connection runs it as an already-prepared statement.
+SEARCH_SQL = '''
+    SELECT
+        path,
+        name,
+        type,
+        snippet(knowledge, 3, '**', '**', '...', 64) as snippet,
+        modified,
+        bm25(knowledge) as score
+    FROM knowledge
+    WHERE knowledge MATCH ?
+    ORDER BY score
+    LIMIT ?
+'''
+
+SEARCH_TYPE_SQL = '''
+    SELECT
+        path,
+        name,
+        type,
+        snippet(knowledge, 3, '**', '**', '...', 64) as snippet,
+        modified,
+        bm25(knowledge) as score
+    FROM knowledge
+    WHERE knowledge MATCH ? AND type = ?
+    ORDER BY score
+    LIMIT ?
+'''
+
+ASK_SQL = '''
+    SELECT
+        path,
+        name,
+        snippet(knowledge, 3, '>>>', '<<<', '...', 100) as snippet,
+        bm25(knowledge) as score
+    FROM knowledge
+    WHERE knowledge MATCH ?
+    ORDER BY score
+    LIMIT ?
+'''
+
+STATS_META_SQL = 'SELECT key, value FROM index_meta'
+
+STATS_TYPES_SQL = '''
+    SELECT type, COUNT(*)
+    FROM knowledge
+    GROUP BY type
+    ORDER BY COUNT(*) DESC
+'''
+
+RECENT_SQL = '''
+    SELECT path, name, type, preview, modified
+    FROM knowledge
+    ORDER BY modified DESC
+    LIMIT ?
+'''
+
+FILE_SQL = '''
+    SELECT name, type, content, modified
+    FROM knowledge
+    WHERE path = ?
+'''
+
+# Bumped by the indexer and daemon in every transaction that changes knowledge
+GENERATION_SQL = "SELECT value FROM index_meta WHERE key = 'generation'"
+
+class QueryCache:
+    """LRU cache of query results, valid for a single index generation"""
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.generation = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, generation, key):
+        with self.lock:
+            if generation != self.generation:
+                # The index changed - everything cached is stale
+                self.cache.clear()
+                self.generation = generation
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+            return None
+
+    def set(self, generation, key, data):
+        with self.lock:
+            if generation != self.generation:
+                return  # Computed against an index that has since changed
+            self.cache[key] = data
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.max_size:
+                # Remove least recently used
+                self.cache.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{self.hits/total*100:.1f}%" if total > 0 else "N/A",
+            'size': len(self.cache),
+            'max_size': self.max_size,
+            'generation': self.generation
+        }
+
+query_cache = QueryCache()
+
+def index_generation(conn):
+    """
+    Current index generation. Read before running a query, so a cached
+    result is never older than the generation it is stored under.
+    """
+    try:
+        row = conn.execute(GENERATION_SQL).fetchone()
+    except Exception:
+        return None  # Index built before generations existed
+    return row[0] if row else None
+
+def normalize_query(query):
+    """Collapse whitespace; case is kept since FTS5 operators are uppercase"""
+    return ' '.join(query.split())
+
 def get_db():
-    """Get database connection"""
-    if not DB_PATH.exists():
-        return None
-    return sqlite3.connect(str(DB_PATH))
+    """Borrow a pooled read-only connection: `with get_db() as conn:` (conn is None if no database)"""
+    return db_pool.connection()
 
 @app.route('/api/search', methods=['GET'])
 def api_search():
@@ -40,64 +177,44 @@ def api_search():
     if not query:
         return jsonify({'error': 'Query required', 'hint': 'Use ?q=your+search+terms'}), 400
 
-    conn = get_db()
-    if not conn:
-        return jsonify({'error': 'Database not found', 'hint': 'Run CYCLOTRON_CONTENT_INDEXER.py first'}), 404
-
-    cursor = conn.cursor()
-
     try:
-        # Build query with optional type filter
-        if file_type:
-            cursor.execute('''
-                SELECT
-                    path,
-                    name,
-                    type,
-                    snippet(knowledge, 3, '**', '**', '...', 64) as snippet,
-                    modified,
-                    bm25(knowledge) as score
-                FROM knowledge
-                WHERE knowledge MATCH ? AND type = ?
-                ORDER BY score
-                LIMIT ?
-            ''', (query, file_type, limit))
-        else:
-            cursor.execute('''
-                SELECT
-                    path,
-                    name,
-                    type,
-                    snippet(knowledge, 3, '**', '**', '...', 64) as snippet,
-                    modified,
-                    bm25(knowledge) as score
-                FROM knowledge
-                WHERE knowledge MATCH ?
-                ORDER BY score
-                LIMIT ?
-            ''', (query, limit))
-
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'path': row[0],
-                'name': row[1],
-                'type': row[2],
-                'snippet': row[3],
-                'modified': row[4],
-                'score': round(abs(row[5]), 3)
+        with get_db() as conn:
+            if not conn:
+                return jsonify({'error': 'Database not found', 'hint': 'Run CYCLOTRON_CONTENT_INDEXER.py first'}), 404
+
+            cursor = conn.cursor()
+
+            generation = index_generation(conn)
+            key = ('search', normalize_query(query), file_type, limit)
+            results = query_cache.get(generation, key)
+
+            if results is None:
+                # Pick the prepared query shape for the optional type filter
+                if file_type:
+                    cursor.execute(SEARCH_TYPE_SQL, (query, file_type, limit))
+                else:
+                    cursor.execute(SEARCH_SQL, (query, limit))
+
+                results = []
+                for row in cursor.fetchall():
+                    results.append({
+                        'path': row[0],
+                        'name': row[1],
+                        'type': row[2],
+                        'snippet': row[3],
+                        'modified': row[4],
+                        'score': round(abs(row[5]), 3)
+                    })
+                query_cache.set(generation, key, results)
+
+            return jsonify({
+                'query': query,
+                'count': len(results),
+                'results': results
             })
 
-        return jsonify({
-            'query': query,
-            'count': len(results),
-            'results': results
-        })
-
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/ask', methods=['GET'])
 def api_ask():
@@ -112,125 +229,106 @@ def api_ask():
     if not question:
         return jsonify({'error': 'Question required'}), 400
 
-    conn = get_db()
-    if not conn:
-        return jsonify({'error': 'Database not found'}), 404
-
-    cursor = conn.cursor()
-
     try:
-        # Extract key terms from question (simple approach)
-        # Remove common words
-        stopwords = {'what', 'how', 'why', 'when', 'where', 'do', 'i', 'know', 'about', 'the', 'a', 'an', 'is', 'are', 'was', 'were', 'my', 'to', 'for'}
-        terms = [w for w in question.lower().split() if w not in stopwords and len(w) > 2]
-        search_query = ' OR '.join(terms) if terms else question
-
-        cursor.execute('''
-            SELECT
-                path,
-                name,
-                snippet(knowledge, 3, '>>>', '<<<', '...', 100) as snippet,
-                bm25(knowledge) as score
-            FROM knowledge
-            WHERE knowledge MATCH ?
-            ORDER BY score
-            LIMIT ?
-        ''', (search_query, limit))
-
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'source': row[1],
-                'path': row[0],
-                'answer': row[2],
-                'relevance': round(abs(row[3]), 3)
+        with get_db() as conn:
+            if not conn:
+                return jsonify({'error': 'Database not found'}), 404
+
+            cursor = conn.cursor()
+
+            # Extract key terms from question (simple approach)
+            # Remove common words
+            stopwords = {'what', 'how', 'why', 'when', 'where', 'do', 'i', 'know', 'about', 'the', 'a', 'an', 'is', 'are', 'was', 'were', 'my', 'to', 'for'}
+            terms = [w for w in question.lower().split() if w not in stopwords and len(w) > 2]
+            search_query = ' OR '.join(terms) if terms else question
+
+            # Differently worded questions with the same terms share an entry
+            generation = index_generation(conn)
+            key = ('ask', normalize_query(search_query), limit)
+            results = query_cache.get(generation, key)
+
+            if results is None:
+                cursor.execute(ASK_SQL, (search_query, limit))
+
+                results = []
+                for row in cursor.fetchall():
+                    results.append({
+                        'source': row[1],
+                        'path': row[0],
+                        'answer': row[2],
+                        'relevance': round(abs(row[3]), 3)
+                    })
+                query_cache.set(generation, key, results)
+
+            return jsonify({
+                'question': question,
+                'search_terms': terms,
+                'answers': results
             })
 
-        return jsonify({
-            'question': question,
-            'search_terms': terms,
-            'answers': results
-        })
-
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/stats', methods=['GET'])
 def api_stats():
     """Get index statistics"""
-    conn = get_db()
-    if not conn:
-        return jsonify({'error': 'Database not found'}), 404
-
-    cursor = conn.cursor()
-
     try:
-        # Get metadata
-        cursor.execute('SELECT key, value FROM index_meta')
-        meta = dict(cursor.fetchall())
-
-        # Get type breakdown
-        cursor.execute('''
-            SELECT type, COUNT(*)
-            FROM knowledge
-            GROUP BY type
-            ORDER BY COUNT(*) DESC
-        ''')
-        types = dict(cursor.fetchall())
-
-        return jsonify({
-            'status': 'operational',
-            'last_indexed': meta.get('last_indexed', 'Never'),
-            'total_files': int(meta.get('total_files', 0)),
-            'total_characters': int(meta.get('total_chars', 0)),
-            'files_by_type': types
-        })
+        with get_db() as conn:
+            if not conn:
+                return jsonify({'error': 'Database not found'}), 404
+
+            cursor = conn.cursor()
+
+            # Get metadata
+            cursor.execute(STATS_META_SQL)
+            meta = dict(cursor.fetchall())
+
+            # Get type breakdown
+            cursor.execute(STATS_TYPES_SQL)
+            types = dict(cursor.fetchall())
+
+            return jsonify({
+                'status': 'operational',
+                'last_indexed': meta.get('last_indexed', 'Never'),
+                'total_files': int(meta.get('total_files', 0)),
+                'total_characters': int(meta.get('total_chars', 0)),
+                'files_by_type': types
+            })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/recent', methods=['GET'])
 def api_recent():
     """Get most recently modified files"""
     limit = int(request.args.get('limit', 20))
 
-    conn = get_db()
-    if not conn:
-        return jsonify({'error': 'Database not found'}), 404
-
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('''
-            SELECT path, name, type, preview, modified
-            FROM knowledge
-            ORDER BY modified DESC
-            LIMIT ?
-        ''', (limit,))
-
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'path': row[0],
-                'name': row[1],
-                'type': row[2],
-                'preview': row[3][:200],
-                'modified': row[4]
+        with get_db() as conn:
+            if not conn:
+                return jsonify({'error': 'Database not found'}), 404
+
+            cursor = conn.cursor()
+
+            cursor.execute(RECENT_SQL, (limit,))
+
+            results = []
+            for row in cursor.fetchall():
+                results.append({
+                    'path': row[0],
+                    'name': row[1],
+                    'type': row[2],
+                    'preview': row[3][:200],
+                    'modified': row[4]
+                })
+
+            return jsonify({
+                'count': len(results),
+                'files': results
             })
 
-        return jsonify({
-            'count': len(results),
-            'files': results
-        })
-
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/file', methods=['GET'])
 def api_file():
@@ -240,47 +338,41 @@ def api_file():
     if not filepath:
         return jsonify({'error': 'Path required'}), 400
 
-    conn = get_db()
-    if not conn:
-        return jsonify({'error': 'Database not found'}), 404
+    try:
+        with get_db() as conn:
+            if not conn:
+                return jsonify({'error': 'Database not found'}), 404
 
-    cursor = conn.cursor()
+            cursor = conn.cursor()
 
-    try:
-        cursor.execute('''
-            SELECT name, type, content, modified
-            FROM knowledge
-            WHERE path = ?
-        ''', (filepath,))
-
-        row = cursor.fetchone()
-        if not row:
-            return jsonify({'error': 'File not found in index'}), 404
-
-        return jsonify({
-            'name': row[0],
-            'type': row[1],
-            'content': row[2],
-            'modified': row[3]
-        })
+            cursor.execute(FILE_SQL, (filepath,))
+
+            row = cursor.fetchone()
+            if not row:
+                return jsonify({'error': 'File not found in index'}), 404
+
+            return jsonify({
+                'name': row[0],
+                'type': row[1],
+                'content': row[2],
+                'modified': row[3]
+            })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/health', methods=['GET'])
 def api_health():
     """Health check"""
-    conn = get_db()
-    db_exists = conn is not None
-    if conn:
-        conn.close()
+    with get_db() as conn:
+        db_exists = conn is not None
 
     return jsonify({
         'status': 'healthy' if db_exists else 'no database',
         'database': str(DB_PATH),
-        'database_exists': db_exists
+        'database_exists': db_exists,
+        'pool_connections': db_pool.opened,
+        'query_cache': query_cache.stats()
     })
 
 if __name__ == '__main__':
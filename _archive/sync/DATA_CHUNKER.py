@@ -19,8 +19,15 @@ import re
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
+import os
+import sys
 import sqlite3
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SIMILARITY_INDEX import SimilarityIndex
+from ATOM_FINGERPRINTS import FingerprintStore, fingerprint
+
 try:
     import requests
     HAS_REQUESTS = True
@@ -39,6 +46,13 @@ MAX_CHUNK_SIZE = 2000  # Characters per initial chunk
 TARGET_ATOM_SIZE = 500  # Target size for final atom
 OVERLAP = 200  # Overlap between chunks for context
 
+# Shadow index for search_atoms, ranked by keyword match and importance
+ATOM_INDEX = SimilarityIndex('atoms', 'keywords', quality='importance')
+
+# Fingerprints of the original chunks, so a chunk already stored from another
+# source is skipped before it costs an LLM call
+CHUNK_FINGERPRINTS = FingerprintStore('atoms', 'original_text')
+
 def ensure_dirs():
     MEMORY_DIR.mkdir(parents=True, exist_ok=True)
     ATOMS_DIR.mkdir(parents=True, exist_ok=True)
@@ -77,6 +91,8 @@ def init_db():
     ''')
 
     conn.commit()
+    ATOM_INDEX.ensure(conn)
+    CHUNK_FINGERPRINTS.ensure(conn)
     conn.close()
 
 def generate_id(content: str) -> str:
@@ -205,16 +221,25 @@ def process_file(filepath: str) -> Dict:
 
     source_id = generate_id(filepath + str(datetime.now()))
     atoms_created = 0
+    duplicates_skipped = 0
     total_compressed_size = 0
 
     for i, chunk in enumerate(chunks):
         print(f"[CHUNKER] Processing chunk {i+1}/{len(chunks)}...")
 
+        # Skip chunks another atom already covers (re-processing the same chunk still replaces it)
+        atom_id = generate_id(chunk)
+        fp = fingerprint(chunk)
+        duplicates = [d for d in CHUNK_FINGERPRINTS.find_duplicates(conn, fp, limit=2) if d['atom_id'] != atom_id]
+        if duplicates:
+            print(f"[CHUNKER] Chunk {i+1} duplicates atom {duplicates[0]['atom_id']} - skipped")
+            duplicates_skipped += 1
+            continue
+
         # Compress
         result = compress_chunk(chunk)
 
         # Create atom
-        atom_id = generate_id(chunk)
         compressed = result["compressed"]
         keywords = result["keywords"]
 
@@ -237,6 +262,7 @@ def process_file(filepath: str) -> Dict:
             json.dumps([]),  # Connections filled later
             datetime.now().isoformat()
         ))
+        CHUNK_FINGERPRINTS.add(conn, atom_id, fp)
 
         # Also save as JSON file for easy access
         atom_file = ATOMS_DIR / f"{atom_id}.json"
@@ -278,12 +304,15 @@ def process_file(filepath: str) -> Dict:
         "compressed_size": total_compressed_size,
         "compression_ratio": f"{compression_ratio:.1%}",
         "atoms_created": atoms_created,
+        "duplicates_skipped": duplicates_skipped,
         "atoms_dir": str(ATOMS_DIR)
     }
 
     print(f"[CHUNKER] Complete!")
     print(f"[CHUNKER] Compression: {original_size:,} → {total_compressed_size:,} ({compression_ratio:.1%})")
     print(f"[CHUNKER] Atoms created: {atoms_created}")
+    if duplicates_skipped:
+        print(f"[CHUNKER] Duplicate chunks skipped: {duplicates_skipped}")
 
     return result
 
@@ -296,26 +325,12 @@ def search_atoms(query: str, limit: int = 5) -> List[Dict]:
 
     # Simple keyword search
     keywords = query.lower().split()
-    conditions = []
-    params = []
-
-    for kw in keywords:
-        conditions.append("LOWER(keywords) LIKE ?")
-        params.append(f"%{kw}%")
-
-    if conditions:
-        query_sql = f'''
-            SELECT * FROM atoms
-            WHERE {" OR ".join(conditions)}
-            ORDER BY importance DESC
-            LIMIT ?
-        '''
-        params.append(limit)
-        cursor.execute(query_sql, params)
+
+    if keywords:
+        results = ATOM_INDEX.find(conn, keywords, limit)
     else:
         cursor.execute("SELECT * FROM atoms ORDER BY importance DESC LIMIT ?", (limit,))
-
-    results = [dict(row) for row in cursor.fetchall()]
+        results = [dict(row) for row in cursor.fetchall()]
     conn.close()
 
     return results
@@ -16,6 +16,7 @@ import mmap
 import os
 import sqlite3
 import struct
+import sys
 import threading
 import time
 from datetime import datetime
@@ -23,6 +24,10 @@ from multiprocessing import shared_memory
 from pathlib import Path
 from typing import Dict, Optional, Callable
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from SIMILARITY_INDEX import SimilarityIndex
+
 # Paths
 CONSCIOUSNESS = Path.home() / ".consciousness"
 HUB = CONSCIOUSNESS / "hub"
@@ -121,6 +126,7 @@ class HotMemoryDB:
         # Create in-memory database
         self.conn = sqlite3.connect(':memory:', check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self.episode_index = SimilarityIndex('hot_episodes', 'task', quality='q_value', tiebreak='timestamp DESC')
         self._init_tables()
         self._load_from_disk()
 
@@ -168,6 +174,7 @@ class HotMemoryDB:
         ''')
 
         self.conn.commit()
+        self.episode_index.ensure(self.conn)
 
     def _load_from_disk(self):
         """Load recent data from disk database"""
@@ -253,20 +260,7 @@ class HotMemoryDB:
     def find_similar(self, task: str, limit: int = 5) -> list:
         """Find similar episodes - <1ms"""
         keywords = [w for w in task.lower().split() if len(w) > 3][:3]
-        if not keywords:
-            return []
-
-        conditions = " OR ".join(["LOWER(task) LIKE ?" for _ in keywords])
-        params = [f"%{k}%" for k in keywords] + [limit]
-
-        cursor = self.conn.execute(f'''
-            SELECT * FROM hot_episodes
-            WHERE {conditions}
-            ORDER BY q_value DESC, timestamp DESC
-            LIMIT ?
-        ''', params)
-
-        return [dict(row) for row in cursor.fetchall()]
+        return self.episode_index.find(self.conn, keywords, limit)
 
     def get_patterns(self, task: str = None) -> list:
         """Get matching patterns - <1ms"""
@@ -9,15 +9,20 @@ Purpose:
 1. Find all .md files in Google Drive
 2. Convert to atom format (JSON)
 3. Add to Cyclotron database (atoms.db)
-4. Deduplicate using content hash
+4. Skip files whose content is already stored (byte-identical by default;
+   --near-duplicates also skips normalized and near-duplicate matches)
 
 Usage:
-  python GOOGLE_DRIVE_MD_INGESTER.py [--dry-run] [--verbose]
+  python GOOGLE_DRIVE_MD_INGESTER.py [--live] [--verbose] [--near-duplicates]
 """
 
 import os; import sys; import json; import sqlite3; import hashlib
 from pathlib import Path; from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ATOM_FINGERPRINTS import FingerprintStore, fingerprint
+
 # Paths
 HOME = Path(os.environ.get('USERPROFILE', os.path.expanduser('~')))
 GDRIVE = Path("G:/My Drive")
@@ -25,9 +30,8 @@ CONSCIOUSNESS = HOME / '.consciousness'
 ATOMS_DB = CONSCIOUSNESS / 'cyclotron_core' / 'atoms.db'
 ATOMS_DIR = CONSCIOUSNESS / 'cyclotron_core' / 'atoms'
 
-def hash_content(content):
-    """Create MD5 hash for deduplication"""
-    return hashlib.md5(content.encode('utf-8', errors='ignore')).hexdigest()
+# Stored fingerprints for insert-time duplicate checks
+FINGERPRINTS = FingerprintStore('atoms', 'content')
 
 def generate_atom_id():
     """Generate unique 12-char hex atom ID"""
@@ -99,22 +103,8 @@ def create_atom_from_md(filepath, content):
         }
     }
 
-def get_existing_hashes(db_path):
-    """Get all existing content hashes from database"""
-    if not db_path.exists():
-        return set()
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT content FROM atoms")
-        hashes = {hash_content(row[0]) for row in cursor.fetchall() if row[0]}
-    except:
-        hashes = set()
-    conn.close()
-    return hashes
-
-def insert_atoms_to_db(atoms, db_path):
-    """Insert atoms into SQLite database - matches existing schema"""
+def insert_atoms_to_db(atoms, db_path, fingerprints=None):
+    """Insert atoms into SQLite database - matches existing schema, storing their fingerprints"""
     conn = sqlite3.connect(str(db_path))
     cursor = conn.cursor()
 
@@ -130,6 +120,8 @@ def insert_atoms_to_db(atoms, db_path):
                  atom['created'], atom.get('confidence', 0.8), 0))
             if cursor.rowcount > 0:
                 inserted += 1
+                if fingerprints and atom['id'] in fingerprints:
+                    FINGERPRINTS.add(conn, atom['id'], fingerprints[atom['id']])
         except Exception as e:
             print(f"  Error inserting {atom['id']}: {e}")
 
@@ -149,13 +141,14 @@ def save_atom_files(atoms, atoms_dir):
             saved += 1
     return saved
 
-def ingest_google_drive(dry_run=True, verbose=False):
+def ingest_google_drive(dry_run=True, verbose=False, near_duplicates=False):
     """Main ingestion function"""
     print("=" * 60)
     print("GOOGLE DRIVE MD INGESTER")
     print(f"Source: {GDRIVE}")
     print(f"Target: {ATOMS_DB}")
     print(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
+    print(f"Duplicates: {'exact and near' if near_duplicates else 'exact content only'}")
     print("=" * 60 + "\n")
 
     # Find MD files
@@ -167,14 +160,16 @@ def ingest_google_drive(dry_run=True, verbose=False):
         print("No MD files found!")
         return None
 
-    # Get existing hashes for deduplication
+    # Open the stored fingerprints for deduplication (read-only in a dry run)
     print("Loading existing atoms for deduplication...")
-    existing_hashes = get_existing_hashes(ATOMS_DB)
-    print(f"Existing atoms: {len(existing_hashes)}\n")
+    fp_conn = FINGERPRINTS.open(ATOMS_DB, read_only=dry_run)
+    print(f"Existing atoms: {FINGERPRINTS.count(fp_conn) if fp_conn else 0}\n")
 
     # Process files
     print("Processing files...")
     new_atoms = []
+    new_fingerprints = {}
+    batch_hashes = {}
     skipped_dups = 0
     skipped_empty = 0
     errors = 0
@@ -186,16 +181,18 @@ def ingest_google_drive(dry_run=True, verbose=False):
                 skipped_empty += 1
                 continue
 
-            content_hash = hash_content(content)
-            if content_hash in existing_hashes:
+            atom = create_atom_from_md(filepath, content)
+            fp = fingerprint(atom['content'])
+            duplicate_of = FINGERPRINTS.find_duplicate(fp_conn, fp, batch_hashes, atom['content'], near_duplicates)
+            if duplicate_of:
                 skipped_dups += 1
-                if verbose:
-                    print(f"  SKIP (dup): {filepath.name}")
+                print(f"  SKIP (dup of {duplicate_of}): {filepath.name}")
                 continue
 
-            atom = create_atom_from_md(filepath, content)
             new_atoms.append(atom)
-            existing_hashes.add(content_hash)  # Prevent intra-batch dups
+            new_fingerprints[atom['id']] = fp
+            # Prevent intra-batch dups
+            batch_hashes[FINGERPRINTS.batch_key(fp, atom['content'], near_duplicates)] = atom['id']
 
             if verbose:
                 print(f"  NEW: {filepath.name} -> {atom['id']}")
@@ -204,6 +201,9 @@ def ingest_google_drive(dry_run=True, verbose=False):
             if verbose:
                 print(f"  ERROR: {filepath.name}: {e}")
 
+    if fp_conn:
+        fp_conn.close()
+
     print(f"\nProcessing complete:")
     print(f"  New atoms: {len(new_atoms)}")
     print(f"  Skipped (duplicate): {skipped_dups}")
@@ -221,7 +221,7 @@ def ingest_google_drive(dry_run=True, verbose=False):
         if new_atoms:
             # Insert to database
             print(f"\nInserting {len(new_atoms)} atoms to database...")
-            inserted_db = insert_atoms_to_db(new_atoms, ATOMS_DB)
+            inserted_db = insert_atoms_to_db(new_atoms, ATOMS_DB, new_fingerprints)
             print(f"  Database: {inserted_db} inserted")
 
             # Save atom files
@@ -235,6 +235,7 @@ def ingest_google_drive(dry_run=True, verbose=False):
         "timestamp": datetime.now().isoformat(),
         "source": str(GDRIVE),
         "dry_run": dry_run,
+        "near_duplicates": near_duplicates,
         "files_scanned": len(md_files),
         "new_atoms": len(new_atoms),
         "skipped_duplicates": skipped_dups,
@@ -260,12 +261,14 @@ def save_report(results, output_path=None):
 if __name__ == '__main__':
     dry_run = '--live' not in sys.argv
     verbose = '--verbose' in sys.argv or '-v' in sys.argv
+    near_duplicates = '--near-duplicates' in sys.argv
 
-    print("\nUsage: python GOOGLE_DRIVE_MD_INGESTER.py [--live] [--verbose]")
+    print("\nUsage: python GOOGLE_DRIVE_MD_INGESTER.py [--live] [--verbose] [--near-duplicates]")
     print("  --live: Actually insert atoms (default is dry run)")
-    print("  --verbose: Show each file being processed\n")
+    print("  --verbose: Show each file being processed")
+    print("  --near-duplicates: Also skip files close to a stored atom, not just identical ones\n")
 
-    results = ingest_google_drive(dry_run=dry_run, verbose=verbose)
+    results = ingest_google_drive(dry_run=dry_run, verbose=verbose, near_duplicates=near_duplicates)
 
     if results:
         save_report(results)
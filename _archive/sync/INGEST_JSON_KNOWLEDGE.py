@@ -7,6 +7,8 @@ Task: CYC-003 from WORK_BACKLOG
 Finds JSON files containing knowledge and adds them to Cyclotron brain
 """
 
+import os
+import sys
 import sqlite3
 import hashlib
 import json
@@ -14,10 +16,19 @@ from pathlib import Path
 from datetime import datetime
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ATOM_FINGERPRINTS import FingerprintStore, fingerprint
+
 # Paths
 CYCLOTRON_DB = Path(r"C:\Users\Darrick\.consciousness\cyclotron_core\atoms.db")
 ROOT_DIR = Path(r"C:\Users\Darrick")
 
+# Stored fingerprints of the previews, for insert-time duplicate checks.
+# Shorter previews ("Array with 3 items") say too little to call two files duplicates.
+FINGERPRINTS = FingerprintStore('atoms', 'content_preview')
+MIN_DEDUP_PREVIEW = 100
+
 # Skip these directories (node_modules, AppData, etc.)
 SKIP_DIRS = {
     'node_modules', 'AppData', '.git', '__pycache__', 'venv',
@@ -157,11 +168,19 @@ def main():
     existing_ids = get_existing_ids(conn)
     cursor = conn.cursor()
 
+    try:
+        FINGERPRINTS.ensure(conn)
+        dedup = True
+    except sqlite3.Error as e:
+        print(f"Fingerprints unavailable ({e}) - checking IDs only")
+        dedup = False
+
     print(f"\nExisting atoms: {len(existing_ids)}")
     print("Scanning for JSON knowledge files...")
 
     added = 0
     skipped = 0
+    skipped_content = 0
     scanned = 0
 
     # Find JSON files
@@ -204,6 +223,12 @@ def main():
         if not meta:
             continue
 
+        # Same content already stored under another file?
+        fp = fingerprint(meta['preview']) if dedup else None
+        if fp and len(meta['preview']) >= MIN_DEDUP_PREVIEW and FINGERPRINTS.find_duplicates(conn, fp, limit=1):
+            skipped_content += 1
+            continue
+
         # Insert into database
         try:
             cursor.execute('''
@@ -230,6 +255,9 @@ def main():
                 SELECT rowid, title, content_preview, keywords, categories FROM atoms WHERE id = ?
             ''', (atom_id,))
 
+            if fp:
+                FINGERPRINTS.add(conn, atom_id, fp)
+
             existing_ids.add(atom_id)
             added += 1
 
@@ -253,6 +281,7 @@ def main():
     print(f"Files scanned: {scanned}")
     print(f"JSON atoms added: {added}")
     print(f"Skipped (duplicates): {skipped}")
+    print(f"Skipped (duplicate content): {skipped_content}")
     print(f"\nFinal atom count: {final_count}")
 
 if __name__ == "__main__":
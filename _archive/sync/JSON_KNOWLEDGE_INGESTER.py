@@ -11,17 +11,21 @@ Finds and ingests JSON files containing knowledge, patterns, consciousness data.
 import os; import sys; import json; import sqlite3; import hashlib
 from pathlib import Path; from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ATOM_FINGERPRINTS import FingerprintStore, fingerprint
+
 HOME = Path(os.environ.get('USERPROFILE', os.path.expanduser('~')))
 CONSCIOUSNESS = HOME / '.consciousness'
 ATOMS_DB = CONSCIOUSNESS / 'cyclotron_core' / 'atoms.db'
 
+# Stored fingerprints for insert-time duplicate checks
+FINGERPRINTS = FingerprintStore('atoms', 'content')
+
 # Knowledge-related patterns in filenames
 KNOWLEDGE_PATTERNS = ['knowledge', 'brain', 'atom', 'pattern', 'consciousness',
                       'trinity', 'session', 'report', 'analysis', 'insight']
 
-def hash_content(content):
-    return hashlib.md5(content.encode('utf-8', errors='ignore')).hexdigest()
-
 def generate_atom_id():
     return hashlib.md5(str(datetime.now().timestamp()).encode() + os.urandom(8)).hexdigest()[:12]
 
@@ -86,19 +90,7 @@ def create_atom_from_json(filepath, content):
         "metadata": {"original_path": str(filepath), "ingested_by": "CP1_C2_JSON_INGESTER"}
     }
 
-def get_existing_hashes(db_path):
-    if not db_path.exists(): return set()
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT content FROM atoms")
-        hashes = {hash_content(row[0]) for row in cursor.fetchall() if row[0]}
-    except:
-        hashes = set()
-    conn.close()
-    return hashes
-
-def insert_atoms_to_db(atoms, db_path):
+def insert_atoms_to_db(atoms, db_path, fingerprints=None):
     conn = sqlite3.connect(str(db_path))
     cursor = conn.cursor()
     inserted = 0
@@ -110,18 +102,22 @@ def insert_atoms_to_db(atoms, db_path):
                 (atom['id'], atom['type'], atom['content'], atom['source'],
                  json.dumps(atom['tags']), json.dumps(atom.get('metadata', {})),
                  atom['created'], atom.get('confidence', 0.7), 0))
-            if cursor.rowcount > 0: inserted += 1
+            if cursor.rowcount > 0:
+                inserted += 1
+                if fingerprints and atom['id'] in fingerprints:
+                    FINGERPRINTS.add(conn, atom['id'], fingerprints[atom['id']])
         except Exception as e:
             print(f"  Error: {e}")
     conn.commit()
     conn.close()
     return inserted
 
-def ingest_json_knowledge(dry_run=True, verbose=False):
+def ingest_json_knowledge(dry_run=True, verbose=False, near_duplicates=False):
     print("=" * 60)
     print("JSON KNOWLEDGE INGESTER")
     print(f"Target: {ATOMS_DB}")
     print(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
+    print(f"Duplicates: {'exact and near' if near_duplicates else 'exact content only'}")
     print("=" * 60 + "\n")
 
     print("Finding knowledge JSON files...")
@@ -133,11 +129,13 @@ def ingest_json_knowledge(dry_run=True, verbose=False):
         return None
 
     print("Loading existing atoms for deduplication...")
-    existing_hashes = get_existing_hashes(ATOMS_DB)
-    print(f"Existing atoms: {len(existing_hashes)}\n")
+    fp_conn = FINGERPRINTS.open(ATOMS_DB, read_only=dry_run)
+    print(f"Existing atoms: {FINGERPRINTS.count(fp_conn) if fp_conn else 0}\n")
 
     print("Processing files...")
     new_atoms = []
+    new_fingerprints = {}
+    batch_hashes = {}
     skipped_dups = 0
     skipped_empty = 0
     errors = 0
@@ -152,14 +150,17 @@ def ingest_json_knowledge(dry_run=True, verbose=False):
                 skipped_empty += 1
                 continue
 
-            content_hash = hash_content(content)
-            if content_hash in existing_hashes:
+            atom = create_atom_from_json(filepath, content)
+            fp = fingerprint(atom['content'])
+            duplicate_of = FINGERPRINTS.find_duplicate(fp_conn, fp, batch_hashes, atom['content'], near_duplicates)
+            if duplicate_of:
                 skipped_dups += 1
+                print(f"  SKIP (dup of {duplicate_of}): {filepath.name}")
                 continue
 
-            atom = create_atom_from_json(filepath, content)
             new_atoms.append(atom)
-            existing_hashes.add(content_hash)
+            new_fingerprints[atom['id']] = fp
+            batch_hashes[FINGERPRINTS.batch_key(fp, atom['content'], near_duplicates)] = atom['id']
 
             if verbose:
                 print(f"  NEW: {filepath.name}")
@@ -168,6 +169,8 @@ def ingest_json_knowledge(dry_run=True, verbose=False):
             if verbose:
                 print(f"  ERROR: {filepath.name}: {e}")
 
+    if fp_conn: fp_conn.close()
+
     print(f"\nProcessing complete:")
     print(f"  New atoms: {len(new_atoms)}")
     print(f"  Skipped (duplicate): {skipped_dups}")
@@ -179,12 +182,13 @@ def ingest_json_knowledge(dry_run=True, verbose=False):
     else:
         if new_atoms:
             print(f"\nInserting {len(new_atoms)} atoms...")
-            inserted = insert_atoms_to_db(new_atoms, ATOMS_DB)
+            inserted = insert_atoms_to_db(new_atoms, ATOMS_DB, new_fingerprints)
             print(f"  Database: {inserted} inserted")
 
     results = {
         "timestamp": datetime.now().isoformat(),
         "dry_run": dry_run,
+        "near_duplicates": near_duplicates,
         "files_scanned": len(json_files),
         "new_atoms": len(new_atoms),
         "skipped_duplicates": skipped_dups,
@@ -206,8 +210,9 @@ def save_report(results, output_path=None):
 if __name__ == '__main__':
     dry_run = '--live' not in sys.argv
     verbose = '--verbose' in sys.argv
-    print("\nUsage: python JSON_KNOWLEDGE_INGESTER.py [--live] [--verbose]\n")
-    results = ingest_json_knowledge(dry_run=dry_run, verbose=verbose)
+    near_duplicates = '--near-duplicates' in sys.argv
+    print("\nUsage: python JSON_KNOWLEDGE_INGESTER.py [--live] [--verbose] [--near-duplicates]\n")
+    results = ingest_json_knowledge(dry_run=dry_run, verbose=verbose, near_duplicates=near_duplicates)
     if results:
         save_report(results)
         sync = Path("G:/My Drive/TRINITY_COMMS/sync")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+KEYWORD ENGINE - Shared keyword extraction and compact keyword postings
+======================================================================
+
+One tokenizer for ATOM_INDEX_BUILDER and KNOWLEDGE_BRIDGE:
+- patterns are compiled once and the stop words live in one shared table
+- tokenizing and counting run in C (re.findall + Counter); Python code only
+  touches each distinct term of a document, never each token
+- terms get integer IDs from a persistent vocabulary, and each term's
+  postings are one sorted array instead of one row per (term, document)
+"""
+
+import re
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'been',
+    'were', 'they', 'their', 'what', 'when', 'where', 'which', 'would',
+    'could', 'should', 'there', 'these', 'those', 'then', 'than', 'them',
+    'also', 'into', 'over', 'such', 'about', 'some', 'only', 'very',
+    'just', 'more', 'most', 'other', 'after', 'before', 'being', 'does',
+    'are', 'was', 'not', 'but', 'you', 'all', 'can', 'has', 'had', 'its',
+    'our', 'your', 'will', 'any', 'each', 'how', 'who', 'why',
+})
+
+# Whole words of 3+ letters (digits or underscores disqualify the word)
+WORD_PATTERN = re.compile(r'\b[a-z]{3,}\b')
+# Runs of letters and digits, everything else separates
+ALNUM_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Postings arrays: 32-bit document rowids, 8-bit keyword ranks. Blobs are
+# always little-endian so an index synced between machines decodes the same.
+DOC_ID_TYPE = 'I'
+MAX_RANK = 255
+SWAP_BYTES = sys.byteorder == 'big'
+
+class KeywordExtractor:
+    """Precompiled tokenizer with a stop word table"""
+
+    def __init__(self, pattern=WORD_PATTERN, min_length: int = 3, stop_words=STOP_WORDS):
+        self.pattern = pattern
+        self.min_length = min_length
+        self.stop_words = stop_words
+
+    def counts(self, text: str) -> Counter:
+        """Term frequencies for one text, stop words and short terms removed"""
+        counts = Counter(self.pattern.findall(text.lower()))
+        dropped = [term for term in counts if len(term) < self.min_length or term in self.stop_words]
+        for term in dropped:
+            del counts[term]
+        return counts
+
+    def tokens(self, text: str) -> List[str]:
+        """Every kept token in order, repeats included"""
+        stop_words, min_length = self.stop_words, self.min_length
+        return [t for t in self.pattern.findall(text.lower()) if len(t) >= min_length and t not in stop_words]
+
+    def top(self, text: str, n: int = 20) -> List[str]:
+        """The n most frequent terms, ties in order of first appearance"""
+        return [term for term, _ in self.counts(text).most_common(n)]
+
+    def counts_many(self, texts: Iterable[str]) -> List[Counter]:
+        """Term frequencies for a batch of texts"""
+        return [self.counts(text) for text in texts]
+
+def create_keyword_tables(conn):
+    """Vocabulary and postings tables; one postings row per term"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS keyword_terms (
+            term_id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS keyword_postings (
+            term_id INTEGER PRIMARY KEY,
+            doc_count INTEGER,
+            doc_ids BLOB,
+            ranks BLOB
+        )
+    ''')
+
+
+class Vocabulary:
+    """Term <-> integer ID table, persisted in keyword_terms. IDs are never reused."""
+
+    def __init__(self, conn):
+        create_keyword_tables(conn)
+        self.ids = dict(conn.execute('SELECT term, term_id FROM keyword_terms'))
+        self.next_id = max(self.ids.values(), default=0) + 1
+        self.added = []
+
+    def id(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = self.next_id
+            self.next_id += 1
+            self.added.append((term_id, term))
+        return term_id
+
+    def save(self, conn):
+        """Write terms added since loading (call inside the caller's transaction)"""
+        conn.executemany('INSERT INTO keyword_terms (term_id, term) VALUES (?, ?)', self.added)
+        self.added = []
+
+
+class PostingsBuilder:
+    """
+    Accumulates term -> (document ids, ranks) in memory and writes one
+    keyword_postings row per term. Add documents in ascending id order and
+    every postings array comes out already sorted.
+    """
+
+    def __init__(self):
+        self.doc_ids: Dict[str, array] = {}
+        self.ranks: Dict[str, array] = {}
+        self.last_doc = -1
+        self.sorted = True
+
+    def add(self, doc_id: int, terms: List[str]):
+        """Record a document's keywords, most important first"""
+        if doc_id <= self.last_doc:
+            self.sorted = False
+        self.last_doc = doc_id
+        for rank, term in enumerate(terms):
+            ids = self.doc_ids.get(term)
+            if ids is None:
+                ids = self.doc_ids[term] = array(DOC_ID_TYPE)
+                self.ranks[term] = array('B')
+            ids.append(doc_id)
+            self.ranks[term].append(min(rank, MAX_RANK))
+
+    def rows(self, vocab: Vocabulary) -> Iterable[Tuple[int, int, bytes, bytes]]:
+        for term, ids in self.doc_ids.items():
+            ranks = self.ranks[term]
+            if not self.sorted:
+                order = sorted(range(len(ids)), key=ids.__getitem__)
+                ids = array(DOC_ID_TYPE, (ids[i] for i in order))
+                ranks = array('B', (ranks[i] for i in order))
+            yield vocab.id(term), len(ids), pack_doc_ids(ids), ranks.tobytes()
+
+    def save(self, conn, vocab: Vocabulary):
+        """Replace keyword_postings with this build (call inside the caller's transaction)"""
+        conn.execute('DELETE FROM keyword_postings')
+        conn.executemany('''
+            INSERT INTO keyword_postings (term_id, doc_count, doc_ids, ranks)
+            VALUES (?, ?, ?, ?)
+        ''', self.rows(vocab))
+        vocab.save(conn)
+
+
+def pack_doc_ids(ids: array) -> bytes:
+    """Little-endian blob of a document id array"""
+    if SWAP_BYTES:
+        ids = array(DOC_ID_TYPE, ids)
+        ids.byteswap()
+    return ids.tobytes()
+
+def unpack_doc_ids(blob: bytes) -> array:
+    """Document id array from a little-endian blob"""
+    ids = array(DOC_ID_TYPE)
+    ids.frombytes(blob)
+    if SWAP_BYTES:
+        ids.byteswap()
+    return ids
+
+
+def lookup_postings(conn, term: str) -> Tuple[array, array]:
+    """(sorted document ids, ranks) for a term; empty arrays if unknown"""
+    ids, ranks = array(DOC_ID_TYPE), array('B')
+    row = conn.execute('''
+        SELECT p.doc_ids, p.ranks
+        FROM keyword_terms t JOIN keyword_postings p ON p.term_id = t.term_id
+        WHERE t.term = ?
+    ''', (term,)).fetchone()
+    if row:
+        ids = unpack_doc_ids(row[0])
+        ranks.frombytes(row[1])
+    return ids, ranks
+
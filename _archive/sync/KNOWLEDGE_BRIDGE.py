@@ -21,6 +21,8 @@ Result:
 - Synthesis can draw from both sources coherently
 """
 
+import os
+import sys
 import json
 import sqlite3
 import hashlib
@@ -28,7 +30,10 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Set, Optional
 from collections import defaultdict
-import re
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from KEYWORD_ENGINE import ALNUM_PATTERN, KeywordExtractor
 
 # Paths
 CONSCIOUSNESS = Path.home() / ".consciousness"
@@ -37,6 +42,19 @@ MEMORY_DB = CONSCIOUSNESS / "memory" / "cyclotron_brain.db"
 KNOWLEDGE_DB = CONSCIOUSNESS / "memory" / "knowledge_atoms.db"
 BRIDGE_DB = CONSCIOUSNESS / "memory" / "knowledge_bridge.db"
 
+# The bridge's own stop words, narrower than the shared STOP_WORDS, so its
+# stored keywords stay the same
+BRIDGE_STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'been',
+    'were', 'they', 'their', 'what', 'when', 'where', 'which', 'would',
+    'could', 'should', 'there', 'these', 'those', 'then', 'than', 'them',
+    'also', 'into', 'over', 'such', 'about', 'some', 'only', 'very',
+    'just', 'more', 'most', 'other', 'after', 'before', 'being', 'does',
+})
+
+# Letter/digit runs of 4+ characters, stop words removed
+BRIDGE_KEYWORDS = KeywordExtractor(ALNUM_PATTERN, min_length=4, stop_words=BRIDGE_STOP_WORDS)
+
 
 def init_bridge_db():
     """Initialize the bridge database"""
@@ -100,28 +118,9 @@ def init_bridge_db():
 
 def extract_keywords(text: str, min_length: int = 4) -> List[str]:
     """Extract meaningful keywords from text"""
-    # Clean text
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-
-    # Split and filter
-    words = text.split()
-    keywords = []
-
-    # Stop words to skip
-    stop_words = {
-        'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'been',
-        'were', 'they', 'their', 'what', 'when', 'where', 'which', 'would',
-        'could', 'should', 'there', 'these', 'those', 'then', 'than', 'them',
-        'also', 'into', 'over', 'such', 'about', 'some', 'only', 'very',
-        'just', 'more', 'most', 'other', 'after', 'before', 'being', 'does'
-    }
-
-    for word in words:
-        if len(word) >= min_length and word not in stop_words:
-            keywords.append(word)
-
-    return keywords
+    if min_length == BRIDGE_KEYWORDS.min_length:
+        return BRIDGE_KEYWORDS.tokens(text)
+    return KeywordExtractor(ALNUM_PATTERN, min_length, BRIDGE_STOP_WORDS).tokens(text)
 
 
 class KnowledgeBridge:
@@ -143,6 +142,7 @@ class KnowledgeBridge:
             if limit:
                 files = files[:limit]
 
+            rows = []
             for atom_file in files:
                 try:
                     with open(atom_file) as f:
@@ -159,21 +159,19 @@ class KnowledgeBridge:
                     ]
                     full_text = ' '.join(str(p) for p in text_parts)
 
-                    keywords = extract_keywords(full_text)
-
-                    # Store keywords
-                    cursor = self.conn.cursor()
-                    for kw in set(keywords):
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO atom_keywords (atom_id, keyword, frequency)
-                            VALUES (?, ?, ?)
-                        ''', (atom_id, kw, keywords.count(kw)))
+                    counts = BRIDGE_KEYWORDS.counts(full_text)
+                    rows.extend((atom_id, kw, n) for kw, n in counts.items())
 
                     indexed += 1
 
                 except Exception as e:
                     continue
 
+            # Store keywords
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO atom_keywords (atom_id, keyword, frequency)
+                VALUES (?, ?, ?)
+            ''', rows)
             self.conn.commit()
 
         print(f"[BRIDGE] Indexed {indexed} atoms")
@@ -196,31 +194,24 @@ class KnowledgeBridge:
 
             cursor.execute('SELECT id, task, action, result, context FROM episodes')
 
-            bridge_cursor = self.conn.cursor()
-
-            for row in cursor.fetchall():
-                episode_id = row['id']
-
-                # Combine text fields
-                text_parts = [
-                    row['task'] or '',
-                    row['action'] or '',
-                    row['result'] or '',
-                    row['context'] or ''
-                ]
-                full_text = ' '.join(text_parts)
-
-                keywords = extract_keywords(full_text)
+            episodes = cursor.fetchall()
 
-                # Store keywords
-                for kw in set(keywords):
-                    bridge_cursor.execute('''
-                        INSERT OR REPLACE INTO episode_keywords (episode_id, keyword, frequency)
-                        VALUES (?, ?, ?)
-                    ''', (episode_id, kw, keywords.count(kw)))
+            # Combine text fields
+            texts = [
+                ' '.join([row['task'] or '', row['action'] or '', row['result'] or '', row['context'] or ''])
+                for row in episodes
+            ]
 
+            rows = []
+            for row, counts in zip(episodes, BRIDGE_KEYWORDS.counts_many(texts)):
+                rows.extend((row['id'], kw, n) for kw, n in counts.items())
                 indexed += 1
 
+            # Store keywords
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO episode_keywords (episode_id, keyword, frequency)
+                VALUES (?, ?, ?)
+            ''', rows)
             self.conn.commit()
             mem_conn.close()
 
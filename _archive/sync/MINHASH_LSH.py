@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+MINHASH LSH - Near-duplicate candidates without comparing every pair
+====================================================================
+
+A MinHash signature is a short, fixed-length summary of a shingle set:
+two sets agree on any one signature slot with probability equal to their
+Jaccard similarity. LSH cuts each signature into bands and buckets every
+band, so only sets that share a whole band ever become a candidate pair -
+finding candidates costs O(n) bucket inserts instead of O(n²) comparisons.
+
+Signatures use one-permutation hashing: every shingle is hashed once
+(crc32, so signatures match across processes and runs), the hash range is
+cut into NUM_PERM bins and each bin keeps its smallest hash. Hashing and the
+per-bin minimums run in C (map + sorted + bisect); bins a short text leaves
+empty are filled from the next non-empty bin (rotation densification).
+
+Used by ATOM_MERGE_TOOL and ATOM_FINGERPRINTS.
+"""
+
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NUM_PERM = 120
+BANDS = 20                        # 20 bands x 6 rows
+ROWS = NUM_PERM // BANDS
+# With 20 x 6 a pair becomes a candidate with probability 1-(1-J^6)^20:
+# ~50% at Jaccard 0.6, ~88% at 0.68, ~99.8% at 0.8, under 0.2% below 0.2
+
+SIGNATURE_TYPE = 'I'              # slots are 32-bit values
+SIGNATURE_MASK = 0xFFFFFFFF
+_HASH_SPACE = 1 << 32
+_BOUNDS = [(_HASH_SPACE * j) // NUM_PERM for j in range(NUM_PERM + 1)]
+_ROTATION = 0x9E3779B1            # offset added per bin borrowed across
+
+
+def minhash_signature(shingles: Iterable[str]) -> Optional[array]:
+    """NUM_PERM-slot MinHash signature of a shingle set (None if empty)"""
+    hashes = sorted(set(map(zlib.crc32, map(str.encode, shingles))))
+    if not hashes:
+        return None
+
+    count = len(hashes)
+    slots = [None] * NUM_PERM
+    for j in range(NUM_PERM):
+        i = bisect_left(hashes, _BOUNDS[j])
+        if i < count and hashes[i] < _BOUNDS[j + 1]:
+            slots[j] = hashes[i]
+
+    # Densify: an empty bin takes the next filled bin's value, offset by distance
+    for j in range(NUM_PERM):
+        if slots[j] is None:
+            distance = 1
+            while slots[(j + distance) % NUM_PERM] is None:
+                distance += 1
+            slots[j] = (slots[(j + distance) % NUM_PERM] + distance * _ROTATION) & SIGNATURE_MASK
+    return array(SIGNATURE_TYPE, slots)
+
+
+def estimated_similarity(sig1: array, sig2: array) -> float:
+    """Jaccard similarity estimated from two signatures"""
+    return sum(map(int.__eq__, sig1, sig2)) / NUM_PERM
+
+
+class LSHIndex:
+    """
+    Band buckets over MinHash signatures. Keys only collide with keys added
+    under the same group (e.g. atom type).
+    """
+
+    def __init__(self, bands: int = BANDS):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.buckets: List[Dict[int, List]] = [defaultdict(list) for _ in range(bands)]
+
+    def _band_hashes(self, signature, group):
+        rows = self.rows
+        for b in range(self.bands):
+            yield b, hash((group, tuple(signature[b * rows:(b + 1) * rows])))
+
+    def add(self, key, signature: array, group=None):
+        for b, h in self._band_hashes(signature, group):
+            self.buckets[b][h].append(key)
+
+    def query(self, signature: array, group=None) -> Set:
+        """Keys sharing at least one band with the signature"""
+        found = set()
+        for b, h in self._band_hashes(signature, group):
+            found.update(self.buckets[b].get(h, ()))
+        return found
+
+    def candidate_pairs(self) -> Set[Tuple]:
+        """Every pair of keys that share a bucket, each pair once as (smaller, larger)"""
+        pairs = set()
+        for band in self.buckets:
+            for keys in band.values():
+                if len(keys) > 1:
+                    keys = sorted(keys)
+                    for i, k1 in enumerate(keys):
+                        for k2 in keys[i + 1:]:
+                            pairs.add((k1, k2))
+        return pairs
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+SIMILARITY INDEX - FTS5 shadow indexes for "find similar" lookups
+=================================================================
+
+The memory systems used to find similar episodes/atoms with chains of
+LOWER(col) LIKE '%keyword%' - a full table scan per keyword. A
+SimilarityIndex keeps an FTS5 shadow table over one text column instead,
+and matches each keyword as a case-insensitive word prefix ("null" still
+finds "nullable"), so a lookup only reads the postings of its keywords.
+
+This is a behaviour change from the LIKE scans: a keyword no longer matches
+inside a word ("config" finds "configure" but not "reconfigure"), and
+keywords shorter than MIN_PREFIX_LENGTH match whole words only. Databases
+without FTS5 keep the old substring matching.
+
+Rows matching every keyword are tried first; the broader any-keyword
+query only runs when that finds fewer rows than asked for, so common words
+don't force bm25 to score a large share of the table.
+
+The shadow table is kept in sync by triggers, so every writer (including
+other scripts on the same database) keeps it current:
+- BEFORE INSERT notes the rowid of a row with the same key in a small
+  <fts>_replaced table. It cannot drop that row's entry itself: the insert
+  may still be ignored (INSERT OR IGNORE), and REPLACE does not fire DELETE
+  triggers
+- AFTER INSERT only runs for a row that was really written; it drops the
+  entries of noted rows that are gone (replaced) and indexes the new row
+- AFTER DELETE / AFTER UPDATE OF <column> mirror the change
+
+ensure() also re-indexes rows missing from the shadow table, which repairs
+indexes written by older versions whose BEFORE INSERT trigger dropped the
+entry of a row that INSERT OR IGNORE then left in place.
+
+Results are ranked by bm25 blended with a per-table quality score
+(q_value, success * q_value, importance, ...).
+
+Used by CYCLOTRON_MEMORY, CYCLOTRON_MEMORY_CACHED, FAST_HUB and DATA_CHUNKER.
+"""
+
+import sqlite3
+from typing import Dict, List
+
+# Weight of text match vs stored quality in the blended similarity score
+TEXT_WEIGHT = 0.6
+QUALITY_WEIGHT = 0.4
+
+# Best text matches considered before blending in quality
+CANDIDATES = 200
+
+# Shorter keywords are matched as whole words, not prefixes
+MIN_PREFIX_LENGTH = 3
+
+class SimilarityIndex:
+    """FTS5 shadow index over table.column, ranked by bm25 and quality"""
+
+    def __init__(self, table: str, column: str, key: str = 'id',
+                 quality: str = '0', tiebreak: str = None):
+        self.table = table
+        self.column = column
+        self.key = key
+        self.quality = quality
+        self.order = f"similarity DESC, {tiebreak}" if tiebreak else "similarity DESC"
+        self.fts = f"{table}_{column}_fts"
+        self.available = None
+
+    def ensure(self, conn) -> bool:
+        """
+        Create the shadow table and its triggers if missing, indexing any
+        existing rows. Returns False if this SQLite has no FTS5, in which
+        case find() falls back to LIKE scans.
+        """
+        t, col, key, fts = self.table, self.column, self.key, self.fts
+        replaced = f"{fts}_replaced"
+        tables = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)", (fts, replaced)
+        )}
+        if tables == {fts, replaced}:
+            self.available = True
+            return True
+
+        try:
+            with conn:
+                if fts not in tables:
+                    conn.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({col}, tokenize='unicode61 remove_diacritics 2')")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {replaced} (old_rowid INTEGER PRIMARY KEY)")
+                conn.execute(f"DROP TRIGGER IF EXISTS {fts}_bi")
+                conn.execute(f"DROP TRIGGER IF EXISTS {fts}_ai")
+                conn.execute(f'''
+                    CREATE TRIGGER {fts}_bi BEFORE INSERT ON {t} BEGIN
+                        INSERT OR IGNORE INTO {replaced}(old_rowid) SELECT rowid FROM {t} WHERE {key} = new.{key};
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER {fts}_ai AFTER INSERT ON {t} BEGIN
+                        DELETE FROM {fts} WHERE rowid IN (
+                            SELECT old_rowid FROM {replaced} r
+                            WHERE NOT EXISTS (SELECT 1 FROM {t} WHERE rowid = r.old_rowid)
+                        );
+                        DELETE FROM {fts} WHERE rowid = new.rowid;
+                        DELETE FROM {replaced};
+                        INSERT INTO {fts}(rowid, {col}) VALUES (new.rowid, new.{col});
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {t} BEGIN
+                        DELETE FROM {fts} WHERE rowid = old.rowid;
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col} ON {t} BEGIN
+                        DELETE FROM {fts} WHERE rowid = old.rowid;
+                        INSERT INTO {fts}(rowid, {col}) VALUES (new.rowid, new.{col});
+                    END
+                ''')
+                conn.execute(f"DELETE FROM {fts} WHERE rowid NOT IN (SELECT rowid FROM {t})")
+                conn.execute(f'''
+                    INSERT INTO {fts}(rowid, {col})
+                    SELECT rowid, {col} FROM {t} WHERE rowid NOT IN (SELECT rowid FROM {fts})
+                ''')
+        except sqlite3.OperationalError as e:
+            print(f"[SIMILARITY] No FTS5 index for {t}.{col} ({e}) - using LIKE scans")
+            self.available = False
+            return False
+        self.available = True
+        return True
+
+    def find(self, conn, terms: List[str], limit: int = 5) -> List[Dict]:
+        """
+        Rows whose column contains the terms (case-insensitive), best first.
+        With FTS5 a term matches the start of a word, not text inside a word.
+        Each row gains relevance_score (its quality) and similarity.
+        """
+        terms = [term.lower() for term in terms if any(ch.isalnum() for ch in term)]
+        if not terms:
+            return []
+
+        if self.available is None:
+            self.ensure(conn)
+        if not self.available:
+            return self._find_like(conn, terms, limit)
+
+        phrases = [
+            '"' + term.replace('"', '""') + ('"*' if len(term) >= MIN_PREFIX_LENGTH else '"')
+            for term in dict.fromkeys(terms)
+        ]
+        rows = self._find_fts(conn, ' AND '.join(phrases), limit)
+        if len(rows) < limit and len(phrases) > 1:
+            rows = self._find_fts(conn, ' OR '.join(phrases), limit)
+        return rows
+
+    def _find_fts(self, conn, match: str, limit: int) -> List[Dict]:
+        cursor = conn.execute(f'''
+            WITH hits AS (
+                SELECT rowid, bm25({self.fts}) AS text_score
+                FROM {self.fts}
+                WHERE {self.fts} MATCH ?
+                ORDER BY text_score
+                LIMIT ?
+            )
+            SELECT t.*,
+                   {self.quality} AS relevance_score,
+                   ? * (-hits.text_score / (1.0 - hits.text_score)) + ? * ({self.quality}) AS similarity
+            FROM hits
+            JOIN {self.table} t ON t.rowid = hits.rowid
+            ORDER BY {self.order}
+            LIMIT ?
+        ''', (match, max(CANDIDATES, limit), TEXT_WEIGHT, QUALITY_WEIGHT, limit))
+        return [self._to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def _find_like(self, conn, terms: List[str], limit: int) -> List[Dict]:
+        """The old full-scan substring query, for SQLite builds without FTS5"""
+        conditions = " OR ".join(f"LOWER({self.column}) LIKE ?" for _ in terms)
+        cursor = conn.execute(f'''
+            SELECT *,
+                   {self.quality} AS relevance_score,
+                   {self.quality} AS similarity
+            FROM {self.table}
+            WHERE {conditions}
+            ORDER BY {self.order}
+            LIMIT ?
+        ''', [f"%{term}%" for term in terms] + [limit])
+        return [self._to_dict(cursor, row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _to_dict(cursor, row) -> Dict:
+        if isinstance(row, sqlite3.Row):
+            return dict(row)
+        return {d[0]: value for d, value in zip(cursor.description, row)}
@@ -1,8 +1,6 @@
 
-import os
-import hashlib
 import json
-from datetime import datetime
+import sys
 from pathlib import Path
 
 # --- CONFIGURATION ---
@@ -10,23 +8,21 @@ from pathlib import Path
 SCAN_DIRECTORY = Path("D:/Breathing_App_Essentials/business_plan/businessesplan/")
 # The official destination for the output file.
 OUTPUT_FILE = Path("E:/dev-tools/projects/business-plan/output/document_index.json")
+# Write one compact document per line instead of a pretty-printed dump.
+STREAMING_OUTPUT = False
+# Keep every indexed document version in a content-addressed store here
+# (None to only record hashes).
+BLOB_STORE_DIR = None
 
-def hash_file(filepath: Path) -> str:
-    """Calculates the SHA-256 hash of a file's content."""
-    h = hashlib.sha256()
-    with open(filepath, 'rb') as f:
-        while True:
-            # Read in 4K chunks
-            chunk = f.read(4096)
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from crypto_ralph import indexer, jsonstream
+from crypto_ralph.blobstore import BlobStore
 
 def create_document_index():
     """
-    Scans the SCAN_DIRECTORY, hashes each markdown file, and saves the
-    results to a JSON file in the OUTPUT_FILE location.
+    Scans the SCAN_DIRECTORY (recursively), hashes each new or changed
+    markdown file, and saves the results to a JSON file in the OUTPUT_FILE
+    location. Hashes of files unchanged since the previous OUTPUT_FILE are reused.
     This script is the first implementation step of User Story US-001.
     """
     print(f"--- Crypto-Ralph: US-001 Indexer ---")
@@ -36,48 +32,24 @@ def create_document_index():
         print(f"FATAL ERROR: Scan directory not found at the specified location.")
         return
 
-    documents = []
-    total_files = 0
+    store = BlobStore(BLOB_STORE_DIR) if BLOB_STORE_DIR else None
+    index_data = indexer.create_document_index(SCAN_DIRECTORY, previous_index=OUTPUT_FILE, store=store)
+    metadata = index_data['metadata']
 
-    for file_path in SCAN_DIRECTORY.glob("*.md"):
-        if file_path.is_file():
-            total_files += 1
-            print(f"  -> Indexing: {file_path.name}")
-            try:
-                file_hash = hash_file(file_path)
-                stat = file_path.stat()
-                document = {
-                    'filename': file_path.name,
-                    'path': str(file_path),
-                    'size_bytes': stat.st_size,
-                    'modified_utc': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'sha256_hash': file_hash
-                }
-                documents.append(document)
-            except Exception as e:
-                print(f"    ERROR: Could not process file {file_path.name}: {e}")
+    print(f"\nScan complete. Indexed {metadata['total_documents_indexed']} files "
+          f"({metadata['documents_rehashed']} new or changed).")
+    print(f"Merkle Root: {indexer.index_merkle_tree(index_data).root}")
+    if store is not None:
+        print(f"Snapshot: {metadata['snapshot']} (stored in {BLOB_STORE_DIR})")
 
-    # Sort documents alphabetically by filename for consistency
-    documents.sort(key=lambda x: x['filename'])
-
-    index_data = {
-        'metadata': {
-            'index_creation_utc': datetime.utcnow().isoformat(),
-            'scan_directory': str(SCAN_DIRECTORY),
-            'total_documents_indexed': len(documents),
-            'version': "1.0.0",
-            'description': "Cryptographically verified index of all business plan documents."
-        },
-        'documents': documents
-    }
-
-    print(f"\nScan complete. Indexed {len(documents)} out of {total_files} files.")
-    
     # Ensure the output directory exists
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=4)
+    if STREAMING_OUTPUT:
+        jsonstream.write_document_index(OUTPUT_FILE, index_data['metadata'], index_data['documents'])
+    else:
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index_data, f, indent=4)
 
     print(f"\n[SUCCESS] Cryptographic index saved to: {OUTPUT_FILE}")
 
@@ -1,6 +1,6 @@
 
 import json
-import hashlib
+import sys
 from pathlib import Path
 import time
 from datetime import datetime
@@ -9,49 +9,32 @@ from datetime import datetime
 PROJECT_DIR = Path("E:/dev-tools/projects/business-plan/")
 INDEX_FILE = PROJECT_DIR / "output/document_index.json"
 OUTPUT_FILE = PROJECT_DIR / "output/merkle_tree.json"
+# Packed tree levels kept between runs so only changed leaves are re-hashed.
+STATE_FILE = PROJECT_DIR / "output/merkle_tree.bin"
+# Stream compact JSON and leave the tree levels in STATE_FILE instead of
+# pretty-printing every level as hex strings.
+STREAMING_OUTPUT = False
 
-def hash_pair(hash1: str, hash2: str) -> str:
-    """Hashes a concatenated pair of two SHA-256 hashes."""
-    # Ensure consistent order for hashing
-    if hash1 > hash2:
-        hash1, hash2 = hash2, hash1
-    combined = hash1 + hash2
-    return hashlib.sha256(combined.encode()).hexdigest()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from crypto_ralph import jsonstream
+from crypto_ralph.merkletree import MerkleTree
 
-def build_merkle_tree(hash_list: list) -> (str, dict):
+def load_merkle_tree(document_hashes: list) -> MerkleTree:
     """
-    Constructs a Merkle Tree from a list of hashes and returns the root hash
-    and the full tree structure.
+    Restores the previous run's tree and brings it up to date with the
+    current document hashes, or builds it from scratch if there is no state.
     """
-    if not hash_list:
-        return None, {}
+    if STATE_FILE.exists():
+        try:
+            tree = MerkleTree.load(STATE_FILE)
+            print(f"Loaded Merkle state with {len(tree)} leaves. Syncing changes...")
+            tree.sync(document_hashes)
+            return tree
+        except ValueError as e:
+            print(f"WARNING: Ignoring unreadable Merkle state: {e}")
 
     print("Building Merkle Tree...")
-    
-    # The initial layer of leaves
-    tree = {'leaves': hash_list}
-    nodes = list(hash_list)
-    level = 0
-
-    while len(nodes) > 1:
-        # If there's an odd number of nodes, duplicate the last one
-        if len(nodes) % 2 != 0:
-            nodes.append(nodes[-1])
-        
-        next_level_nodes = []
-        for i in range(0, len(nodes), 2):
-            new_hash = hash_pair(nodes[i], nodes[i+1])
-            next_level_nodes.append(new_hash)
-            print(f"  -> L{level}: Hashing pair to create {new_hash[:10]}...")
-        
-        nodes = next_level_nodes
-        tree[f'level_{level+1}'] = nodes
-        level += 1
-    
-    merkle_root = nodes[0]
-    tree['root'] = merkle_root
-    print(f"  -> Merkle Root Found: {merkle_root}")
-    return merkle_root, tree
+    return MerkleTree(document_hashes)
 
 def run_merkle_generator():
     """
@@ -77,26 +60,37 @@ def run_merkle_generator():
         print(f"Found {len(document_hashes)} document hashes to process.")
 
         start_time = time.time()
-        merkle_root, full_tree = build_merkle_tree(document_hashes)
+        tree = load_merkle_tree(document_hashes)
+        merkle_root = tree.root
         end_time = time.time()
+        print(f"  -> Merkle Root Found: {merkle_root}")
 
-        result = {
-            'metadata': {
-                'generation_utc': datetime.utcnow().isoformat(),
-                'source_index_file': str(INDEX_FILE),
-                'total_leaves': len(document_hashes),
-                'tree_height': len(full_tree) - 2, # leaves, root, and levels
-                'generation_time_seconds': round(end_time - start_time, 4)
-            },
-            'merkle_root': merkle_root,
-            'tree': full_tree
+        metadata = {
+            'generation_utc': datetime.utcnow().isoformat(),
+            'source_index_file': str(INDEX_FILE),
+            'total_leaves': len(document_hashes),
+            'tree_height': len(tree.levels) - 1,
+            'generation_time_seconds': round(end_time - start_time, 4)
         }
-        
+        # The blob store snapshot holding the exact documents behind this root.
+        if 'snapshot' in index_data.get('metadata', {}):
+            metadata['document_snapshot'] = index_data['metadata']['snapshot']
+
         # Save the full tree and root hash to our output file
         OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=4)
-        
+        if STREAMING_OUTPUT:
+            # The state file doubles as the binary sidecar for the levels.
+            jsonstream.write_merkle_tree(OUTPUT_FILE, tree, metadata, sidecar=STATE_FILE)
+        else:
+            tree.save(STATE_FILE)
+            result = {
+                'metadata': metadata,
+                'merkle_root': merkle_root,
+                'tree': tree.to_dict()
+            }
+            with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=4)
+
         print(f"\\n[SUCCESS] Merkle Tree generated. Root hash and full tree saved to: {OUTPUT_FILE}")
 
     except Exception as e:
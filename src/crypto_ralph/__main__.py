@@ -0,0 +1,7 @@
+# src/crypto_ralph/__main__.py
+# Allows the package to be run as `python -m crypto_ralph <command>`.
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -1,41 +1,91 @@
 
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Callable
 
 # Import our newly refactored modules
 from .blockchain import Blockchain
 from .merkletree import build_merkle_tree
+from .prd import PRDStore
 
 class CryptoRalphAgent:
     """
     The main autonomous agent for the Crypto-Ralph project.
     This class orchestrates the entire workflow, from reading the PRD
     to executing tasks and updating the blockchain.
+
+    Completed stories are marked passed in memory only. With persist_prd the
+    agent also writes PRD.json back, for completions produced by a registered
+    task handler; simulated completions are never saved.
     """
-    def __init__(self, project_dir: str | Path):
+    def __init__(self, project_dir: str | Path, persist_prd: bool = False):
         self.project_dir = Path(project_dir)
+        self.persist_prd = persist_prd
         self.prd_file = self.project_dir / "PRD.json"
-        
+
         if not self.prd_file.exists():
             raise FileNotFoundError(f"PRD.json not found in {self.project_dir}")
-            
-        with open(self.prd_file, 'r', encoding='utf-8') as f:
-            self.prd = json.load(f)
-        
-        self.blockchain = Blockchain(self.project_dir, self.prd.get('consensus_rules', {}))
+
+        self.prd_store = PRDStore(self.prd_file)
+        self.blockchain = Blockchain(self.project_dir, self.prd_store.consensus_rules)
+        self.task_handlers = {}
+
+    @property
+    def prd(self) -> dict:
+        """The parsed PRD, re-read only when PRD.json changes on disk."""
+        return self.prd_store.prd
 
     def get_next_task(self) -> dict | None:
         """Finds the next user story to execute based on priority and status."""
-        user_stories = self.prd.get('userStories', [])
-        pending_stories = [story for story in user_stories if not story.get('passes', False)]
-        
-        if not pending_stories:
-            return None
-            
-        # Sort by priority to find the next task
-        pending_stories.sort(key=lambda x: x.get('priority', float('inf')))
-        return pending_stories[0]
+        return self.prd_store.next_task()
+
+    def register_task_handler(self, story_id: str, handler: Callable[[dict], dict]):
+        """Registers the function that carries out a story and returns its completion data."""
+        self.task_handlers[story_id] = handler
+
+    def execute_task(self, task: dict, simulate: bool = False) -> dict:
+        """
+        Runs the handler registered for a story and returns its completion data.
+
+        A story without a handler raises LookupError, unless simulate is set,
+        in which case the placeholder US-003 completion is returned.
+        """
+        handler = self.task_handlers.get(task['id'])
+        if handler is not None:
+            return handler(task)
+        if not simulate:
+            raise LookupError(f"No task handler registered for {task['id']}")
+
+        # No handler registered: simulate the completion of US-003.
+        # For US-003, the "work" is the refactoring we just did.
+        return {
+            "task": task['title'],
+            "description": "Refactored procedural scripts into a modular Python package.",
+            "modules_created": [
+                "src/crypto_ralph/blockchain.py",
+                "src/crypto_ralph/merkletree.py",
+                "src/crypto_ralph/agent.py"
+            ]
+        }
+
+    def record_completion(self, task: dict, completion_data: dict, persist: bool = False) -> dict:
+        """
+        Mines the proof for a finished story, appends its block and marks it
+        passed. PRD.json is only rewritten when persist is True.
+        """
+        proof = self.blockchain.mine_proof(task['id'], completion_data)
+        self.blockchain.add_block(task['id'], proof, completion_data)
+        self.prd_store.mark_passed(task['id'], proof['hash'])
+        if persist:
+            self.prd_store.save()
+        return proof
+
+    def _persists(self, task: dict) -> bool:
+        """Whether a completion of this story is saved to PRD.json."""
+        return self.persist_prd and task['id'] in self.task_handlers
 
     def run_main_loop(self):
         """Executes one full cycle of the Mandala Protocol."""
@@ -53,28 +103,75 @@ class CryptoRalphAgent:
         print(f"Next Task: {next_task['id']} - {next_task['title']}")
 
         # 3. & 4. Expand & Act (Execute the task)
-        # This is where the specific logic for each user story will go.
-        # For now, we will just simulate the completion of US-003.
         print(f"Executing logic for {next_task['id']}...")
-        
-        # In a real run, we would call specific functions based on the task ID.
-        # For US-003, the "work" is the refactoring we just did.
-        completion_data = {
-            "task": next_task['title'],
-            "description": "Refactored procedural scripts into a modular Python package.",
-            "modules_created": [
-                "src/crypto_ralph/blockchain.py",
-                "src/crypto_ralph/merkletree.py",
-                "src/crypto_ralph/agent.py"
-            ]
-        }
-        
+        completion_data = self.execute_task(next_task, simulate=True)
+
         # 5. Record (Mine the proof and update ledger)
-        proof = self.blockchain.mine_proof(next_task['id'], completion_data)
-        self.blockchain.add_block(next_task['id'], proof, completion_data)
+        self.record_completion(next_task, completion_data, persist=self._persists(next_task))
 
         print("\\n--- Cycle Complete ---")
 
+    def run_continuous(self, max_tasks: int | None = None, workers: int = 4) -> int:
+        """
+        Executes pending stories back to back until none are left.
+
+        Up to `workers` stories are executed ahead on a thread pool while the
+        main thread mines the proof for the oldest finished one, so proof-of-work
+        overlaps with task execution. Proofs are mined and blocks appended in
+        the order the stories were claimed, which keeps the chain strictly
+        ordered (each proof depends on the previous block's hash).
+
+        Only stories with a registered task handler are run; the others are
+        reported and left pending, never recorded with simulated data.
+
+        Args:
+            max_tasks: Stop after this many stories. None runs until the PRD is done.
+            workers: Number of stories executed concurrently.
+
+        Returns:
+            The number of blocks added.
+        """
+        print("--- Crypto-Ralph Agent: Starting Continuous Mandala Protocol ---")
+        print(f"Current State: Last block is {self.blockchain.chain[-1].get('index')}")
+
+        in_flight = deque()
+        started = completed = 0
+        unfinished = []  # claimed stories to hand back to the queue afterwards
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # Keep the execution stage full while the miner works.
+                while len(in_flight) < workers and (max_tasks is None or started < max_tasks):
+                    task = self.prd_store.claim_next()
+                    if task is None:
+                        break
+                    if task['id'] not in self.task_handlers:
+                        print(f"  SKIP: {task['id']} has no task handler")
+                        unfinished.append(task['id'])
+                        continue
+                    print(f"Executing logic for {task['id']} - {task['title']}...")
+                    in_flight.append((task, pool.submit(self.execute_task, task)))
+                    started += 1
+
+                if not in_flight:
+                    break
+
+                task, future = in_flight.popleft()
+                try:
+                    completion_data = future.result()
+                except Exception as e:
+                    # The story stays pending in the PRD for a later run.
+                    print(f"  ERROR: {task['id']} failed and was skipped: {e}")
+                    unfinished.append(task['id'])
+                    continue
+
+                self.record_completion(task, completion_data, persist=self._persists(task))
+                completed += 1
+
+        for story_id in unfinished:
+            self.prd_store.release(story_id)
+        print(f"\\n--- Continuous Run Complete: {completed} blocks added ---")
+        return completed
+
 if __name__ == '__main__':
     # This allows us to run the agent directly for testing
     agent = CryptoRalphAgent(project_dir="E:/dev-tools/projects/business-plan/")
@@ -0,0 +1,268 @@
+# src/crypto_ralph/benchmarks.py
+# Benchmarks for the hashing, Merkle, ledger and indexer hot paths, with
+# regression tracking against a stored baseline.
+
+import argparse
+import contextlib
+import io
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from . import miner
+from .indexer import create_document_index
+from .ledger import GENESIS_HASH, Ledger
+from .merkletree import MerkleTree, build_merkle_tree, hash_pair
+from .verifier import verify_ledger
+
+# An unreachable difficulty, so every benchmark run scans its full nonce range.
+_NEVER = 64
+# A metric regresses when it is this much worse than the baseline.
+DEFAULT_TOLERANCE = 0.2
+# Timings are the best of this many runs, which filters out most scheduler noise.
+REPEAT = 3
+
+def _legacy_scan(story_id: str, last_hash: str, completion_data: dict, count: int):
+    """The original mine_proof loop: rebuild and re-hash the whole payload per nonce."""
+    prefix = '0' * _NEVER
+    for nonce in range(count):
+        data_to_hash = f"{story_id}{last_hash}{json.dumps(completion_data, sort_keys=True)}{nonce}"
+        if hashlib.sha256(data_to_hash.encode()).hexdigest().startswith(prefix):
+            break
+
+def _midstate_scan(story_id: str, last_hash: str, completion_data: dict, count: int):
+    """The current single-process mining backend."""
+    payload = f"{story_id}{last_hash}{json.dumps(completion_data, sort_keys=True)}".encode()
+    miner._scan_range(payload, '0' * _NEVER, 0, count)
+
+def _parallel_scan(pool: ProcessPoolExecutor, payload: bytes, count: int, chunks: int):
+    """Scans nonces [0, count) split into `chunks` ranges across an already running pool."""
+    prefix = '0' * _NEVER
+    step = -(-count // chunks)
+    futures = [pool.submit(miner._scan_range, payload, prefix, start, min(start + step, count))
+               for start in range(0, count, step)]
+    for future in futures:
+        future.result()
+
+def _timed(func, *args, repeat: int = 1) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _metric(value: float, unit: str, higher_is_better: bool) -> dict:
+    return {"value": float(f"{value:.6g}"), "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_hash_loop(payload_sizes: tuple[int, ...] = (0, 1024, 16384), count: int = 200000) -> list[dict]:
+    """
+    Compares single-core hashes per second of the legacy loop and the
+    midstate backend for completion_data payloads of increasing size.
+    """
+    results = []
+    for size in payload_sizes:
+        completion_data = {
+            "task": "Benchmark",
+            "modules_created": ["src/crypto_ralph/blockchain.py"] * (size // 32)
+        }
+        row = {"payload_bytes": len(json.dumps(completion_data, sort_keys=True))}
+        for name, scan in (("legacy", _legacy_scan), ("midstate", _midstate_scan)):
+            elapsed = _timed(scan, "US-BENCH", "0" * 64, completion_data, count, repeat=REPEAT)
+            row[f"{name}_hashes_per_second"] = round(count / elapsed)
+        row["speedup"] = round(row["midstate_hashes_per_second"] / row["legacy_hashes_per_second"], 2)
+        results.append(row)
+    return results
+
+def bench_hashing(count: int = 200000) -> dict:
+    """Mining and pair-hashing throughput."""
+    metrics = {}
+    for row in bench_hash_loop(count=count):
+        metrics[f"mine.midstate_hps.payload_{row['payload_bytes']}"] = _metric(
+            row["midstate_hashes_per_second"], "hashes/s", True)
+
+    # A fixed nonce range over a warm pool, so neither pool startup nor how
+    # soon a proof turns up moves the rate.
+    workers = os.cpu_count() or 1
+    payload = f"US-BENCH{'0' * 64}{json.dumps({'task': 'Benchmark'}, sort_keys=True)}".encode()
+    hashes = count * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        _parallel_scan(pool, payload, workers, workers)
+        elapsed = _timed(_parallel_scan, pool, payload, hashes, workers * 4, repeat=REPEAT)
+    metrics["mine.parallel_hps"] = _metric(hashes / elapsed, "hashes/s", True)
+
+    left, right = hashlib.sha256(b'a').hexdigest(), hashlib.sha256(b'b').hexdigest()
+    pairs = count // 4
+    elapsed = _timed(lambda: [hash_pair(left, right) for _ in range(pairs)], repeat=REPEAT)
+    metrics["merkle.hash_pair_per_second"] = _metric(pairs / elapsed, "pairs/s", True)
+    return metrics
+
+def bench_merkle(leaf_counts: tuple[int, ...] = (1000, 10000, 100000)) -> dict:
+    """Merkle build time versus leaf count, plus single-leaf update cost."""
+    metrics = {}
+    for count in leaf_counts:
+        leaves = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(count)]
+        metrics[f"merkle.build_seconds.legacy.{count}"] = _metric(
+            _timed(build_merkle_tree, leaves, repeat=REPEAT), "s", False)
+        metrics[f"merkle.build_seconds.incremental.{count}"] = _metric(
+            _timed(MerkleTree, leaves, repeat=REPEAT), "s", False)
+        tree = MerkleTree(leaves)
+        updates = 1000
+        elapsed = _timed(lambda: [tree.update(i * 7919 % count, leaves[i % count]) for i in range(updates)],
+                         repeat=REPEAT)
+        metrics[f"merkle.update_seconds.{count}"] = _metric(elapsed / updates, "s", False)
+    return metrics
+
+def _write_ledger(log_file: Path, block_count: int) -> Ledger:
+    ledger = Ledger(log_file)
+    previous_hash = GENESIS_HASH
+    with ledger.batch(4096):
+        for index in range(1, block_count + 1):
+            completion_data = {"task": f"Benchmark {index}"}
+            proof = miner.mine(f"US-{index}", previous_hash, completion_data, 1, workers=1)
+            ledger.append({
+                "index": index,
+                "story_id": f"US-{index}",
+                "timestamp": datetime.now().isoformat(),
+                "previous_hash": previous_hash,
+                "proof": proof,
+                "completion_data": completion_data,
+                "hash": proof['hash']
+            })
+            previous_hash = proof['hash']
+    return ledger
+
+def bench_ledger(block_counts: tuple[int, ...] = (1000, 10000, 50000)) -> dict:
+    """Ledger open, random fetch and full verification time versus block count."""
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in block_counts:
+            log_file = Path(tmp) / f"ledger_{count}.jsonl"
+            _write_ledger(log_file, count)
+            metrics[f"ledger.load_seconds.{count}"] = _metric(_timed(Ledger, log_file, repeat=REPEAT), "s", False)
+            ledger = Ledger(log_file)
+            fetches = 1000
+            elapsed = _timed(lambda: [ledger.get(1 + i * 7919 % count) for i in range(fetches)], repeat=REPEAT)
+            metrics[f"ledger.get_seconds.{count}"] = _metric(elapsed / fetches, "s", False)
+            metrics[f"ledger.verify_seconds.{count}"] = _metric(
+                _timed(verify_ledger, ledger, None, 1, repeat=REPEAT), "s", False)
+    return metrics
+
+def bench_indexer(corpus_sizes: tuple[int, ...] = (100, 1000, 5000), doc_bytes: int = 4096) -> dict:
+    """Cold and warm (nothing changed) indexing throughput versus corpus size."""
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in corpus_sizes:
+            corpus = Path(tmp) / f"corpus_{size}"
+            for i in range(size):
+                folder = corpus / f"part_{i % 10}"
+                folder.mkdir(parents=True, exist_ok=True)
+                (folder / f"doc_{i}.md").write_bytes(hashlib.sha256(str(i).encode()).digest() * (doc_bytes // 32))
+            index_file = Path(tmp) / f"index_{size}.json"
+
+            # The indexer reports every file it hashes; keep that out of the timings.
+            with contextlib.redirect_stdout(io.StringIO()):
+                cold = _timed(create_document_index, corpus, repeat=REPEAT)
+                index_file.write_text(json.dumps(create_document_index(corpus)), encoding='utf-8')
+                warm = _timed(create_document_index, corpus, index_file, repeat=REPEAT)
+
+            metrics[f"indexer.cold_docs_per_second.{size}"] = _metric(size / cold, "docs/s", True)
+            metrics[f"indexer.warm_docs_per_second.{size}"] = _metric(size / warm, "docs/s", True)
+    return metrics
+
+def run_suite(quick: bool = False) -> dict:
+    """Runs every benchmark and returns a machine-readable results dict."""
+    if quick:
+        sections = [
+            bench_hashing(count=50000),
+            bench_merkle((1000, 10000)),
+            bench_ledger((1000,)),
+            bench_indexer((100,)),
+        ]
+    else:
+        sections = [bench_hashing(), bench_merkle(), bench_ledger(), bench_indexer()]
+
+    metrics = {}
+    for section in sections:
+        metrics.update(section)
+    return {
+        "created_utc": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "metrics": metrics
+    }
+
+def find_regressions(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """
+    Compares results to a baseline. A metric regresses when it is more than
+    `tolerance` (as a fraction) worse than its baseline value. Metrics missing
+    from either side are ignored.
+    """
+    regressions = []
+    for name, metric in results["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = -change if metric["higher_is_better"] else change
+        if worse > tolerance:
+            regressions.append({
+                "metric": name,
+                "baseline": base["value"],
+                "current": metric["value"],
+                "unit": metric["unit"],
+                "change_percent": round(change * 100, 1)
+            })
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Crypto-Ralph benchmark suite.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a metric is flagged (fraction, default 0.2)")
+    parser.add_argument("--quick", action="store_true", help="Run smaller workloads")
+    parser.add_argument("--hash-loop", action="store_true", help="Only compare the legacy and midstate mining loops")
+    args = parser.parse_args(argv)
+
+    if args.hash_loop:
+        print(f"{'payload':>10} {'legacy H/s':>14} {'midstate H/s':>14} {'speedup':>8}")
+        for row in bench_hash_loop():
+            print(f"{row['payload_bytes']:>10} {row['legacy_hashes_per_second']:>14,} "
+                  f"{row['midstate_hashes_per_second']:>14,} {row['speedup']:>7}x")
+        return 0
+
+    results = run_suite(quick=args.quick)
+    for name, metric in sorted(results["metrics"].items()):
+        print(f"  {name:<45} {metric['value']:>16,.6g} {metric['unit']}")
+
+    baseline_file = Path(args.baseline)
+    regressions = []
+    if baseline_file.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_file.read_text(encoding='utf-8'))
+        regressions = find_regressions(results, baseline, args.tolerance)
+        results["baseline"] = str(baseline_file)
+    results["regressions"] = regressions
+
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"\nResults saved to: {args.output}")
+    if args.save_baseline:
+        baseline_file.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"Baseline saved to: {baseline_file}")
+
+    for regression in regressions:
+        print(f"  REGRESSION: {regression['metric']} {regression['baseline']:,.6g} -> "
+              f"{regression['current']:,.6g} {regression['unit']} ({regression['change_percent']:+}%)")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# src/crypto_ralph/blobstore.py
+# Content-addressed store for document versions, keyed by SHA-256.
+
+import bisect
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Every stored object starts with one byte naming how the rest is compressed.
+_CODEC_TAGS = {"zlib": b'z', "zstd": b's'}
+DEFAULT_CODEC = "zstd" if zstandard else "zlib"
+
+READ_CHUNK_SIZE = 1 << 20
+# Pack index: header (magic, version, object count) followed by fixed-width
+# (digest, offset, length) records sorted by digest.
+_PACK_MAGIC = b'BPAK'
+_INDEX_MAGIC = b'BIDX'
+_PACK_VERSION = 1
+_INDEX_HEADER = struct.Struct('<4sBQ')
+_INDEX_RECORD = struct.Struct('<32sQQ')
+
+class _Compressor:
+    def __init__(self, codec: str):
+        if codec not in _CODEC_TAGS:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd compression requires the 'zstandard' package")
+            self._obj = zstandard.ZstdCompressor().compressobj()
+        else:
+            self._obj = zlib.compressobj(6)
+        self.tag = _CODEC_TAGS[codec]
+
+    def compress(self, data) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+def _decompress(stored: bytes) -> bytes:
+    tag, body = stored[:1], stored[1:]
+    if tag == _CODEC_TAGS["zlib"]:
+        return zlib.decompress(body)
+    if tag == _CODEC_TAGS["zstd"]:
+        if zstandard is None:
+            raise RuntimeError("Reading this object requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError(f"Unknown object encoding {tag!r}")
+
+class _PackIndex:
+    """
+    Read-only view of a pack's .idx file. Behaves as a sorted sequence of
+    digests so lookups are a bisect over the on-disk records.
+    """
+    def __init__(self, index_file: Path):
+        self.data = index_file.read_bytes()
+        magic, version, count = _INDEX_HEADER.unpack_from(self.data)
+        if magic != _INDEX_MAGIC or version != _PACK_VERSION:
+            raise ValueError(f"Not a blob pack index: {index_file}")
+        self.count = count
+        self.pack_file = index_file.with_suffix('.pack')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = _INDEX_HEADER.size + position * _INDEX_RECORD.size
+        return self.data[start:start + 32]
+
+    def find(self, digest: bytes) -> tuple[int, int] | None:
+        """Returns (offset, length) of the object in the pack, or None."""
+        position = bisect.bisect_left(self, digest)
+        if position == self.count or self[position] != digest:
+            return None
+        _, offset, length = _INDEX_RECORD.unpack_from(self.data, _INDEX_HEADER.size + position * _INDEX_RECORD.size)
+        return offset, length
+
+class BlobStore:
+    """
+    Deduplicating, compressed object store keyed by the SHA-256 of each
+    object's content -- the same hash the indexer records per document.
+
+    New objects are written loose, one file per object under
+    objects/<first two hex digits>/<rest>. pack() folds the loose objects
+    into a single packfile with a sorted index, so a large store does not
+    need one file per document version. Because every document version is
+    stored under its hash, any Merkle root or ledger entry built from index
+    hashes can be resolved back to the exact content it covered.
+
+    Snapshots record a whole index (relative path -> hash) as one more
+    object, so a single hash identifies a historical version of a document
+    tree without copying it.
+    """
+    def __init__(self, root: str | Path, codec: str = DEFAULT_CODEC):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.packs_dir = self.root / "packs"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.packs_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        _Compressor(codec)  # Fail early on an unusable codec.
+        self._packs = []
+        self._load_packs()
+
+    def _load_packs(self):
+        # Newest packs first; a digest is only ever stored once, so order
+        # only affects how quickly it is found.
+        index_files = sorted(self.packs_dir.glob("pack-*.idx"), reverse=True)
+        self._packs = [_PackIndex(index_file) for index_file in index_files]
+
+    def _loose_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _find_packed(self, digest: str) -> tuple[_PackIndex, int, int] | None:
+        raw = bytes.fromhex(digest)
+        for pack in self._packs:
+            location = pack.find(raw)
+            if location:
+                return pack, *location
+        return None
+
+    def __contains__(self, digest: str) -> bool:
+        return self._loose_path(digest).exists() or self._find_packed(digest) is not None
+
+    def put(self, data: bytes) -> str:
+        """Stores data and returns its SHA-256. Storing known content is a no-op."""
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self:
+            return digest
+        compressor = _Compressor(self.codec)
+        self._write_loose(digest, [compressor.tag, compressor.compress(data), compressor.flush()])
+        return digest
+
+    def put_file(self, filepath: str | Path) -> str:
+        """
+        Streams a file into the store, hashing and compressing it in one pass,
+        and returns its SHA-256.
+        """
+        h = hashlib.sha256()
+        compressor = _Compressor(self.codec)
+        tmp_file = self._incoming_path()
+        with open(filepath, 'rb') as src, open(tmp_file, 'wb') as dst:
+            dst.write(compressor.tag)
+            while True:
+                chunk = src.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+                dst.write(compressor.compress(chunk))
+            dst.write(compressor.flush())
+        digest = h.hexdigest()
+        if digest in self:
+            tmp_file.unlink()
+        else:
+            self._commit_loose(tmp_file, digest)
+        return digest
+
+    def _incoming_path(self) -> Path:
+        # One scratch file per writing thread, so concurrent ingestion is safe.
+        return self.objects_dir / f"incoming-{os.getpid()}-{threading.get_ident()}.tmp"
+
+    def _write_loose(self, digest: str, parts: list[bytes]):
+        tmp_file = self._incoming_path()
+        with open(tmp_file, 'wb') as f:
+            for part in parts:
+                f.write(part)
+        self._commit_loose(tmp_file, digest)
+
+    def _commit_loose(self, tmp_file: Path, digest: str):
+        path = self._loose_path(digest)
+        path.parent.mkdir(exist_ok=True)
+        os.replace(tmp_file, path)
+
+    def _read_stored(self, digest: str) -> bytes:
+        try:
+            return self._loose_path(digest).read_bytes()
+        except FileNotFoundError:
+            pass
+        found = self._find_packed(digest)
+        if found is None:
+            raise KeyError(digest)
+        pack, offset, length = found
+        with open(pack.pack_file, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def get(self, digest: str, verify: bool = True) -> bytes:
+        """Returns the content stored under digest. Raises KeyError if it is unknown."""
+        data = _decompress(self._read_stored(digest))
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Stored object {digest} is corrupt")
+        return data
+
+    def restore_file(self, digest: str, target: str | Path):
+        """Writes the content stored under digest to target."""
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(self.get(digest))
+
+    def loose_objects(self) -> list[str]:
+        """Digests of all objects not yet packed."""
+        digests = []
+        for folder in self.objects_dir.iterdir():
+            if folder.is_dir() and len(folder.name) == 2:
+                digests.extend(folder.name + path.name for path in folder.iterdir())
+        return digests
+
+    def pack(self) -> Path | None:
+        """
+        Moves every loose object into a new packfile. Returns the pack's path,
+        or None if there was nothing to pack.
+        """
+        digests = sorted(self.loose_objects())
+        if not digests:
+            return None
+
+        pack_number = len(list(self.packs_dir.glob("pack-*.idx"))) + 1
+        pack_file = self.packs_dir / f"pack-{pack_number:06d}.pack"
+        index_file = pack_file.with_suffix('.idx')
+        records = []
+        with open(pack_file, 'wb') as f:
+            f.write(_PACK_MAGIC + bytes([_PACK_VERSION]))
+            for digest in digests:
+                stored = self._loose_path(digest).read_bytes()
+                records.append(_INDEX_RECORD.pack(bytes.fromhex(digest), f.tell(), len(stored)))
+                f.write(stored)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # The index is written last, so a pack only becomes visible once complete.
+        tmp_file = index_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _PACK_VERSION, len(records)))
+            f.write(b''.join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, index_file)
+
+        self._load_packs()
+        for digest in digests:
+            self._loose_path(digest).unlink()
+        return pack_file
+
+    def snapshot(self, files: dict[str, str]) -> str:
+        """
+        Records a document tree (relative path -> content hash) and returns
+        the hash identifying it. Every referenced object must already be stored.
+        """
+        missing = [path for path, digest in files.items() if digest not in self]
+        if missing:
+            raise KeyError(f"Snapshot references {len(missing)} unstored documents, e.g. {missing[0]}")
+        manifest = {"type": "snapshot", "files": dict(sorted(files.items()))}
+        return self.put(json.dumps(manifest, sort_keys=True, separators=(',', ':')).encode())
+
+    def read_snapshot(self, snapshot_hash: str) -> dict[str, str]:
+        """Returns the relative path -> content hash map recorded by a snapshot."""
+        manifest = json.loads(self.get(snapshot_hash))
+        if manifest.get("type") != "snapshot":
+            raise ValueError(f"{snapshot_hash} is not a snapshot")
+        return manifest["files"]
+
+    def restore_snapshot(self, snapshot_hash: str, target_dir: str | Path) -> int:
+        """Recreates a snapshot's document tree under target_dir. Returns the file count."""
+        files = self.read_snapshot(snapshot_hash)
+        for relative_path, digest in files.items():
+            self.restore_file(digest, Path(target_dir) / relative_path)
+        return len(files)
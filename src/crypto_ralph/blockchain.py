@@ -1,9 +1,10 @@
 
-import json
-import hashlib
 from datetime import datetime
 from pathlib import Path
-import time
+
+from . import miner, verifier
+from .difficulty import DifficultyController
+from .ledger import GENESIS_HASH, Ledger, format_block_text, format_text_header
 
 class Blockchain:
     """
@@ -12,37 +13,60 @@ class Blockchain:
     """
     def __init__(self, project_dir: Path, consensus_rules: dict):
         self.project_dir = project_dir
-        self.ledger_file = self.project_dir / "progress.txt"
+        self.ledger_file = self.project_dir / "ledger.jsonl"
+        self.text_ledger_file = self.project_dir / "progress.txt"
         self.rules = consensus_rules
+        self.difficulty = DifficultyController(consensus_rules)
         self.chain = self._load_ledger()
 
-    def _load_ledger(self) -> list:
-        """Loads the blockchain from the progress.txt file."""
-        if not self.ledger_file.exists():
-            # If no ledger, create and return the Genesis block
-            genesis_block = self._create_genesis_block()
-            self._save_ledger_append(genesis_block, is_genesis=True)
-            return [genesis_block]
-        
-        # This is a simplified parser for now, focusing on getting the last state
-        chain = []
-        with open(self.ledger_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Find the last block's hash and index
-            last_hash = "0" * 64
-            last_index = -1
-            for line in reversed(content.splitlines()):
-                if "Block Hash:" in line:
-                    last_hash = line.split("Block Hash:", 1)[1].strip()
-                if line.startswith("Block "):
-                    try:
-                        last_index = int(line.split(":", 1)[0].replace("Block ", ""))
-                        placeholder_block = {"hash": last_hash, "index": last_index}
-                        chain.append(placeholder_block)
-                        break
-                    except (ValueError, IndexError):
-                        continue
-        return chain if chain else [self._create_genesis_block()]
+    def _load_ledger(self) -> Ledger:
+        """
+        Opens the structured ledger, importing progress.txt on first use.
+
+        Only the offset index is consulted on startup, so the cost of loading
+        does not grow with the number of blocks.
+        """
+        if self.ledger_file.exists():
+            return Ledger(self.ledger_file, on_commit=self._save_ledger_append)
+
+        if self.text_ledger_file.exists():
+            print(f"Importing {self.text_ledger_file} into {self.ledger_file}...")
+            ledger = Ledger.import_text(self.text_ledger_file, self.ledger_file)
+            if len(ledger):
+                ledger.on_commit = self._save_ledger_append
+                return ledger
+        else:
+            ledger = Ledger(self.ledger_file)
+
+        # If no ledger, start the chain with the Genesis block
+        genesis_block = self._create_genesis_block()
+        self._save_ledger_append([genesis_block], is_genesis=True)
+        ledger.append(genesis_block)
+        ledger.on_commit = self._save_ledger_append
+        return ledger
+
+    def batch(self, group_size: int = 1024):
+        """
+        Groups the blocks added inside a `with` block into commits of up to
+        group_size blocks, each with a single fsync.
+        """
+        return self.chain.batch(group_size)
+
+    def export_text(self, text_file: Path | None = None):
+        """Regenerates the human-readable progress.txt export from the ledger."""
+        self.chain.export_text(text_file or self.text_ledger_file)
+
+    def verify(self, full: bool = False, workers: int | None = None) -> dict:
+        """
+        Re-checks every proof and hash link in the ledger.
+
+        Only blocks added since the last successful run are verified unless
+        full is True. See verifier.verify_ledger for the report format.
+        """
+        return verifier.verify_ledger(self.chain, self.project_dir / verifier.CHECKPOINT_FILENAME,
+                                      default_difficulty=self.rules.get('difficulty', 2),
+                                      workers=workers, full=full,
+                                      min_difficulty=self.difficulty.min_difficulty)
 
     def get_last_hash(self) -> str:
         """Gets the hash of the most recent block in the chain."""
@@ -57,39 +81,42 @@ class Blockchain:
             "story_id": "GENESIS",
             "timestamp": datetime.now().isoformat(),
             "previous_hash": "0" * 64,
-            "proof": {"nonce": 0, "hash": "0000" + "1" * 60},
+            "proof": {"nonce": 0, "hash": GENESIS_HASH},
             "completion_data": "System Initialized",
-            "hash": "0000" + "1" * 60
+            "hash": GENESIS_HASH
         }
 
     def mine_proof(self, story_id: str, completion_data: dict) -> dict:
-        """Mines a proof-of-work for a completed task."""
-        last_hash = self.get_last_hash()
-        difficulty = self.rules.get('difficulty', 2)
-        prefix = '0' * difficulty
-        nonce = 0
-        start_time = time.time()
+        """
+        Mines a proof-of-work for a completed task across all CPU cores.
 
-        print(f"\\nMining Proof for {story_id} with difficulty {difficulty}...")
+        With 'adaptive_difficulty' set in the consensus rules the difficulty is
+        retargeted from recent mining times; otherwise the fixed 'difficulty'
+        is used. A run that exceeds 'max_proof_time' is abandoned and retried
+        one step easier, down to the controller's minimum.
+        """
+        last_hash = self.get_last_hash()
+        if self.rules.get('adaptive_difficulty'):
+            difficulty = self.difficulty.next_difficulty(self.chain)
+        else:
+            difficulty = self.rules.get('difficulty', 2)
 
         while True:
-            data_to_hash = f"{story_id}{last_hash}{json.dumps(completion_data, sort_keys=True)}{nonce}"
-            hash_result = hashlib.sha256(data_to_hash.encode()).hexdigest()
-
-            if hash_result.startswith(prefix):
-                end_time = time.time()
-                proof = {
-                    "nonce": nonce,
-                    "hash": hash_result,
-                    "difficulty": difficulty,
-                    "mining_time_seconds": round(end_time - start_time, 2)
-                }
-                print(f"  -> Proof Found! Hash: {hash_result[:12]}... (Nonce: {nonce}) in {proof['mining_time_seconds']}s")
-                return proof
-            
-            nonce += 1
-            if nonce % 250000 == 0:
-                print(f"  -> Still mining... (Nonce: {nonce})")
+            print(f"\\nMining Proof for {story_id} with difficulty {difficulty}...")
+            try:
+                proof = miner.mine(story_id, last_hash, completion_data, difficulty,
+                                   workers=self.rules.get('mining_workers'),
+                                   timeout=self.difficulty.max_proof_time)
+                break
+            except miner.MiningTimeout as e:
+                if difficulty <= self.difficulty.min_difficulty:
+                    raise
+                print(f"  -> {e}. Retrying at difficulty {difficulty - 1}...")
+                difficulty -= 1
+
+        print(f"  -> Proof Found! Hash: {proof['hash'][:12]}... (Nonce: {proof['nonce']}) "
+              f"in {proof['mining_time_seconds']}s at {proof['hash_rate']:,} H/s")
+        return proof
 
     def add_block(self, story_id: str, proof: dict, completion_data: dict):
         """Adds a new, verified block to the blockchain."""
@@ -104,22 +131,12 @@ class Blockchain:
             "hash": proof['hash']
         }
         self.chain.append(new_block)
-        self._save_ledger_append(new_block)
         print(f"\\n[SUCCESS] Block {new_block['index']} for {story_id} added to {self.ledger_file}")
 
-    def _save_ledger_append(self, block: dict, is_genesis: bool = False):
-        """Appends a block to the progress.txt file."""
+    def _save_ledger_append(self, blocks: list[dict], is_genesis: bool = False):
+        """Appends committed blocks to the human-readable progress.txt export."""
         mode = 'w' if is_genesis else 'a'
-        with open(self.ledger_file, mode, encoding='utf-8') as f:
+        with open(self.text_ledger_file, mode, encoding='utf-8') as f:
             if is_genesis:
-                f.write("# Crypto-Ralph Blockchain Ledger\\n")
-                f.write(f"# Initialized: {datetime.now().isoformat()}\\n")
-                f.write("="*60 + "\\n\\n")
-
-            f.write(f"Block {block['index']}: {block['story_id']}\\n")
-            f.write(f"  Timestamp: {block['timestamp']}\\n")
-            f.write(f"  Previous Hash: {block['previous_hash']}\\n")
-            f.write(f"  Proof: {json.dumps(block['proof'])}\\n")
-            f.write(f"  Data: {json.dumps(block['completion_data'])}\\n")
-            f.write(f"  Block Hash: {block['hash']}\\n")
-            f.write("-" * 60 + "\\n")
+                f.write(format_text_header())
+            f.write(''.join(format_block_text(block) for block in blocks))
@@ -0,0 +1,68 @@
+import math
+
+from .ledger import Ledger
+
+class DifficultyController:
+    """
+    Retargets proof-of-work difficulty from measured mining performance.
+
+    Reads the proofs of the last few blocks, estimates the hash rate they
+    were mined at, and picks the highest difficulty whose expected solve
+    time (16 ** difficulty hashes) fits the target block time. Each retarget
+    moves at most one step, since one step is already a 16x change in work.
+
+    Recognised consensus_rules keys:
+        difficulty: Starting difficulty when there is no history (default 2).
+        target_block_time: Desired seconds per proof (default 10).
+        retarget_window: Number of recent blocks to measure (default 10).
+        min_difficulty / max_difficulty: Bounds (default 1 and 8).
+        max_proof_time: Seconds before a mining run is abandoned and retried
+            one step easier (default: no limit).
+    """
+    def __init__(self, consensus_rules: dict):
+        self.base_difficulty = consensus_rules.get('difficulty', 2)
+        self.target_block_time = consensus_rules.get('target_block_time', 10)
+        self.window = consensus_rules.get('retarget_window', 10)
+        self.min_difficulty = consensus_rules.get('min_difficulty', 1)
+        self.max_difficulty = consensus_rules.get('max_difficulty', 8)
+        self.max_proof_time = consensus_rules.get('max_proof_time')
+
+    def recent_proofs(self, ledger: Ledger) -> list[dict]:
+        """Proofs of up to `window` most recent mined blocks, newest first."""
+        proofs = []
+        for position in range(len(ledger) - 1, max(len(ledger) - 1 - self.window, -1), -1):
+            block = ledger[position]
+            proof = block.get('proof') or {}
+            if block.get('story_id') != "GENESIS" and 'mining_time_seconds' in proof:
+                proofs.append(proof)
+        return proofs
+
+    def next_difficulty(self, ledger: Ledger) -> int:
+        """Returns the difficulty the next proof should be mined at."""
+        proofs = self.recent_proofs(ledger)
+        if not proofs:
+            return self.clamp(self.base_difficulty)
+
+        current = proofs[0].get('difficulty', self.base_difficulty)
+        hash_rate = self.estimate_hash_rate(proofs)
+        if hash_rate is None:
+            # Every recent proof was too fast to time: there is room to grow.
+            target = current + 1
+        else:
+            target = math.floor(math.log(max(self.target_block_time * hash_rate, 1), 16))
+        return self.clamp(max(current - 1, min(current + 1, target)))
+
+    def estimate_hash_rate(self, proofs: list[dict]) -> float | None:
+        """Average hashes per second over the given proofs, or None if none were timed."""
+        hashes = seconds = 0
+        for proof in proofs:
+            elapsed = proof.get('mining_time_seconds') or 0
+            if elapsed <= 0:
+                continue
+            # Older proofs only record the nonce; the serial miner tried nonce + 1 hashes.
+            hashes += proof.get('hash_rate', 0) * elapsed or proof.get('nonce', 0) + 1
+            seconds += elapsed
+        return hashes / seconds if seconds else None
+
+    def clamp(self, difficulty: int) -> int:
+        return max(self.min_difficulty, min(self.max_difficulty, difficulty))
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from .blobstore import BlobStore
+from .merkletree import MerkleTree
+
+# Files are hashed in 1 MiB reads; anything larger than MMAP_THRESHOLD is
+# mapped instead so the whole file is fed to hashlib in a single call.
+READ_CHUNK_SIZE = 1 << 20
+MMAP_THRESHOLD = 8 << 20
+INDEX_VERSION = "1.1.0"
+
+def hash_file(filepath: str | Path) -> str:
+    """Calculates the SHA-256 hash of a file's content."""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                h.update(mapped)
+        else:
+            buffer = bytearray(READ_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                h.update(view[:read])
+    return h.hexdigest()
+
+def walk_documents(scan_dir: str | Path, suffix: str = ".md"):
+    """Yields (relative path, DirEntry) for every matching file under scan_dir, recursively."""
+    pending = [(str(scan_dir), "")]
+    while pending:
+        directory, relative = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = f"{relative}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, f"{name}/"))
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    yield name, entry
+
+def load_previous_documents(index_file: str | Path) -> dict[str, dict]:
+    """Returns the documents of an earlier index keyed by path, or {} if there is none."""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            documents = json.load(f).get('documents', [])
+    except (OSError, ValueError):
+        return {}
+    return {doc['path']: doc for doc in documents}
+
+def create_document_index(scan_dir: str | Path, previous_index: str | Path | None = None,
+                          suffix: str = ".md", workers: int | None = None,
+                          store: BlobStore | None = None) -> dict:
+    """
+    Indexes every matching document under scan_dir.
+
+    Documents whose size and modification time match the previous index keep
+    their recorded hash; only new or changed files are read, and those are
+    hashed concurrently on a thread pool (hashlib releases the GIL for large
+    buffers).
+
+    When a blob store is given, every new or changed document is ingested
+    into it while being hashed, and the index records the hash of a store
+    snapshot of the whole tree under metadata['snapshot'].
+
+    Args:
+        scan_dir: Root directory to walk.
+        previous_index: An earlier document_index.json to reuse hashes from.
+        suffix: File extension to index.
+        workers: Hashing threads. Defaults to the ThreadPoolExecutor default.
+        store: Blob store to keep document contents in, if any.
+
+    Returns:
+        The index dict, in the same layout as document_index.json.
+    """
+    scan_dir = Path(scan_dir)
+    previous = load_previous_documents(previous_index) if previous_index else {}
+
+    documents = []
+    to_hash = []
+    for relative_path, entry in walk_documents(scan_dir, suffix):
+        stat = entry.stat()
+        document = {
+            'filename': entry.name,
+            'relative_path': relative_path,
+            'path': entry.path,
+            'size_bytes': stat.st_size,
+            'modified_utc': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            'sha256_hash': None
+        }
+        known = previous.get(entry.path)
+        if (known and known['size_bytes'] == stat.st_size and known['modified_utc'] == document['modified_utc']
+                and (store is None or known['sha256_hash'] in store)):
+            document['sha256_hash'] = known['sha256_hash']
+        else:
+            to_hash.append(document)
+        documents.append(document)
+
+    if to_hash:
+        ingest = hash_file if store is None else store.put_file
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(document, pool.submit(ingest, document['path'])) for document in to_hash]
+            for document, future in futures:
+                try:
+                    document['sha256_hash'] = future.result()
+                    print(f"  -> Indexed: {document['relative_path']}")
+                except OSError as e:
+                    print(f"    ERROR: Could not process file {document['relative_path']}: {e}")
+
+    documents = [doc for doc in documents if doc['sha256_hash'] is not None]
+    # Sort documents by their path under scan_dir for consistency
+    documents.sort(key=lambda x: x['relative_path'])
+
+    metadata = {
+        'index_creation_utc': datetime.utcnow().isoformat(),
+        'scan_directory': str(scan_dir),
+        'total_documents_indexed': len(documents),
+        'documents_rehashed': len(to_hash),
+        'version': INDEX_VERSION,
+        'description': "Cryptographically verified index of all business plan documents."
+    }
+    if store is not None:
+        metadata['snapshot'] = store.snapshot({doc['relative_path']: doc['sha256_hash'] for doc in documents})
+
+    return {
+        'metadata': metadata,
+        'documents': documents
+    }
+
+def leaf_hashes(index_data: dict) -> list[str]:
+    """The Merkle leaves for an index: one document hash per entry, in index order."""
+    return [doc['sha256_hash'] for doc in index_data.get('documents', [])]
+
+def index_merkle_tree(index_data: dict, tree: MerkleTree | None = None) -> MerkleTree:
+    """
+    Feeds an index's leaves into a Merkle tree, updating an existing tree in
+    place when one is given.
+    """
+    if tree is None:
+        return MerkleTree(leaf_hashes(index_data))
+    tree.sync(leaf_hashes(index_data))
+    return tree
@@ -0,0 +1,74 @@
+# src/crypto_ralph/jsonstream.py
+# Streaming writers for the document index and Merkle tree outputs.
+
+import json
+import os
+from pathlib import Path
+
+from .merkletree import MerkleTree
+
+_COMPACT = (',', ':')
+
+def _open_atomic(path: Path):
+    """Opens a temporary sibling of path; commit with os.replace once complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path.with_name(path.name + '.tmp'), 'w', encoding='utf-8')
+
+def _write_array(f, items):
+    """Writes an iterable as a JSON array, one compact element per line."""
+    f.write('[')
+    separator = '\n'
+    for item in items:
+        f.write(separator)
+        f.write(json.dumps(item, separators=_COMPACT))
+        separator = ',\n'
+    f.write('\n]')
+
+def write_document_index(path: str | Path, metadata: dict, documents):
+    """
+    Streams a document index to disk in the document_index.json layout.
+
+    Documents may be any iterable (e.g. a generator) and are encoded one at a
+    time, so no encoded copy of the whole index is ever held in memory.
+    """
+    path = Path(path)
+    with _open_atomic(path) as f:
+        f.write('{"metadata":')
+        f.write(json.dumps(metadata, separators=_COMPACT))
+        f.write(',\n"documents":')
+        _write_array(f, documents)
+        f.write('}\n')
+    os.replace(f.name, path)
+
+def write_merkle_tree(path: str | Path, tree: MerkleTree, metadata: dict, sidecar: str | Path | None = None):
+    """
+    Streams a Merkle tree to disk in the merkle_tree.json layout.
+
+    Levels are hex-encoded node by node straight from the tree's packed
+    arrays. With a sidecar path, the levels go to that binary state file
+    (32 bytes per node, loadable with MerkleTree.load) and the JSON keeps only
+    the metadata, the root and the sidecar's file name.
+    """
+    path = Path(path)
+    with _open_atomic(path) as f:
+        f.write('{"metadata":')
+        f.write(json.dumps(metadata, separators=_COMPACT))
+        f.write(',\n"merkle_root":')
+        f.write(json.dumps(tree.root))
+        if sidecar is not None:
+            sidecar = Path(sidecar)
+            tree.save(sidecar)
+            f.write(',\n"tree_levels_file":')
+            f.write(json.dumps(sidecar.name))
+            f.write(',\n"tree":{"root":')
+        else:
+            f.write(',\n"tree":{')
+            for name, nodes in tree.iter_levels() if len(tree) else ():
+                f.write(json.dumps(name))
+                f.write(':')
+                _write_array(f, nodes)
+                f.write(',\n')
+            f.write('"root":')
+        f.write(json.dumps(tree.root))
+        f.write('}}\n')
+    os.replace(f.name, path)
@@ -0,0 +1,365 @@
+import bisect
+import itertools
+import json
+import os
+import re
+import struct
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# Hash of the Genesis block every chain starts from.
+GENESIS_HASH = "0000" + "1" * 60
+
+# One index record per block: (block index, byte offset of its line in the log).
+_RECORD = struct.Struct('<qQ')
+
+# Older writers emitted a literal backslash-n instead of a newline between the
+# lines of a block. Only treat it as a line break where a ledger line follows.
+_ESCAPED_NEWLINE = re.compile(r'\\n(?=Block \d+: |  [A-Z][A-Za-z ]*: |-{10}|#|\\n|$)')
+_BLOCK_HEADER = re.compile(r'^Block (\d+): (.*)$')
+_TEXT_FIELDS = {
+    "Timestamp": "timestamp",
+    "Previous Hash": "previous_hash",
+    "Proof": "proof",
+    "Data": "completion_data",
+    "Block Hash": "hash",
+}
+_JSON_FIELDS = {"proof", "completion_data"}
+
+def format_text_header() -> str:
+    """Returns the banner that starts a human-readable progress.txt ledger."""
+    return (
+        "# Crypto-Ralph Blockchain Ledger\n"
+        f"# Initialized: {datetime.now().isoformat()}\n"
+        + "=" * 60 + "\n\n"
+    )
+
+def format_block_text(block: dict) -> str:
+    """Renders one block in the human-readable progress.txt format."""
+    return (
+        f"Block {block['index']}: {block['story_id']}\n"
+        f"  Timestamp: {block['timestamp']}\n"
+        f"  Previous Hash: {block['previous_hash']}\n"
+        f"  Proof: {json.dumps(block['proof'])}\n"
+        f"  Data: {json.dumps(block['completion_data'])}\n"
+        f"  Block Hash: {block['hash']}\n"
+        + "-" * 60 + "\n"
+    )
+
+def parse_ledger_text(text: str) -> list[dict]:
+    """
+    Parses a progress.txt ledger back into block dicts.
+
+    Tolerates the escaped newlines and misplaced separators written by
+    earlier versions of the ledger writer.
+    """
+    blocks = []
+    current = None
+    for line in _ESCAPED_NEWLINE.sub('\n', text).splitlines():
+        header = _BLOCK_HEADER.match(line)
+        if header:
+            current = {"index": int(header.group(1)), "story_id": header.group(2).strip()}
+            blocks.append(current)
+            continue
+        if current is None or ':' not in line or not line.startswith('  '):
+            continue
+        label, value = line.strip().split(':', 1)
+        key = _TEXT_FIELDS.get(label)
+        if key is None:
+            continue
+        value = value.strip()
+        current[key] = json.loads(value) if key in _JSON_FIELDS else value
+    return blocks
+
+class Ledger:
+    """
+    Append-only JSON Lines block log with a sidecar offset index.
+
+    Every block is one line of ledger.jsonl. The .idx sidecar holds a
+    fixed-width (block index, byte offset) record per block, so the tip is a
+    single seek from the end, block k is a binary search over the records,
+    and opening the ledger never reads the log itself.
+
+    Appended blocks are buffered and committed in groups of group_size: each
+    group is one write and one fsync of the log, then of the index. Blocks
+    still in the buffer are visible through the ledger but not yet durable.
+
+    A read_only ledger never writes: it skips crash recovery and only sees the
+    blocks the index already covers, so status and verify runs cannot modify
+    the files they inspect. Without an index it scans the log once and keeps
+    the offsets of its complete lines in memory instead.
+    """
+    def __init__(self, log_file: Path, group_size: int = 1, on_commit: Callable[[list[dict]], None] | None = None,
+                 read_only: bool = False):
+        self.log_file = Path(log_file)
+        self.index_file = self.log_file.with_suffix('.idx')
+        self.group_size = group_size
+        self.on_commit = on_commit
+        self.read_only = read_only
+        self._pending = []
+        self._readable = None
+        self._offsets = None  # in-memory (index, offset) records of a read-only, unindexed log
+        if read_only:
+            if not self.index_file.exists():
+                self._offsets = self._scan_log()
+            self._readable = self._valid_records()
+        else:
+            self.log_file.touch(exist_ok=True)
+            self.recover()
+        self._tip = self._read_position(self._committed() - 1) if self._committed() else None
+
+    def __len__(self) -> int:
+        return self._committed() + len(self._pending)
+
+    def __getitem__(self, position: int) -> dict:
+        """Returns the block at a position in the log (negative positions allowed)."""
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError("ledger position out of range")
+        if position == count - 1 and self._tip is not None:
+            return self._tip
+        committed = self._committed()
+        if position >= committed:
+            return self._pending[position - committed]
+        return self._read_position(position)
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def tip(self) -> dict | None:
+        """Returns the most recent block, or None for an empty ledger."""
+        return self._tip
+
+    def get(self, block_index: int) -> dict | None:
+        """Fetches a block by its block index with a binary search of the index."""
+        for block in self._pending:
+            if block['index'] == block_index:
+                return block
+        if self._offsets is not None:
+            position = bisect.bisect_left(self._offsets, (block_index,))
+            if position < len(self._offsets) and self._offsets[position][0] == block_index:
+                return self._read_offset(self._offsets[position][1])
+            return None
+        with open(self.index_file, 'rb') as idx:
+            lo, hi = 0, self._committed()
+            while lo < hi:
+                mid = (lo + hi) // 2
+                idx.seek(mid * _RECORD.size)
+                index, offset = _RECORD.unpack(idx.read(_RECORD.size))
+                if index == block_index:
+                    return self._read_offset(offset)
+                if index < block_index:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return None
+
+    def iter_from(self, position: int = 0, raw: bool = False):
+        """
+        Streams committed blocks in chain order, starting at a log position.
+
+        With raw=True the undecoded JSON lines are yielded instead, so callers
+        can hand the parsing off to other processes.
+        """
+        if position >= self._committed():
+            return
+        offset = self._record(position)[1] if position else 0
+        remaining = self._committed() - position
+        with open(self.log_file, 'rb') as log:
+            log.seek(offset)
+            # Stop at the last indexed line; a read-only ledger may sit on an unrepaired tail
+            for line in itertools.islice(log, remaining):
+                yield line if raw else json.loads(line)
+
+    def append(self, block: dict):
+        """Appends a block, committing the buffered group once it is full."""
+        if self.read_only:
+            raise PermissionError(f"ledger {self.log_file} was opened read-only")
+        self._pending.append(block)
+        self._tip = block
+        if len(self._pending) >= self.group_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commits all buffered blocks as one group. Returns how many were written."""
+        blocks, self._pending = self._pending, []
+        if not blocks:
+            return 0
+
+        lines = [json.dumps(block, separators=(',', ':')).encode() + b'\n' for block in blocks]
+        with open(self.log_file, 'ab') as log:
+            offset = log.tell()
+            log.write(b''.join(lines))
+            log.flush()
+            os.fsync(log.fileno())
+
+        records = []
+        for block, line in zip(blocks, lines):
+            records.append(_RECORD.pack(block['index'], offset))
+            offset += len(line)
+        with open(self.index_file, 'ab') as idx:
+            idx.write(b''.join(records))
+            idx.flush()
+            os.fsync(idx.fileno())
+
+        if self.on_commit:
+            self.on_commit(blocks)
+        return len(blocks)
+
+    @contextmanager
+    def batch(self, group_size: int = 1024):
+        """Groups every append inside the block into commits of up to group_size blocks."""
+        previous, self.group_size = self.group_size, group_size
+        try:
+            yield self
+        finally:
+            self.group_size = previous
+            self.flush()
+
+    def recover(self) -> int:
+        """
+        Repairs the ledger after a crash and brings the index up to date.
+
+        A torn tail (a final line that is incomplete or not valid JSON) is
+        truncated from the log, index records that point past the end of the
+        log are dropped, and complete lines that never made it into the index
+        are indexed. Returns the number of log bytes truncated.
+        """
+        truncated = self._truncate_torn_tail()
+        if truncated:
+            print(f"  -> Ledger recovery: truncated {truncated} bytes of torn tail from {self.log_file}")
+        self._truncate_dangling_index()
+        self._catch_up_index()
+        return truncated
+
+    def export_text(self, text_file: Path):
+        """Writes the whole chain out in the human-readable progress.txt format."""
+        self.flush()
+        with open(text_file, 'w', encoding='utf-8') as f:
+            f.write(format_text_header())
+            for block in self:
+                f.write(format_block_text(block))
+
+    @classmethod
+    def import_text(cls, text_file: Path, log_file: Path) -> 'Ledger':
+        """Builds a structured ledger from an existing progress.txt."""
+        ledger = cls(log_file)
+        with ledger.batch():
+            for block in parse_ledger_text(Path(text_file).read_text(encoding='utf-8')):
+                ledger.append(block)
+        return ledger
+
+    def _committed(self) -> int:
+        if self._readable is not None:
+            return self._readable
+        return self.index_file.stat().st_size // _RECORD.size
+
+    def _record(self, position: int) -> tuple[int, int]:
+        if self._offsets is not None:
+            return self._offsets[position]
+        with open(self.index_file, 'rb') as idx:
+            idx.seek(position * _RECORD.size)
+            return _RECORD.unpack(idx.read(_RECORD.size))
+
+    def _read_position(self, position: int) -> dict:
+        return self._read_offset(self._record(position)[1])
+
+    def _read_offset(self, offset: int) -> dict:
+        with open(self.log_file, 'rb') as log:
+            log.seek(offset)
+            return json.loads(log.readline())
+
+    def _truncate_torn_tail(self) -> int:
+        size = self.log_file.stat().st_size
+        end = size
+        with open(self.log_file, 'r+b') as log:
+            while end:
+                log.seek(end - 1)
+                if log.read(1) != b'\n':
+                    # Partial final line: the write was cut off mid-block.
+                    end = self._line_start(log, end)
+                    continue
+                line_start = self._line_start(log, end - 1)
+                log.seek(line_start)
+                try:
+                    json.loads(log.read(end - line_start))
+                    break
+                except ValueError:
+                    end = line_start
+            if end != size:
+                log.truncate(end)
+                log.flush()
+                os.fsync(log.fileno())
+        return size - end
+
+    @staticmethod
+    def _line_start(log, end: int) -> int:
+        """Returns the offset just after the last newline before `end` (or 0)."""
+        position = end
+        while position > 0:
+            chunk_start = max(0, position - 4096)
+            log.seek(chunk_start)
+            chunk = log.read(position - chunk_start)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                return chunk_start + newline + 1
+            position = chunk_start
+        return 0
+
+    def _valid_records(self) -> int:
+        """Number of index records that point inside the log, without repairing anything."""
+        if self._offsets is not None:
+            return len(self._offsets)
+        size = self.index_file.stat().st_size if self.index_file.exists() else 0
+        count = size // _RECORD.size
+        log_size = self.log_file.stat().st_size if self.log_file.exists() else 0
+        while count and self._record(count - 1)[1] >= log_size:
+            count -= 1
+        return count
+
+    def _scan_log(self) -> list[tuple[int, int]]:
+        """(block index, offset) of every complete, parseable line, stopping at a torn tail."""
+        records = []
+        if not self.log_file.exists():
+            return records
+        offset = 0
+        with open(self.log_file, 'rb') as log:
+            for line in log:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    records.append((json.loads(line)['index'], offset))
+                except (ValueError, KeyError, TypeError):
+                    break
+                offset += len(line)
+        return records
+
+    def _truncate_dangling_index(self):
+        size = self.index_file.stat().st_size if self.index_file.exists() else 0
+        count = self._valid_records()
+        if count * _RECORD.size != size:
+            with open(self.index_file, 'r+b') as idx:
+                idx.truncate(count * _RECORD.size)
+
+    def _catch_up_index(self):
+        """Indexes any log lines written after the last index record (or all of them)."""
+        self.index_file.touch(exist_ok=True)
+        indexed = self._committed()
+        offset = 0
+        if indexed:
+            with open(self.log_file, 'rb') as log:
+                log.seek(self._record(indexed - 1)[1])
+                log.readline()
+                offset = log.tell()
+        if offset >= self.log_file.stat().st_size:
+            return
+
+        with open(self.log_file, 'rb') as log, open(self.index_file, 'ab') as idx:
+            log.seek(offset)
+            for line in log:
+                idx.write(_RECORD.pack(json.loads(line)['index'], offset))
+                offset += len(line)
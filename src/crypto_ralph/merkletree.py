@@ -1,6 +1,9 @@
 
 import hashlib
 import json
+import struct
+from binascii import hexlify
+from pathlib import Path
 
 def hash_pair(hash1: str, hash2: str) -> str:
     """
@@ -49,3 +52,301 @@ def build_merkle_tree(hash_list: list[str]) -> tuple[str | None, dict]:
     tree['root'] = merkle_root
     
     return merkle_root, tree
+
+DIGEST_SIZE = 32
+_STATE_HEADER = struct.Struct('<4sBQ')
+_STATE_MAGIC = b'MRKL'
+_STATE_VERSION = 1
+
+def _hash_pair_bytes(digest1: bytes, digest2: bytes) -> bytes:
+    """Binary counterpart of hash_pair: same sorted-pair rule, same result."""
+    # Hex encoding preserves byte order, so sorting raw digests matches
+    # sorting their hex strings.
+    if digest1 > digest2:
+        digest1, digest2 = digest2, digest1
+    return hashlib.sha256(hexlify(digest1) + hexlify(digest2)).digest()
+
+class MerkleTree:
+    """
+    Incrementally maintained Merkle tree over SHA-256 leaf hashes.
+
+    Every level is kept as one bytearray of packed 32-byte digests, and
+    append, update and remove only re-hash the path from the changed leaf to
+    the root. The root always equals build_merkle_tree(tree.leaves()).
+    """
+    def __init__(self, hash_list: list[str] | None = None):
+        self.levels = [bytearray()]
+        if hash_list:
+            self._build(b''.join(bytes.fromhex(h) for h in hash_list))
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // DIGEST_SIZE
+
+    @property
+    def root(self) -> str | None:
+        """The Merkle Root hash, or None for an empty tree."""
+        if not len(self):
+            return None
+        return self.levels[-1][:DIGEST_SIZE].hex()
+
+    def leaf(self, position: int) -> str:
+        return self._node(0, position).hex()
+
+    def leaves(self) -> list[str]:
+        return self._hex_level(0)
+
+    def append(self, leaf_hash: str):
+        """Adds a leaf at the end of the tree."""
+        self.levels[0] += bytes.fromhex(leaf_hash)
+        self._resize()
+        self._rehash_path(len(self) - 1)
+
+    def update(self, position: int, leaf_hash: str):
+        """Replaces the leaf at a position."""
+        if not 0 <= position < len(self):
+            raise IndexError("leaf position out of range")
+        self._set(0, position, bytes.fromhex(leaf_hash))
+        self._rehash_path(position)
+
+    def remove(self, position: int):
+        """
+        Removes the leaf at a position in O(log n) by moving the last leaf
+        into its place. Leaf order is therefore not preserved; use pop() to
+        drop the last leaf without reordering.
+        """
+        last = len(self) - 1
+        if not 0 <= position <= last:
+            raise IndexError("leaf position out of range")
+        if position != last:
+            self._set(0, position, self._node(0, last))
+        del self.levels[0][-DIGEST_SIZE:]
+        self._resize()
+        if position < last:
+            self._rehash_path(position)
+        if last:
+            self._rehash_path(last - 1)
+
+    def pop(self):
+        """Removes the last leaf."""
+        self.remove(len(self) - 1)
+
+    def sync(self, hash_list: list[str]):
+        """
+        Makes the leaves equal to hash_list, re-hashing only changed paths.
+
+        Falls back to a full rebuild when so many positions differ (e.g. a
+        leaf inserted near the front) that path updates would cost more.
+        """
+        count = len(self)
+        changed = [i for i in range(min(count, len(hash_list))) if self.leaf(i) != hash_list[i]]
+        height = max(len(self.levels), 1)
+        if (len(changed) + abs(len(hash_list) - count)) * height > len(hash_list):
+            self.levels = [bytearray()]
+            self._build(b''.join(bytes.fromhex(h) for h in hash_list))
+            return
+        for position in changed:
+            self.update(position, hash_list[position])
+        for leaf_hash in hash_list[count:]:
+            self.append(leaf_hash)
+        for _ in range(count - len(hash_list)):
+            self.pop()
+
+    def prove(self, leaf: int | str) -> dict:
+        """
+        Builds an inclusion proof (audit path) for a leaf.
+
+        Args:
+            leaf: The leaf's position, or its hash (first occurrence is used).
+
+        Returns:
+            A dict with the leaf hash, its position, the leaf count and the
+            sibling hashes from the leaf level up to just below the root.
+            Because hash_pair sorts each pair before hashing, siblings carry no
+            left/right flag; where a level has an odd node out, its sibling is
+            itself, exactly as build_merkle_tree pads it.
+        """
+        position = self.index(leaf) if isinstance(leaf, str) else leaf
+        if not 0 <= position < len(self):
+            raise IndexError("leaf position out of range")
+        path = []
+        node = position
+        for level in range(len(self.levels) - 1):
+            sibling = node ^ 1
+            if sibling * DIGEST_SIZE >= len(self.levels[level]):
+                sibling = node
+            path.append(self._node(level, sibling).hex())
+            node //= 2
+        return {
+            "leaf": self.leaf(position),
+            "position": position,
+            "leaf_count": len(self),
+            "path": path
+        }
+
+    def index(self, leaf_hash: str) -> int:
+        """Returns the position of the first leaf with the given hash."""
+        digest = bytes.fromhex(leaf_hash)
+        leaves = self.levels[0]
+        offset = leaves.find(digest)
+        while offset != -1:
+            if offset % DIGEST_SIZE == 0:
+                return offset // DIGEST_SIZE
+            offset = leaves.find(digest, offset + 1)
+        raise ValueError(f"{leaf_hash} is not a leaf of this tree")
+
+    def iter_levels(self):
+        """
+        Yields (name, hex node iterator) pairs in build_merkle_tree's layout,
+        'leaves' first, without materialising any level as a list.
+        """
+        yield 'leaves', self._iter_hex_level(0)
+        for level in range(1, len(self.levels)):
+            # build_merkle_tree records odd levels with their padding node
+            yield f'level_{level}', self._iter_hex_level(level, padded=True)
+
+    def to_dict(self) -> dict:
+        """Returns the tree in the same layout as build_merkle_tree."""
+        if not len(self):
+            return {}
+        tree = {name: list(nodes) for name, nodes in self.iter_levels()}
+        tree['root'] = self.root
+        return tree
+
+    def save(self, path: str | Path):
+        """Writes the packed levels to a binary state file."""
+        with open(path, 'wb') as f:
+            f.write(_STATE_HEADER.pack(_STATE_MAGIC, _STATE_VERSION, len(self)))
+            for level in self.levels:
+                f.write(level)
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'MerkleTree':
+        """Restores a tree written by save() without re-hashing anything."""
+        tree = cls()
+        with open(path, 'rb') as f:
+            magic, version, count = _STATE_HEADER.unpack(f.read(_STATE_HEADER.size))
+            if magic != _STATE_MAGIC or version != _STATE_VERSION:
+                raise ValueError(f"{path} is not a Merkle tree state file")
+            tree.levels = []
+            for size in _level_sizes(count):
+                level = bytearray(f.read(size * DIGEST_SIZE))
+                if len(level) != size * DIGEST_SIZE:
+                    raise ValueError(f"{path} is truncated")
+                tree.levels.append(level)
+        return tree
+
+    def _build(self, packed_leaves: bytes):
+        self.levels = [bytearray(packed_leaves)]
+        nodes = self.levels[0]
+        while len(nodes) > DIGEST_SIZE:
+            if len(nodes) % (2 * DIGEST_SIZE):
+                nodes = nodes + nodes[-DIGEST_SIZE:]
+            parents = bytearray()
+            for offset in range(0, len(nodes), 2 * DIGEST_SIZE):
+                parents += _hash_pair_bytes(nodes[offset:offset + DIGEST_SIZE],
+                                            nodes[offset + DIGEST_SIZE:offset + 2 * DIGEST_SIZE])
+            self.levels.append(parents)
+            nodes = parents
+
+    def _node(self, level: int, position: int) -> bytes:
+        offset = position * DIGEST_SIZE
+        return bytes(self.levels[level][offset:offset + DIGEST_SIZE])
+
+    def _set(self, level: int, position: int, digest: bytes):
+        offset = position * DIGEST_SIZE
+        self.levels[level][offset:offset + DIGEST_SIZE] = digest
+
+    def _hex_level(self, level: int) -> list[str]:
+        return list(self._iter_hex_level(level))
+
+    def _iter_hex_level(self, level: int, padded: bool = False):
+        nodes = self.levels[level]
+        for offset in range(0, len(nodes), DIGEST_SIZE):
+            yield nodes[offset:offset + DIGEST_SIZE].hex()
+        count = len(nodes) // DIGEST_SIZE
+        if padded and count > 1 and count % 2 != 0:
+            yield nodes[-DIGEST_SIZE:].hex()
+
+    def _resize(self):
+        """Grows or shrinks each level to fit the current leaf count."""
+        sizes = _level_sizes(len(self))
+        del self.levels[max(len(sizes), 1):]
+        for level, size in enumerate(sizes):
+            if level == len(self.levels):
+                self.levels.append(bytearray())
+            nodes = self.levels[level]
+            if len(nodes) > size * DIGEST_SIZE:
+                del nodes[size * DIGEST_SIZE:]
+            elif len(nodes) < size * DIGEST_SIZE:
+                nodes.extend(bytes(size * DIGEST_SIZE - len(nodes)))
+
+    def _rehash_path(self, position: int):
+        """Recomputes every ancestor of a leaf."""
+        for level in range(len(self.levels) - 1):
+            parent = position // 2
+            left = self._node(level, 2 * parent)
+            if (2 * parent + 1) * DIGEST_SIZE < len(self.levels[level]):
+                right = self._node(level, 2 * parent + 1)
+            else:
+                right = left
+            self._set(level + 1, parent, _hash_pair_bytes(left, right))
+            position = parent
+
+def _level_sizes(leaf_count: int) -> list[int]:
+    """Node counts per level, leaves first, for a tree of leaf_count leaves."""
+    if not leaf_count:
+        return [0]
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+def _expected_path_length(proof: dict) -> int | None:
+    leaf_count = proof.get("leaf_count")
+    if leaf_count is None:
+        return None
+    return len(_level_sizes(leaf_count)) - 1
+
+def verify(proof: dict, root: str | None) -> bool:
+    """
+    Checks an inclusion proof from MerkleTree.prove against a Merkle Root.
+
+    With sorted-pair hashing a proof shows that the leaf is in the tree, but
+    not where: the position in the proof is informational only. The path
+    length is checked against the leaf count when the proof records one.
+    Returns False when root is None.
+    """
+    return verify_batch([proof], root)[0]
+
+def verify_batch(proofs: list[dict], root: str | None) -> list[bool]:
+    """
+    Checks many inclusion proofs against one Merkle Root in a single pass.
+
+    All proofs are folded one level at a time on raw digests, and each
+    distinct pair is hashed once per level, so proofs that share upper parts
+    of their paths (as proofs from one tree do) share that work.
+
+    Returns:
+        One bool per proof, in input order. Every proof fails when root is
+        None (no tree to check against).
+    """
+    if root is None:
+        return [False] * len(proofs)
+    root_digest = bytes.fromhex(root)
+    current = [bytes.fromhex(proof["leaf"]) for proof in proofs]
+    paths = [[bytes.fromhex(sibling) for sibling in proof["path"]] for proof in proofs]
+    valid = [_expected_path_length(proof) in (None, len(path)) for proof, path in zip(proofs, paths)]
+
+    for level in range(max((len(path) for path in paths), default=0)):
+        pair_cache = {}
+        for i, path in enumerate(paths):
+            if level >= len(path):
+                continue
+            node, sibling = current[i], path[level]
+            key = node + sibling if node <= sibling else sibling + node
+            parent = pair_cache.get(key)
+            if parent is None:
+                parent = pair_cache[key] = _hash_pair_bytes(node, sibling)
+            current[i] = parent
+
+    return [ok and node == root_digest for ok, node in zip(valid, current)]
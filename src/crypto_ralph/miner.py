@@ -0,0 +1,208 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Nonces handed to a worker per task. Large enough to amortise the IPC round
+# trip, small enough that an early stop does not waste much work.
+CHUNK_SIZE = 65536
+NOT_FOUND = -1
+
+# Nonces are hashed as "<high digits><4 low digits>". The low digits come from
+# this preallocated table, so the hot loop never formats an integer.
+SUFFIX_DIGITS = 4
+SUFFIX_SPAN = 10 ** SUFFIX_DIGITS
+_SUFFIXES = [b'%0*d' % (SUFFIX_DIGITS, i) for i in range(SUFFIX_SPAN)]
+
+# Shared "lowest winning nonce" slot and cancel flag, installed in each
+# worker by _init_worker.
+_found = None
+_cancelled = None
+
+class MiningTimeout(TimeoutError):
+    """Raised when no proof is found within the allotted mining time."""
+
+def _init_worker(found, cancelled):
+    """Process pool initializer that shares the winning-nonce slot and cancel flag."""
+    global _found, _cancelled
+    _found = found
+    _cancelled = cancelled
+
+def _record_win(nonce: int):
+    """Publishes a winning nonce to the other workers if it is the lowest so far."""
+    if _found is None:
+        return
+    with _found.get_lock():
+        if _found.value == NOT_FOUND or nonce < _found.value:
+            _found.value = nonce
+
+def _lost_race(nonce: int) -> bool:
+    """
+    Returns True once another worker has published a proof below this nonce,
+    or the mining run has been cancelled.
+    """
+    if _found is None:
+        return False
+    if _cancelled.is_set():
+        return True
+    best = _found.value
+    return best != NOT_FOUND and best < nonce
+
+def _scan_range(payload: bytes, prefix: str, start: int, stop: int) -> tuple[int, str | None, int]:
+    """
+    Scans the nonces in [start, stop) for a hash with the required prefix.
+
+    The constant payload is hashed once and every attempt resumes from a
+    copy of that midstate, so the cost per nonce does not depend on the size
+    of completion_data. The leading-zero test is done on the raw digest.
+
+    Returns:
+        A tuple of (nonce, hash, hashes_computed). The nonce is NOT_FOUND and
+        the hash is None when the range holds no proof, or when the scan was
+        abandoned because a lower nonce had already been found elsewhere.
+    """
+    base = hashlib.sha256(payload)
+    zero_bytes, odd_nibble = divmod(len(prefix), 2)
+    zeros = bytes(zero_bytes)
+    suffixes = _SUFFIXES
+
+    nonce = start
+    while nonce < stop:
+        if _lost_race(nonce):
+            return NOT_FOUND, None, nonce - start
+
+        high, low = divmod(nonce, SUFFIX_SPAN)
+        end = min(stop - high * SUFFIX_SPAN, SUFFIX_SPAN)
+        if high:
+            head = base.copy()
+            head.update(b'%d' % high)
+            copy = head.copy
+        else:
+            # Nonces below SUFFIX_SPAN have no leading zeros to borrow.
+            copy = base.copy
+
+        for low in range(low, end):
+            h = copy()
+            h.update(suffixes[low] if high else b'%d' % low)
+            digest = h.digest()
+            if digest[:zero_bytes] == zeros and (not odd_nibble or digest[zero_bytes] < 16):
+                nonce = high * SUFFIX_SPAN + low
+                _record_win(nonce)
+                return nonce, h.hexdigest(), nonce - start + 1
+
+        nonce = high * SUFFIX_SPAN + end
+    return NOT_FOUND, None, stop - start
+
+def _mine_parallel(payload: bytes, prefix: str, first_nonce: int, workers: int,
+                   chunk_size: int, deadline: float | None) -> tuple[int, str, int]:
+    """
+    Fans nonce chunks out over a process pool until a proof is found.
+
+    Chunks are handed out in increasing nonce order, and once a proof is found
+    only chunks below it keep running. The lowest winning nonce is therefore the
+    same one the serial loop would have returned. If the deadline passes first,
+    every worker is told to stop and (NOT_FOUND, None, hashes) is returned.
+    """
+    found = multiprocessing.Value('q', NOT_FOUND)
+    cancelled = multiprocessing.Event()
+    best_nonce, best_hash = NOT_FOUND, None
+    total_hashes = 0
+    next_start = first_nonce
+    pending = {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(found, cancelled)) as pool:
+        while True:
+            while best_nonce == NOT_FOUND and len(pending) < workers * 2:
+                future = pool.submit(_scan_range, payload, prefix, next_start, next_start + chunk_size)
+                pending[future] = next_start
+                next_start += chunk_size
+
+            if not pending:
+                break
+
+            # Once a proof is in hand only a few lower chunks remain, so the
+            # deadline no longer applies.
+            timeout = None
+            if deadline is not None and best_nonce == NOT_FOUND:
+                timeout = max(deadline - time.time(), 0)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                cancelled.set()
+                for future in pending:
+                    future.cancel()
+                return NOT_FOUND, None, total_hashes
+
+            for future in done:
+                del pending[future]
+                nonce, hash_result, hashes = future.result()
+                total_hashes += hashes
+                if nonce != NOT_FOUND and (best_nonce == NOT_FOUND or nonce < best_nonce):
+                    best_nonce, best_hash = nonce, hash_result
+
+            if best_nonce != NOT_FOUND:
+                # Chunks that start above the winner can never beat it.
+                for future, start in list(pending.items()):
+                    if start > best_nonce and future.cancel():
+                        del pending[future]
+
+    return best_nonce, best_hash, total_hashes
+
+def mine(story_id: str, last_hash: str, completion_data: dict, difficulty: int,
+         workers: int | None = None, chunk_size: int = CHUNK_SIZE, timeout: float | None = None) -> dict:
+    """
+    Mines a proof-of-work across all available cores.
+
+    The hashed data is identical to the original serial miner
+    (story_id + last_hash + sorted JSON of completion_data + nonce), and the
+    returned nonce is always the lowest valid one, so proofs are bit-for-bit
+    the same as before.
+
+    Args:
+        story_id: The user story the proof is for.
+        last_hash: Hash of the block the new block will follow.
+        completion_data: The task's completion payload.
+        difficulty: Number of leading hex zeros the hash must have.
+        workers: Number of mining processes. Defaults to os.cpu_count().
+        chunk_size: Number of nonces scanned per task.
+        timeout: Give up after this many seconds. None mines until a proof is found.
+
+    Returns:
+        The proof dict, including the aggregate hash rate in hashes per second.
+
+    Raises:
+        MiningTimeout: If timeout elapses before a proof is found.
+    """
+    workers = workers or os.cpu_count() or 1
+    payload = f"{story_id}{last_hash}{json.dumps(completion_data, sort_keys=True)}".encode()
+    prefix = '0' * difficulty
+    start_time = time.time()
+    deadline = None if timeout is None else start_time + timeout
+
+    # Low difficulties are usually solved within the first chunk, so try it
+    # in-process before paying for a process pool.
+    nonce, hash_result, total_hashes = _scan_range(payload, prefix, 0, chunk_size)
+    next_start = chunk_size
+
+    if nonce == NOT_FOUND and workers > 1:
+        nonce, hash_result, hashes = _mine_parallel(payload, prefix, next_start, workers, chunk_size, deadline)
+        total_hashes += hashes
+
+    while nonce == NOT_FOUND:
+        if deadline is not None and time.time() >= deadline:
+            raise MiningTimeout(f"No proof at difficulty {difficulty} after {total_hashes:,} hashes "
+                                f"in {time.time() - start_time:.2f}s")
+        nonce, hash_result, hashes = _scan_range(payload, prefix, next_start, next_start + chunk_size)
+        total_hashes += hashes
+        next_start += chunk_size
+
+    elapsed = time.time() - start_time
+    return {
+        "nonce": nonce,
+        "hash": hash_result,
+        "difficulty": difficulty,
+        "mining_time_seconds": round(elapsed, 2),
+        "hash_rate": round(total_hashes / elapsed) if elapsed > 0 else total_hashes
+    }
@@ -0,0 +1,129 @@
+import heapq
+import json
+import os
+from pathlib import Path
+
+class PRDStore:
+    """
+    Cached view of PRD.json with a priority queue of pending user stories.
+
+    The file is only re-parsed when its mtime or size changes. Pending stories
+    live in a heap ordered like the original sort (priority, then position in
+    the PRD), and superseded heap entries are discarded lazily, so next_task,
+    mark_passed and reprioritize are all O(log n).
+    """
+    def __init__(self, prd_file: str | Path):
+        self.prd_file = Path(prd_file)
+        if not self.prd_file.exists():
+            raise FileNotFoundError(f"PRD.json not found at {self.prd_file}")
+        self._signature = None
+        # Stories handed out by claim_next and not yet marked passed. Kept
+        # across reloads so an in-flight story is never handed out twice.
+        self._claimed = set()
+        self.refresh()
+
+    @property
+    def prd(self) -> dict:
+        self.refresh()
+        return self._prd
+
+    @property
+    def consensus_rules(self) -> dict:
+        return self.prd.get('consensus_rules', {})
+
+    def refresh(self) -> bool:
+        """Reloads the PRD if the file changed on disk. Returns True if it did."""
+        stat = os.stat(self.prd_file)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        with open(self.prd_file, 'r', encoding='utf-8') as f:
+            self._prd = json.load(f)
+        self._signature = signature
+        self._rebuild_queue()
+        return True
+
+    def story(self, story_id: str) -> dict:
+        self.refresh()
+        return self._stories[story_id]
+
+    def next_task(self) -> dict | None:
+        """Returns the highest-priority pending story without removing it."""
+        self.refresh()
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            if self._is_current(entry):
+                return self._stories[entry[3]]
+            heapq.heappop(heap)
+        return None
+
+    def claim_next(self) -> dict | None:
+        """
+        Removes the highest-priority pending story from the queue and returns
+        it, so that several stories can be in flight at once.
+        """
+        story = self.next_task()
+        if story is not None:
+            heapq.heappop(self._heap)
+            self._claimed.add(story['id'])
+        return story
+
+    def release(self, story_id: str):
+        """Returns a claimed story that was not completed to the pending queue."""
+        self.refresh()
+        if story_id in self._claimed:
+            self._claimed.discard(story_id)
+            if not self._stories[story_id].get('passes', False):
+                self._push(story_id)
+
+    def mark_passed(self, story_id: str, proof_hash: str | None = None, verified_by: str = "CryptoRalph_v1.0"):
+        """Marks a story as complete, recording its proof hash if one is given."""
+        self.refresh()
+        story = self._stories[story_id]
+        story['passes'] = True
+        if proof_hash:
+            story['proof'] = {"hash": proof_hash, "verified_by": verified_by}
+            story['verification_hash'] = proof_hash
+        # Any heap entry for the story is now stale and will be skipped.
+        self._versions[story_id] += 1
+        self._claimed.discard(story_id)
+
+    def reprioritize(self, story_id: str, priority: int | float):
+        """Changes a story's priority and requeues it if it is still pending."""
+        self.refresh()
+        story = self._stories[story_id]
+        story['priority'] = priority
+        self._versions[story_id] += 1
+        if not story.get('passes', False) and story_id not in self._claimed:
+            self._push(story_id)
+
+    def save(self):
+        """Writes the in-memory PRD back to PRD.json atomically."""
+        tmp_file = self.prd_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._prd, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.prd_file)
+        stat = os.stat(self.prd_file)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+
+    def _rebuild_queue(self):
+        user_stories = self._prd.get('userStories', [])
+        self._stories = {story['id']: story for story in user_stories}
+        self._positions = {story['id']: position for position, story in enumerate(user_stories)}
+        self._versions = dict.fromkeys(self._stories, 0)
+        self._heap = [self._entry(story['id']) for story in user_stories if not story.get('passes', False)]
+        heapq.heapify(self._heap)
+
+    def _entry(self, story_id: str) -> tuple:
+        priority = self._stories[story_id].get('priority', float('inf'))
+        return (priority, self._positions[story_id], self._versions[story_id], story_id)
+
+    def _push(self, story_id: str):
+        heapq.heappush(self._heap, self._entry(story_id))
+
+    def _is_current(self, entry: tuple) -> bool:
+        story_id = entry[3]
+        if entry[2] != self._versions[story_id] or story_id in self._claimed:
+            return False
+        return not self._stories[story_id].get('passes', False)
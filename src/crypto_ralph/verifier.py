@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .difficulty import DifficultyController
+from .ledger import GENESIS_HASH, Ledger
+
+CHECKPOINT_FILENAME = "verify_checkpoint.json"
+# Blocks per worker task. Small ledgers are checked in-process.
+BATCH_SIZE = 2048
+# The genesis block links to this all-zero hash (see Blockchain._create_genesis_block).
+GENESIS_PREVIOUS_HASH = "0" * 64
+
+def proof_hash(story_id: str, previous_hash: str, completion_data, nonce: int) -> str:
+    """Recomputes a block's proof-of-work hash exactly as the miner produced it."""
+    data_to_hash = f"{story_id}{previous_hash}{json.dumps(completion_data, sort_keys=True)}{nonce}"
+    return hashlib.sha256(data_to_hash.encode()).hexdigest()
+
+def _is_genesis(block: dict) -> bool:
+    return (block.get('index') == 0 and block.get('story_id') == "GENESIS"
+            and block.get('previous_hash') == GENESIS_PREVIOUS_HASH and block.get('hash') == GENESIS_HASH)
+
+def _check_batch(lines: list[bytes], default_difficulty: int, min_difficulty: int,
+                 starts_chain: bool = False) -> list[tuple[int, str, str, str | None]]:
+    """
+    Decodes a batch of ledger lines and re-checks each block's proof.
+
+    Only the first block of the ledger (starts_chain) may be the genesis
+    block, which carries no proof. A proof that claims a difficulty below
+    min_difficulty is rejected, whatever its hash.
+
+    Returns:
+        One (index, previous_hash, hash, error) tuple per block, where error
+        is None for a valid proof. Linkage between blocks is left to the caller.
+    """
+    results = []
+    for position, line in enumerate(lines):
+        block = json.loads(line)
+        error = None
+        if not (starts_chain and position == 0 and _is_genesis(block)):
+            proof = block.get('proof') or {}
+            difficulty = proof.get('difficulty', default_difficulty)
+            recomputed = proof_hash(block['story_id'], block['previous_hash'],
+                                    block['completion_data'], proof.get('nonce'))
+            if not isinstance(difficulty, int) or difficulty < min_difficulty:
+                error = f"proof claims difficulty {difficulty}, below the minimum {min_difficulty}"
+            elif recomputed != proof.get('hash'):
+                error = f"proof hash mismatch (recomputed {recomputed})"
+            elif recomputed != block['hash']:
+                error = "block hash does not match its proof"
+            elif not recomputed.startswith('0' * difficulty):
+                error = f"hash does not meet difficulty {difficulty}"
+        results.append((block['index'], block['previous_hash'], block['hash'], error))
+    return results
+
+def _batches(ledger: Ledger, position: int, batch_size: int):
+    batch = []
+    for line in ledger.iter_from(position, raw=True):
+        batch.append(line)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _load_checkpoint(ledger: Ledger, checkpoint_file: Path) -> tuple[int, str | None, int | None]:
+    """
+    Returns (next position, hash of the block before it, its block index).
+
+    A checkpoint is only trusted if the block it names still carries the
+    recorded hash; otherwise verification restarts from the beginning.
+    """
+    try:
+        checkpoint = json.loads(checkpoint_file.read_text(encoding='utf-8'))
+        position = checkpoint['position']
+        block = ledger[position]
+    except (OSError, ValueError, KeyError, IndexError):
+        return 0, None, None
+    if block['hash'] != checkpoint['hash'] or block['index'] != checkpoint['index']:
+        return 0, None, None
+    return position + 1, block['hash'], block['index']
+
+def _save_checkpoint(checkpoint_file: Path, position: int, index: int, block_hash: str):
+    tmp_file = checkpoint_file.with_suffix('.tmp')
+    tmp_file.write_text(json.dumps({"position": position, "index": index, "hash": block_hash}), encoding='utf-8')
+    os.replace(tmp_file, checkpoint_file)
+
+def verify_ledger(ledger: Ledger, checkpoint_file: Path | None = None, default_difficulty: int = 2,
+                  workers: int | None = None, full: bool = False, batch_size: int = BATCH_SIZE,
+                  min_difficulty: int | None = None) -> dict:
+    """
+    Verifies proofs, hash linkage and block numbering across a ledger.
+
+    Proof hashes are recomputed in parallel batches while the ledger is
+    streamed; linkage is checked in order as batches come back. When a
+    checkpoint file is given, verification resumes after the last block
+    already known to be good, and the checkpoint is moved forward to the end
+    of the valid prefix of the chain.
+
+    Args:
+        ledger: The ledger to audit.
+        checkpoint_file: Where the verified-up-to marker is kept, if anywhere.
+        default_difficulty: Difficulty assumed for proofs that do not record one.
+        workers: Number of verification processes. Defaults to os.cpu_count().
+        full: Ignore any checkpoint and re-verify the whole chain.
+        batch_size: Blocks per worker task.
+        min_difficulty: Lowest difficulty a proof may claim. Defaults to
+            default_difficulty.
+
+    Returns:
+        A report dict with the blocks checked, the verified-through block
+        index, and a list of errors (empty if the chain is valid).
+    """
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+    if min_difficulty is None:
+        min_difficulty = default_difficulty
+    position, previous_hash, previous_index = 0, None, None
+    if checkpoint_file and not full:
+        position, previous_hash, previous_index = _load_checkpoint(ledger, Path(checkpoint_file))
+    resumed_from = previous_index
+
+    errors = []
+    checked = 0
+    valid_through = None  # (position, index, hash) of the end of the valid prefix
+
+    def consume(results):
+        nonlocal previous_hash, previous_index, checked, valid_through
+        for index, block_previous_hash, block_hash, error in results:
+            if error is None:
+                expected = GENESIS_HASH if previous_hash is None else previous_hash
+                if previous_index is None and index == 0:
+                    expected = block_previous_hash
+                if block_previous_hash != expected:
+                    error = f"previous_hash {block_previous_hash[:12]}... does not link to {expected[:12]}..."
+                elif previous_index is not None and index != previous_index + 1:
+                    error = f"block index {index} does not follow {previous_index}"
+            if error:
+                errors.append({"index": index, "error": error})
+            elif not errors:
+                valid_through = (position + checked, index, block_hash)
+            previous_hash, previous_index = block_hash, index
+            checked += 1
+
+    batches = _batches(ledger, position, batch_size)
+    if workers == 1 or len(ledger) - position <= batch_size:
+        for batch_number, batch in enumerate(batches):
+            consume(_check_batch(batch, default_difficulty, min_difficulty,
+                                 starts_chain=position == 0 and batch_number == 0))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for batch_number, batch in enumerate(batches):
+                in_flight.append(pool.submit(_check_batch, batch, default_difficulty, min_difficulty,
+                                             starts_chain=position == 0 and batch_number == 0))
+                if len(in_flight) >= workers * 2:
+                    consume(in_flight.popleft().result())
+            while in_flight:
+                consume(in_flight.popleft().result())
+
+    if checkpoint_file and valid_through:
+        _save_checkpoint(Path(checkpoint_file), *valid_through)
+
+    return {
+        "valid": not errors,
+        "blocks_checked": checked,
+        "resumed_from": resumed_from,
+        "verified_through": valid_through[1] if valid_through else resumed_from,
+        "errors": errors,
+        "verification_time_seconds": round(time.time() - start_time, 3)
+    }
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify a Crypto-Ralph ledger.")
+    parser.add_argument("project_dir", nargs="?", default=".", help="Directory containing ledger.jsonl")
+    parser.add_argument("--full", action="store_true", help="Ignore the checkpoint and verify every block")
+    parser.add_argument("--workers", type=int, default=None, help="Number of verification processes")
+    args = parser.parse_args(argv)
+
+    project_dir = Path(args.project_dir)
+    ledger_file = project_dir / "ledger.jsonl"
+    if not ledger_file.exists():
+        print(f"FATAL ERROR: Ledger not found at {ledger_file}")
+        return 2
+
+    rules = {}
+    prd_file = project_dir / "PRD.json"
+    if prd_file.exists():
+        with open(prd_file, 'r', encoding='utf-8') as f:
+            rules = json.load(f).get('consensus_rules', {})
+    difficulty = rules.get('difficulty', 2)
+
+    report = verify_ledger(Ledger(ledger_file, read_only=True), project_dir / CHECKPOINT_FILENAME, default_difficulty=difficulty,
+                           workers=args.workers, full=args.full,
+                           min_difficulty=DifficultyController(rules).min_difficulty)
+    for error in report['errors']:
+        print(f"  Block {error['index']}: {error['error']}")
+    status = "VALID" if report['valid'] else "INVALID"
+    print(f"Ledger {status}: checked {report['blocks_checked']} blocks "
+          f"(resumed after block {report['resumed_from']}), verified through block "
+          f"{report['verified_through']} in {report['verification_time_seconds']}s")
+    return 0 if report['valid'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())